@@ -17,4 +17,149 @@ class Settings:
     FIREBASE_PROJECT_ID: str = os.getenv("FIREBASE_PROJECT_ID", "")
 
     # Firebase Service Account
-    FIREBASE_SERVICE_ACCOUNT: str = os.getenv("FIREBASE_SERVICE_ACCOUNT", "")
\ No newline at end of file
+    FIREBASE_SERVICE_ACCOUNT: str = os.getenv("FIREBASE_SERVICE_ACCOUNT", "")
+
+    # Workflow worker pool ("thread" or "process") for blocking extraction stages
+    WORKFLOW_EXECUTOR: str = os.getenv("WORKFLOW_EXECUTOR", "thread")
+
+    # Max number of blocking extraction stages running at once
+    WORKFLOW_MAX_WORKERS: int = int(os.getenv("WORKFLOW_MAX_WORKERS", "8"))
+
+    # Extraction cache persistent backend ("sqlite", "firestore" or "memory" for in-process only)
+    EXTRACTION_CACHE_BACKEND: str = os.getenv("EXTRACTION_CACHE_BACKEND", "sqlite")
+
+    # SQLite file for the extraction cache
+    EXTRACTION_CACHE_PATH: str = os.getenv("EXTRACTION_CACHE_PATH", ".cache/extraction_cache.sqlite3")
+
+    # How long an extracted recipe stays cached (seconds)
+    EXTRACTION_CACHE_TTL_SECONDS: int = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+    # Max number of recipes held in the in-process cache
+    EXTRACTION_CACHE_MAX_ENTRIES: int = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "1000"))
+
+    # Shared HTTP client: timeout per request (seconds)
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+
+    # Shared HTTP client: number of hosts kept in the pool and keep-alive connections per host
+    HTTP_POOL_HOSTS: int = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+    HTTP_POOL_MAXSIZE: int = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+
+    # Shared HTTP client: retries on connection errors / 429 / 5xx, with exponential backoff
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_SECONDS: float = float(os.getenv("HTTP_BACKOFF_SECONDS", "0.5"))
+
+    # Shared OpenAI client: timeout per call (seconds) and retries
+    OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+    # Background job store ("sqlite" to keep queued jobs across restarts, or "memory")
+    JOB_STORE_BACKEND: str = os.getenv("JOB_STORE_BACKEND", "sqlite")
+
+    # SQLite file for the background job store
+    JOB_STORE_PATH: str = os.getenv("JOB_STORE_PATH", ".cache/jobs.sqlite3")
+
+    # Number of background jobs running at once, and at most per user
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_MAX_PER_USER: int = int(os.getenv("JOB_MAX_PER_USER", "2"))
+
+    # Attempts per job, with exponential backoff between retries (seconds)
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "2"))
+
+    # YouTube transcripts: estimated token budget for a single extraction call; longer
+    # transcripts are split into chunks of TRANSCRIPT_CHUNK_TOKENS extracted in parallel
+    TRANSCRIPT_TOKEN_BUDGET: int = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "6000"))
+    TRANSCRIPT_CHUNK_TOKENS: int = int(os.getenv("TRANSCRIPT_CHUNK_TOKENS", "4000"))
+
+    # Verified Firebase ID tokens cached by token hash (each entry also expires with its token)
+    AUTH_TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_TOKEN_CACHE_MAX_ENTRIES", "10000"))
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = int(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "3600"))
+
+    # How often the ID token signing certificates are refreshed in the background (seconds)
+    AUTH_CERT_REFRESH_SECONDS: int = int(os.getenv("AUTH_CERT_REFRESH_SECONDS", "1800"))
+
+    # Max downloads in flight per host (politeness limit shared by all workflow runs)
+    HTTP_PER_HOST_CONCURRENCY: int = int(os.getenv("HTTP_PER_HOST_CONCURRENCY", "4"))
+
+    # Max LLM calls in flight and started per minute (0 = no per-minute limit)
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "300"))
+
+    # Max requests accepted in one batch workflow call
+    BATCH_MAX_REQUESTS: int = int(os.getenv("BATCH_MAX_REQUESTS", "50"))
+
+    # Per-stage model routing for LLM calls ("stage=model,..."; unlisted stages use OPENAI_MODEL)
+    LLM_MODEL_ROUTES: str = os.getenv("LLM_MODEL_ROUTES", "")
+
+    # LLM token and time budget for each workflow request (all of its calls together)
+    LLM_REQUEST_TOKEN_BUDGET: int = int(os.getenv("LLM_REQUEST_TOKEN_BUDGET", "60000"))
+    LLM_REQUEST_TIME_BUDGET_SECONDS: float = float(os.getenv("LLM_REQUEST_TIME_BUDGET_SECONDS", "120"))
+
+    # Output token limit of the routed models (16384 for gpt-4o-mini); a call's completion
+    # is only capped below it when less than this is left of the request's token budget
+    LLM_MAX_COMPLETION_TOKENS: int = int(os.getenv("LLM_MAX_COMPLETION_TOKENS", "16384"))
+
+    # YouTube metadata: "fast" reads title, description and caption tracks from the watch page
+    # (falling back to yt-dlp on failure); "yt_dlp" always uses yt-dlp's full extraction
+    YOUTUBE_FETCH_MODE: str = os.getenv("YOUTUBE_FETCH_MODE", "fast")
+    YOUTUBE_BASE_URL: str = os.getenv("YOUTUBE_BASE_URL", "https://www.youtube.com")
+
+    # Per-video metadata cache (caption URLs are signed and expire after a few hours)
+    YOUTUBE_METADATA_CACHE_MAX_ENTRIES: int = int(os.getenv("YOUTUBE_METADATA_CACHE_MAX_ENTRIES", "1000"))
+    YOUTUBE_METADATA_CACHE_TTL_SECONDS: int = int(os.getenv("YOUTUBE_METADATA_CACHE_TTL_SECONDS", "3600"))
+
+    # Workflow metrics (stage spans, latency histograms, error counters) served at /metrics
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Workflow requests slower than this are logged with their per-stage breakdown (0 = off)
+    SLOW_REQUEST_SECONDS: float = float(os.getenv("SLOW_REQUEST_SECONDS", "30"))
+
+    # Sample stacks during workflow requests (one at a time) and save the slow ones' profiles
+    PROFILE_SLOW_REQUESTS: bool = os.getenv("PROFILE_SLOW_REQUESTS", "false").lower() == "true"
+    PROFILE_SAMPLE_INTERVAL_SECONDS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_SECONDS", "0.01"))
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", ".cache/profiles")
+
+    # Import the extractor and LLM dependencies and create the shared clients in the
+    # background once the server is listening, instead of on the first request
+    PREWARM_ON_STARTUP: bool = os.getenv("PREWARM_ON_STARTUP", "true").lower() == "true"
+
+    # Recipe catalog store ("sqlite" or "firestore") and its SQLite file
+    RECIPE_STORE_BACKEND: str = os.getenv("RECIPE_STORE_BACKEND", "sqlite")
+    RECIPE_STORE_PATH: str = os.getenv("RECIPE_STORE_PATH", ".cache/recipes.sqlite3")
+
+    # Default and max page size of recipe and saved-recipe listings
+    RECIPE_PAGE_SIZE: int = int(os.getenv("RECIPE_PAGE_SIZE", "20"))
+    RECIPE_MAX_PAGE_SIZE: int = int(os.getenv("RECIPE_MAX_PAGE_SIZE", "100"))
+
+    # Recipe search index snapshot (written on shutdown, reloaded on startup; empty = off)
+    SEARCH_SNAPSHOT_PATH: str = os.getenv("SEARCH_SNAPSHOT_PATH", ".cache/search_index.npz")
+
+    # How often the search index reads recipes added by other instances (seconds, 0 = off)
+    SEARCH_REFRESH_SECONDS: int = int(os.getenv("SEARCH_REFRESH_SECONDS", "60"))
+
+    # Search index catch-up re-reads recipes this far before its watermark (seconds), for
+    # ones committed after a recipe with a later created_at was already indexed
+    SEARCH_CATCH_UP_GRACE_SECONDS: float = float(os.getenv("SEARCH_CATCH_UP_GRACE_SECONDS", "300"))
+
+    # Near-duplicate detection: a scraped text at least DEDUP_THRESHOLD similar (estimated
+    # Jaccard of word shingles) to one already extracted from another URL reuses that extraction
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_THRESHOLD: float = float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+
+    # A near-duplicate is only reused if at least this share of its recipe's ingredients
+    # appear in the scraped text (rules out pages that merely share a site's boilerplate)
+    DEDUP_MIN_INGREDIENT_OVERLAP: float = float(os.getenv("DEDUP_MIN_INGREDIENT_OVERLAP", "0.8"))
+
+    # Max fingerprints kept in the near-duplicate index (oldest evicted first)
+    DEDUP_MAX_ENTRIES: int = int(os.getenv("DEDUP_MAX_ENTRIES", "50000"))
+
+_settings: Settings | None = None
+
+def get_settings() -> Settings:
+    """
+    Get the app settings (one instance shared by every module)
+    """
+    global _settings
+    if _settings is None:
+        _settings = Settings()
+    return _settings
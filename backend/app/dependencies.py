@@ -1,10 +1,11 @@
 """
-Firebase auth dependencies.
+Firebase auth dependencies (verified tokens are cached, see app/services/tokens.py).
 """
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from firebase_admin import auth
+from app.services.tokens import verify_id_token
 
 # Extract Bearer token from request and handle error manually if missing
 security = HTTPBearer(auto_error=False)
@@ -25,7 +26,7 @@ async def get_current_user(
     token = credentials.credentials
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = await verify_id_token(token)
         return decoded_token # Returns a dict with user info
     except auth.InvalidIdTokenError:
         raise HTTPException(
@@ -46,7 +47,7 @@ async def get_current_user_optional(
     token = credentials.credentials
 
     try:
-        decoded_token = auth.verify_id_token(token)
+        decoded_token = await verify_id_token(token)
         return decoded_token # Returns a dict with user info
     except auth.InvalidIdTokenError:
         return None # Don't raise, just move on and return None
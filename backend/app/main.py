@@ -1,22 +1,49 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.config import Settings
-from app.routes import auth, test
+from app.config import get_settings
+from app.routes import auth, jobs, recipes, test, users
+from app.services.executor import shutdown_executor
+from app.services.clients import close_clients
+from app.services.jobs import get_job_queue
+from app.services.metrics import render_metrics
+from app.services.search import refresh_search_index_periodically, save_search_index
+from app.services.tokens import refresh_certificates_periodically
+from app.services.warmup import prewarm
 from firebase_admin import credentials, initialize_app
 from contextlib import asynccontextmanager
+import asyncio
 
 # Initialize Settings
-settings = Settings()
+settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Lifespan manager for Firebase initialization"""
+    """Lifespan manager for Firebase initialization, shared clients and the background job queue"""
     cred_path = settings.FIREBASE_SERVICE_ACCOUNT
+    certificate_refresher = None
     if cred_path and settings.FIREBASE_PROJECT_ID:
         cred = credentials.Certificate(cred_path)
         initialize_app(cred)
         print("Firebase initialized")
+        # Keep the ID token signing certificates warm so auth doesn't fetch them on a request
+        certificate_refresher = asyncio.create_task(refresh_certificates_periodically())
+    # Heavy workflow dependencies and shared clients load in the background once the
+    # server is listening (they are otherwise created on first use)
+    warmup = asyncio.create_task(prewarm()) if settings.PREWARM_ON_STARTUP else None
+    search_refresher = asyncio.create_task(refresh_search_index_periodically()) if settings.SEARCH_REFRESH_SECONDS else None
+    await get_job_queue().start()
     yield
+    if warmup is not None:
+        warmup.cancel()
+    if search_refresher is not None:
+        search_refresher.cancel()
+    save_search_index()
+    if certificate_refresher is not None:
+        certificate_refresher.cancel()
+    await get_job_queue().stop()
+    await close_clients()
+    shutdown_executor()
     print("Firebase app shut down")
 
 # Initialize FastAPI app
@@ -28,6 +55,9 @@ app = FastAPI(
 
 # Include routes
 app.include_router(auth.router)
+app.include_router(jobs.router)
+app.include_router(recipes.router)
+app.include_router(users.router)
 app.include_router(test.router)
 
 # Configure CORS
@@ -47,4 +77,9 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint to verify API is running"""
-    return {"status": "healthy", "service": "meal-prepper-api"}
\ No newline at end of file
+    return {"status": "healthy", "service": "meal-prepper-api"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: workflow stage latencies and errors, LLM usage, extraction cache"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.dependencies import get_current_user
+from app.services.agents.models import UserRequest
+from app.services.jobs import Job, get_job_queue
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+async def _get_own_job(job_id: str, current_user: dict) -> Job:
+    """
+    The job, if it belongs to the current user; other users' jobs are reported as not found
+    """
+    job = await get_job_queue().get(job_id)
+    if job is None or job.user_id != current_user["uid"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+@router.post("", status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(user_request: UserRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Queue a workflow run and return its job ID immediately.
+    The same recipe URL + adjustments always map to the same job for a user.
+    """
+
+    job = await get_job_queue().submit(user_request, current_user["uid"])
+    return {"status": "success", "result": {"job_id": job.id, "status": job.status}}
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=60), current_user: dict = Depends(get_current_user)):
+    """
+    Get one of the user's jobs with its status and ConvertedRecipe result.
+    With `wait`, long-polls up to that many seconds for the job to finish.
+    """
+
+    job = await _get_own_job(job_id, current_user)
+    if wait:
+        job = await get_job_queue().wait(job_id, wait) or job
+    return {"status": "success", "result": job}
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Cancel one of the user's queued or running jobs
+    """
+
+    await _get_own_job(job_id, current_user)
+    job = await get_job_queue().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return {"status": "success", "result": {"job_id": job.id, "status": job.status}}
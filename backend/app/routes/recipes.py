@@ -0,0 +1,81 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from app.config import get_settings
+from app.dependencies import get_current_user
+from app.services.agents.models import OriginalRecipe
+from app.services.recipes import get_recipe_catalog
+from app.services.search import get_recipe_search
+
+settings = get_settings()
+
+router = APIRouter(prefix="/api/recipes", tags=["recipes"])
+
+# Recipe creation request (from an AI extraction result or entered manually)
+class RecipeCreate(BaseModel):
+    source_url: str
+    recipe: OriginalRecipe
+
+@router.get("")
+async def list_recipes(
+    limit: int = Query(settings.RECIPE_PAGE_SIZE, ge=1, le=settings.RECIPE_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    source_type: Literal["web", "youtube"] | None = None,
+):
+    """
+    List catalog recipes, newest first (summary fields only).
+    Pass the returned next_cursor as `cursor` to get the next page.
+    """
+
+    try:
+        page = await get_recipe_catalog().list_recipes(limit, cursor, source_type)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"status": "success", "result": page}
+
+@router.get("/search")
+async def search_recipes(
+    q: str = "",
+    ingredients: str = "",
+    mode: Literal["all", "any"] = "all",
+    limit: int = Query(settings.RECIPE_PAGE_SIZE, ge=1, le=settings.RECIPE_MAX_PAGE_SIZE),
+):
+    """
+    Search recipes by text (`q`, BM25 over title, description and ingredients) and/or by
+    comma-separated `ingredients` the recipe must contain (all of them, or any with mode=any,
+    ranked by how many match). Returns recipe summaries with their scores.
+    """
+
+    hits = await get_recipe_search().search(q, ingredients, mode, limit)
+    summaries = await get_recipe_catalog().store.get_summaries([hit.recipe_id for hit in hits]) if hits else {}
+    items = [{**hit.model_dump(), "recipe": summaries[hit.recipe_id]} for hit in hits if hit.recipe_id in summaries]
+    return {"status": "success", "result": {"items": items}}
+
+@router.get("/suggest")
+async def suggest_recipes(prefix: str, limit: int = Query(10, ge=1, le=50)):
+    """
+    Autocomplete the last word of a search box (most common recipe terms first)
+    """
+
+    return {"status": "success", "result": await get_recipe_search().suggest(prefix, limit)}
+
+@router.get("/{recipe_id}")
+async def get_recipe(recipe_id: str):
+    """
+    Get a single recipe
+    """
+
+    recipe = await get_recipe_catalog().get_recipe(recipe_id)
+    if recipe is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    return {"status": "success", "result": recipe}
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_recipe(recipe_create: RecipeCreate, current_user: dict = Depends(get_current_user)):
+    """
+    Add a recipe to the catalog under the ID of its source URL.
+    Returns the existing recipe if that URL is already in the catalog.
+    """
+
+    recipe = await get_recipe_catalog().create_recipe(recipe_create.source_url, recipe_create.recipe, current_user["uid"])
+    return {"status": "success", "result": recipe}
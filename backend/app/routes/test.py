@@ -1,7 +1,15 @@
+import json
 from fastapi import APIRouter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from app.services.agents.models import UserRequest, UserAdjustments
-from app.services.agents.workflow import run_workflow
+from app.config import get_settings
+from app.services.agents.workflow import run_batch_workflow, run_workflow, stream_workflow
 from app.services.agents.extraction import scrape_web_page
+from app.services.cache import get_extraction_cache
+from app.services.agents.llm import get_llm_metrics
+
+settings = get_settings()
 
 router = APIRouter(prefix="/api/test", tags=["test"])
 
@@ -9,7 +17,7 @@ router = APIRouter(prefix="/api/test", tags=["test"])
 async def test_workflow(recipe_url: str, target_servings: int, target_calories: int, target_protein: int):
     """
     Test endpoint for the run_workflow function.
-    Accepts a UserRequest and returns the extracted OriginalRecipe.
+    Accepts a UserRequest and returns the ConvertedRecipe.
     """
 
     user_request = UserRequest(
@@ -22,13 +30,82 @@ async def test_workflow(recipe_url: str, target_servings: int, target_calories:
     )
 
     try:
-        original_recipe = run_workflow(user_request)
+        converted_recipe = await run_workflow(user_request)
         return {
             "status": "success",
-            "result": original_recipe
+            "result": converted_recipe
         }
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
-        }
\ No newline at end of file
+        }
+
+def _sse(event: str, data: dict) -> str:
+    """
+    Format one Server-Sent Event
+    """
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+@router.post("/workflow/stream")
+async def test_workflow_stream(recipe_url: str, target_servings: int, target_calories: int, target_protein: int):
+    """
+    Streaming test endpoint for the workflow.
+    Sends a Server-Sent Event per stage (with timings) and the ConvertedRecipe at the end.
+    """
+
+    user_request = UserRequest(
+        recipe_url=recipe_url,
+        user_adjustments=UserAdjustments(
+            target_servings=target_servings,
+            target_calories=target_calories,
+            target_protein=target_protein
+        )
+    )
+
+    async def events():
+        try:
+            async for event, data in stream_workflow(user_request):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"status": "error", "message": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.post("/workflow/batch")
+async def test_workflow_batch(user_requests: list[UserRequest]):
+    """
+    Test endpoint for the batch workflow (e.g. importing a weekly meal plan).
+    Accepts a list of UserRequests and returns a success/error entry per request, in order.
+    """
+
+    if len(user_requests) > settings.BATCH_MAX_REQUESTS:
+        return {
+            "status": "error",
+            "message": f"A batch can contain at most {settings.BATCH_MAX_REQUESTS} requests"
+        }
+
+    return {
+        "status": "success",
+        "result": await run_batch_workflow(user_requests)
+    }
+
+@router.get("/cache")
+async def test_cache_stats():
+    """
+    Test endpoint for the extraction cache hit/miss/eviction counters.
+    """
+
+    return get_extraction_cache().stats()
+
+@router.get("/llm")
+async def test_llm_metrics():
+    """
+    Test endpoint for LLM call metrics (tokens, cached tokens, latency per stage and model).
+    """
+
+    return get_llm_metrics().stats()
\ No newline at end of file
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel
+from app.config import get_settings
+from app.dependencies import get_current_user
+from app.services.agents.models import ConvertedRecipe
+from app.services.recipes import get_recipe_catalog
+
+settings = get_settings()
+
+router = APIRouter(prefix="/api/users/me", tags=["users"])
+
+# Save request (a saved recipe is identified by its recipe_id)
+class SaveRecipeRequest(BaseModel):
+    recipe_id: str
+    notes: str = ""
+    converted_recipe: ConvertedRecipe | None = None # When saving a workflow result
+
+# Notes update request
+class SavedRecipeUpdate(BaseModel):
+    notes: str
+
+@router.get("/saved-recipes")
+async def list_saved_recipes(
+    limit: int = Query(settings.RECIPE_PAGE_SIZE, ge=1, le=settings.RECIPE_MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    List the current user's saved recipes with notes, most recently saved first.
+    Pass the returned next_cursor as `cursor` to get the next page.
+    """
+
+    try:
+        page = await get_recipe_catalog().list_saved(current_user["uid"], limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return {"status": "success", "result": page}
+
+@router.get("/saved-recipes/{recipe_id}")
+async def get_saved_recipe(recipe_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Get one saved recipe (with its converted recipe, if saved from the workflow)
+    """
+
+    saved = await get_recipe_catalog().get_saved(current_user["uid"], recipe_id)
+    if saved is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved recipe not found")
+    return {"status": "success", "result": saved}
+
+@router.post("/saved-recipes", status_code=status.HTTP_201_CREATED)
+async def save_recipe(save_request: SaveRecipeRequest, current_user: dict = Depends(get_current_user)):
+    """
+    Save a catalog recipe to the current user's collection
+    """
+
+    saved = await get_recipe_catalog().save_recipe(
+        current_user["uid"], save_request.recipe_id, save_request.notes, save_request.converted_recipe
+    )
+    if saved is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Recipe not found")
+    return {"status": "success", "result": saved}
+
+@router.patch("/saved-recipes/{recipe_id}")
+async def update_saved_recipe(recipe_id: str, update: SavedRecipeUpdate, current_user: dict = Depends(get_current_user)):
+    """
+    Update the notes of a saved recipe
+    """
+
+    saved = await get_recipe_catalog().update_notes(current_user["uid"], recipe_id, update.notes)
+    if saved is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved recipe not found")
+    return {"status": "success", "result": saved}
+
+@router.delete("/saved-recipes/{recipe_id}")
+async def delete_saved_recipe(recipe_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Remove a recipe from the current user's collection
+    """
+
+    if not await get_recipe_catalog().delete_saved(current_user["uid"], recipe_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Saved recipe not found")
+    return {"status": "success", "result": {"recipe_id": recipe_id}}
@@ -0,0 +1,241 @@
+"""
+Streaming caption parser for YouTube transcripts (VTT, SRT, json3 and srv3).
+
+`iter_caption_segments` consumes a caption file as an iterable of chunks (e.g. an HTTP
+response's iter_content) and yields clean text segments as it goes, so a multi-hour file
+is never held in memory as one string, a list of lines or a parsed JSON document:
+- VTT / SRT: read line by line, one cue block at a time
+- json3: events decoded one object at a time from a sliding buffer
+- srv3: XML pull parser, each <p> discarded once read
+
+Cue text is stripped of inline timing tags and entities, and overlapping cues are merged:
+auto-captions repeat each line across several cues (the "rolling" display), so a repeated
+line extends the previous segment instead of producing a new one. With timestamps=True,
+segments come with their start/end times (seconds) for aligning steps to the video.
+"""
+
+import codecs
+import html
+import json
+import re
+from collections.abc import Iterable, Iterator
+from itertools import chain
+from typing import NamedTuple
+from xml.etree.ElementTree import XMLPullParser
+from app.services.agents.transcript import RollingLines
+
+_TIMING_PATTERN = re.compile(r"((?:\d+:)?\d{1,2}:\d{2}[.,]\d{3})\s*-->\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{3})")
+_TAG_PATTERN = re.compile(r"<[^>]*>")
+_SEPARATOR_PATTERN = re.compile(r"[\s,]*")
+
+class Segment(NamedTuple):
+    """
+    Caption text with its start and end time in seconds
+    """
+    start: float
+    end: float
+    text: str
+
+def _decoded(chunks: Iterable[bytes | str]) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    for chunk in chunks:
+        text = decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def _clean(text: str) -> str:
+    if "<" in text:
+        text = _TAG_PATTERN.sub("", text)
+    if "&" in text:
+        text = html.unescape(text)
+    return " ".join(text.split())
+
+def _timestamp_seconds(timestamp: str) -> float:
+    seconds = 0.0
+    for part in timestamp.replace(",", ".").split(":"):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+def _text_cues(chunks: Iterable[str]) -> Iterator[tuple[str, str, str]]:
+    # VTT and SRT: blocks separated by empty lines; a block is a cue if it has a timing line,
+    # and its text is every line after it (header, NOTE/STYLE blocks and cue IDs are skipped).
+    # A line of spaces is cue content, not a separator (YouTube uses " " for an empty row).
+    # Timestamps stay strings until a caller asks for them (see iter_caption_segments).
+    timing = None
+    rest = ""
+    for chunk in chain(chunks, ("\n",)):
+        lines = (rest + chunk).split("\n")
+        rest = lines.pop()
+        for line in lines:
+            if not line or line == "\r":
+                timing = None
+            elif timing is None:
+                match = _TIMING_PATTERN.search(line) if "-->" in line else None
+                if match:
+                    timing = match.groups()
+            else:
+                text = _clean(line)
+                if text:
+                    yield timing[0], timing[1], text
+
+def _last_event_start(buffer: str, position: int) -> int:
+    # Events start with {"tStartMs" (whitespace allowed after the brace). An unescaped quote
+    # can't follow a brace inside a JSON string, so this only matches real event starts.
+    key = buffer.rfind('"tStartMs"', position)
+    if key == -1:
+        return -1
+    brace = buffer.rfind("{", position, key)
+    if brace == -1 or (brace + 1 < key and not buffer[brace + 1:key].isspace()):
+        return -1
+    return brace
+
+def _json3_events(chunks: Iterable[str]) -> Iterator[dict]:
+    chunks = iter(chunks)
+    buffer = ""
+    # Skip to the start of the events array (the pens and window styles before it are small)
+    while True:
+        key = buffer.find('"events"')
+        bracket = buffer.find("[", key) if key != -1 else -1
+        if bracket != -1:
+            buffer = buffer[bracket + 1:]
+            break
+        chunk = next(chunks, None)
+        if chunk is None:
+            return
+        buffer += chunk
+
+    decode = json.JSONDecoder().raw_decode
+    skip = _SEPARATOR_PATTERN.match
+    batched = True
+    position = 0
+    while True:
+        position = skip(buffer, position).end()
+        if buffer.startswith("]", position):
+            return
+        # Decode every complete event in the buffer with one json.loads: all events before
+        # the last one that has started are whole
+        boundary = _last_event_start(buffer, position) if batched else -1
+        if boundary > position:
+            try:
+                events = json.loads("[" + buffer[position:boundary].rstrip().rstrip(",") + "]")
+            except json.JSONDecodeError:
+                batched = False # Unexpected layout: decode one event at a time from here on
+            else:
+                yield from events
+                position = boundary
+                continue
+        try:
+            event, position = decode(buffer, position)
+        except json.JSONDecodeError:
+            # The next event is incomplete: keep only the unread part and read another chunk
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise ValueError("Truncated json3 caption file")
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield event
+
+def _json3_cues(chunks: Iterable[str]) -> Iterator[tuple[float, float, str]]:
+    for event in _json3_events(chunks):
+        segs = event.get("segs")
+        if not segs:
+            continue
+        start = event.get("tStartMs", 0) / 1000
+        end = start + event.get("dDurationMs", 0) / 1000
+        text = "".join([seg.get("utf8", "") for seg in segs])
+        for line in text.split("\n") if "\n" in text else (text,):
+            text = _clean(line)
+            if text:
+                yield start, end, text
+
+def _srv3_cues(chunks: Iterable[str]) -> Iterator[tuple[float, float, str]]:
+    parser = XMLPullParser(events=("start", "end"))
+    parent = None
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                if element.tag == "body":
+                    parent = element
+                continue
+            if element.tag != "p":
+                continue
+            start = int(element.get("t", 0)) / 1000
+            end = start + int(element.get("d", 0)) / 1000
+            for line in "".join(element.itertext()).split("\n"):
+                text = _clean(line)
+                if text:
+                    yield start, end, text
+            # Drop each paragraph once read so the tree doesn't grow with the file
+            if parent is not None:
+                parent.remove(element)
+    parser.close()
+
+def merge_cues(cues: Iterable[tuple]) -> Iterator[tuple]:
+    """
+    Merge overlapping (start, end, text) cues, in time order: a line repeated from the
+    recent cues extends the current segment to that cue's end, and a line that restates
+    the previous line before adding words keeps only the new words
+    """
+    rolling = RollingLines()
+    pending = None
+    for start, end, line in cues:
+        text = rolling.new_text(line)
+        if text is None:
+            if pending is not None:
+                pending = (pending[0], end, pending[2])
+            continue
+        if not text:
+            continue
+        if pending is not None:
+            yield pending
+        pending = (start, end, text)
+    if pending is not None:
+        yield pending
+
+def caption_format(head: str) -> str:
+    """
+    Format of a caption file from its first characters: "json3", "srv3", "vtt" or "srt"
+    """
+    head = head.lstrip()
+    if head.startswith("{"):
+        return "json3"
+    if head.startswith("<"):
+        return "srv3"
+    if head.startswith("WEBVTT"):
+        return "vtt"
+    return "srt"
+
+# Cue parser per format, and how its cue times convert to seconds (None: already seconds)
+_PARSERS = {
+    "json3": (_json3_cues, None),
+    "srv3": (_srv3_cues, None),
+    "vtt": (_text_cues, _timestamp_seconds),
+    "srt": (_text_cues, _timestamp_seconds),
+}
+
+def iter_caption_segments(chunks: Iterable[bytes | str], timestamps: bool = False) -> Iterator[str | Segment]:
+    """
+    Clean, merged caption text from a VTT, SRT, json3 or srv3 file read in chunks.
+    Yields strings, or Segment(start, end, text) tuples with timestamps=True.
+    """
+    chunks = _decoded(chunks)
+    head = ""
+    for chunk in chunks:
+        head += chunk
+        if len(head.lstrip()) >= len("WEBVTT"):
+            break
+    if not head.strip():
+        return
+
+    parse, seconds = _PARSERS[caption_format(head)]
+    segments = merge_cues(parse(chain((head,), chunks)))
+    if timestamps:
+        for start, end, text in segments:
+            yield Segment(seconds(start), seconds(end), text) if seconds else Segment(start, end, text)
+    else:
+        for segment in segments:
+            yield segment[2]
@@ -0,0 +1,125 @@
+"""
+Single-pass text extraction from a downloaded web page (the input to LLM extraction).
+
+The page is parsed into one lxml tree. Regions that never hold the recipe (HTML comments,
+scripts, navigation, ads, reader comments, share bars, ...) are pruned from it, then the
+candidate strategies run against that same tree in order of precision until one returns
+enough text:
+- "trafilatura": main-content extraction (favor_recall)
+- "html2txt": all text in the body
+- "baseline": paragraph-level baseline extraction
+Each strategy receives the parsed tree (trafilatura copies it instead of re-parsing), and
+the winning strategy is reported with per-stage timings.
+
+trafilatura (with the numpy and language-detection stack it loads) is imported on first
+use rather than with this module, keeping it off the app's cold start (app/services/warmup.py
+loads it in the background once the server is up).
+"""
+
+import logging
+import time
+from lxml import etree
+from lxml.html import HtmlElement
+
+logger = logging.getLogger(__name__)
+
+# Minimum text length accepted from each strategy
+MIN_CONTENT_CHARS = {"trafilatura": 100, "html2txt": 100, "baseline": 20}
+
+# Elements removed with their content before extraction (plus every <script> except JSON-LD,
+# which trafilatura reads when the visible text is thin)
+PRUNED_TAGS = ("style", "noscript", "template", "svg", "iframe", "nav", "button")
+
+# Elements removed like the class/id tokens below, unless they hold the recipe
+# (<aside class="recipe-card">). <form> is kept: ASP.NET pages wrap the whole body in one.
+GUARDED_TAGS = ("aside", "footer")
+
+# Class/id tokens of recipe-irrelevant regions (whole tokens only, so "sidebar-layout" wrappers survive)
+PRUNED_TOKENS = (
+    "ad", "ads", "advert", "advertisement", "adsbygoogle", "sponsored", "promo",
+    "comments", "comment-list", "commentlist", "comment-respond", "respond", "disqus_thread",
+    "share", "sharing", "share-buttons", "social-share", "sharedaddy", "social-icons",
+    "newsletter", "subscribe", "signup", "related-posts", "yarpp-related", "jp-relatedposts",
+    "sidebar", "widget-area", "breadcrumbs", "cookie-banner", "cookie-notice", "popup", "modal",
+)
+
+_PRUNED_TOKENS = frozenset(PRUNED_TOKENS)
+_GUARDED_TAGS = frozenset(GUARDED_TAGS)
+_RECIPE_DESCENDANT = etree.XPath(".//*[contains(@class, 'recipe') or contains(@id, 'recipe')]")
+
+def parse_html(html: str) -> HtmlElement | None:
+    """
+    Parse a page once into the tree shared by structured-data and text extraction
+    """
+    from trafilatura.utils import load_html
+    return load_html(html)
+
+def prune_tree(tree: HtmlElement) -> int:
+    """
+    Remove recipe-irrelevant regions from the tree in place. Elements whose class or id
+    mentions "recipe", and anything inside or around them, are kept. Returns the number of
+    removed elements.
+    """
+    removed = len(tree.xpath("//comment()")) + sum(1 for _ in tree.iter(*PRUNED_TAGS))
+    etree.strip_elements(tree, etree.Comment, *PRUNED_TAGS, with_tail=False)
+    for script in list(tree.iter("script")):
+        if script.get("type") != "application/ld+json":
+            script.drop_tree()
+            removed += 1
+
+    body = tree.find(".//body")
+    stack = [body if body is not None else tree]
+    while stack:
+        for element in list(stack.pop()):
+            classes = element.get("class", "")
+            if "recipe" in classes or "recipe" in element.get("id", ""):
+                continue
+            pruned = element.tag in _GUARDED_TAGS or _PRUNED_TOKENS.intersection(classes.split()) or element.get("id") in _PRUNED_TOKENS
+            if pruned and not _RECIPE_DESCENDANT(element):
+                element.drop_tree()
+                removed += 1
+            else:
+                stack.append(element)
+    return removed
+
+def _trafilatura_text(tree: HtmlElement) -> str:
+    from trafilatura import extract
+    return extract(tree, output_format="txt", favor_recall=True) or ""
+
+def _html2txt_text(tree: HtmlElement) -> str:
+    from trafilatura import html2txt
+    return html2txt(tree)
+
+def _baseline_text(tree: HtmlElement) -> str:
+    from trafilatura import baseline
+    return baseline(tree)[1]
+
+STRATEGIES = (("trafilatura", _trafilatura_text), ("html2txt", _html2txt_text), ("baseline", _baseline_text))
+
+def extract_page_content(html: str | HtmlElement) -> dict:
+    """
+    Extract the text content of a page with a single parse.
+    Returns {"content", "strategy", "timings_ms"}; raises ValueError if no strategy
+    finds extractable content. A tree passed in is pruned in place.
+    """
+    timings_ms = {}
+    start = time.perf_counter()
+    tree = parse_html(html) if isinstance(html, str) else html
+    if tree is None:
+        raise ValueError("Page contains no extractable content")
+    timings_ms["parse"] = round((time.perf_counter() - start) * 1000, 2)
+
+    start = time.perf_counter()
+    pruned = prune_tree(tree)
+    timings_ms["prune"] = round((time.perf_counter() - start) * 1000, 2)
+
+    for strategy, run in STRATEGIES:
+        start = time.perf_counter()
+        content = run(tree)
+        timings_ms[strategy] = round((time.perf_counter() - start) * 1000, 2)
+        if content and len(content.strip()) >= MIN_CONTENT_CHARS[strategy]:
+            logger.info("Extracted %d chars with %s (pruned %d elements, %s ms)", len(content), strategy, pruned, timings_ms)
+            return {"content": content, "strategy": strategy, "timings_ms": timings_ms}
+
+    logger.info("No extractable content (pruned %d elements, %s ms)", pruned, timings_ms)
+    raise ValueError("Page contains no extractable content")
@@ -0,0 +1,204 @@
+"""
+Deterministic conversion of an OriginalRecipe to the user's meal prep targets.
+
+Scaling to the target servings and hitting the per-serving calorie/protein targets is
+arithmetic, so it runs locally in well under a millisecond. The LLM is only an optional
+step for rewriting the instruction text to match the new quantities.
+"""
+
+from collections.abc import Sequence
+import re
+from typing import TYPE_CHECKING
+from app.services.agents import llm
+from app.services.agents.models import (
+    ConversionMetadata,
+    ConversionRequest,
+    ConvertedRecipe,
+    Ingredient,
+    NutritionalInfo,
+    OriginalRecipe,
+    RewrittenInstructions,
+)
+from app.services.agents.ingredients import parse_quantity
+
+if TYPE_CHECKING:
+    import numpy as np
+    from openai import AsyncOpenAI
+
+# Bounds on how far a protein/carb source may be scaled beyond the servings scaling
+MIN_ADJUSTMENT = 0.5
+MAX_ADJUSTMENT = 2.0
+
+# Pulls adjustments toward 1.0 so small target misses don't distort the recipe
+REGULARIZATION = 0.05
+
+PROTEIN_SOURCE_KEYWORDS = (
+    "chicken", "turkey", "beef", "steak", "pork", "lamb", "bison", "venison", "salmon", "tuna",
+    "cod", "tilapia", "shrimp", "prawn", "fish", "tofu", "tempeh", "seitan", "egg white",
+    "greek yogurt", "cottage cheese", "protein powder", "whey",
+)
+CARB_SOURCE_KEYWORDS = (
+    "rice", "pasta", "spaghetti", "penne", "macaroni", "noodle", "potato", "oats", "quinoa",
+    "couscous", "barley", "bread", "tortilla", "bun", "bagel", "farro", "bulgur",
+)
+
+# Ingredients that mention a source but aren't one ("chicken broth", "rice vinegar")
+NON_SOURCE_KEYWORDS = ("broth", "stock", "bouillon", "vinegar", "wine", "crumbs", "starch", "flour", "seasoning")
+
+# Protein share of calories above which an ingredient counts as a protein source
+PROTEIN_CALORIE_SHARE = 0.35
+
+SYSTEM_INSTRUCTIONS_REWRITE = "Rewrite these recipe instructions so any quantities, pan sizes or batch counts mentioned match the converted ingredient list. Keep the same steps and order."
+
+_RANGE_PATTERN = re.compile(r"^\s*([^-–]+?)\s*[-–]\s*([^-–]+?)\s*$")
+
+def _format_number(value: float) -> float | int:
+    value = round(value, 2)
+    return int(value) if value == int(value) else value
+
+def scale_quantity(quantity: float | int | str, factor: float) -> float | int | str:
+    """
+    Scale an ingredient quantity. Numbers and numeric strings ("1 1/2", "½") become numbers,
+    ranges ("2-3") scale both ends, descriptive quantities ("to taste") are left as is.
+    """
+    if isinstance(quantity, (int, float)):
+        return _format_number(quantity * factor)
+
+    value = parse_quantity(quantity)
+    if value is None:
+        return quantity
+
+    match = _RANGE_PATTERN.match(quantity)
+    if match:
+        low, high = parse_quantity(match.group(1)), parse_quantity(match.group(2))
+        if low is not None and high is not None:
+            return f"{_format_number(low * factor)}-{_format_number(high * factor)}"
+    return _format_number(value * factor)
+
+def classify_ingredient(ingredient: Ingredient, calories: float, protein: float) -> str | None:
+    """
+    Classify an ingredient as a "protein" or "carb" source (the ones the optimizer may adjust)
+    """
+    name = ingredient.name.lower()
+    if any(keyword in name for keyword in NON_SOURCE_KEYWORDS):
+        return None
+    if any(keyword in name for keyword in PROTEIN_SOURCE_KEYWORDS):
+        return "protein"
+    if calories > 0 and protein * 4 / calories >= PROTEIN_CALORIE_SHARE:
+        return "protein"
+    if any(keyword in name for keyword in CARB_SOURCE_KEYWORDS):
+        return "carb"
+    return None
+
+def solve_adjustments(
+    calories: "np.ndarray",
+    protein: "np.ndarray",
+    adjustable: "np.ndarray",
+    target_calories: float,
+    target_protein: float,
+) -> "np.ndarray":
+    """
+    Solve for per-ingredient multipliers so that the recipe totals hit the calorie and protein
+    targets. Only `adjustable` ingredients move; the least-squares system is normalized by the
+    targets, regularized toward no change, and the result clipped to [MIN_ADJUSTMENT, MAX_ADJUSTMENT].
+    """
+    import numpy as np
+    multipliers = np.ones(len(calories))
+    if not adjustable.any():
+        return multipliers
+
+    rows, rhs = [], []
+    for values, target in ((calories, target_calories), (protein, target_protein)):
+        if target > 0:
+            rows.append(values[adjustable] / target)
+            rhs.append((target - values[~adjustable].sum()) / target)
+    if not rows:
+        return multipliers
+
+    count = int(adjustable.sum())
+    weight = np.sqrt(REGULARIZATION)
+    a = np.vstack([np.array(rows), weight * np.eye(count)])
+    b = np.concatenate([np.array(rhs), weight * np.ones(count)])
+    solution, *_ = np.linalg.lstsq(a, b, rcond=None)
+
+    multipliers[adjustable] = np.clip(solution, MIN_ADJUSTMENT, MAX_ADJUSTMENT)
+    return multipliers
+
+def convert_recipe(
+    conversion_request: ConversionRequest,
+    recipe_url: str,
+    ingredient_macros: Sequence[tuple[float, float] | None],
+) -> ConvertedRecipe:
+    """
+    Converts a recipe to the user's servings and per-serving calorie/protein targets.
+    `ingredient_macros` holds (calories, protein) for each ingredient at its original quantity,
+    or None where unknown (those ingredients are scaled but not counted or adjusted).
+    Raises ValueError when the original or target servings aren't positive.
+    """
+    original = conversion_request.original_recipe
+    adjustments = conversion_request.user_adjustments
+    servings = adjustments.target_servings
+    if original.servings <= 0:
+        raise ValueError(f"Cannot convert a recipe with {original.servings} servings")
+    if servings <= 0:
+        raise ValueError(f"Target servings must be positive, got {servings}")
+    factor = servings / original.servings
+
+    # numpy is imported on first use to keep it off the app's cold start
+    import numpy as np
+    macros = np.array([m if m is not None else (0.0, 0.0) for m in ingredient_macros], dtype=float).reshape(-1, 2) * factor
+    calories, protein = macros[:, 0], macros[:, 1]
+    roles = [classify_ingredient(ingredient, c, p) for ingredient, c, p in zip(original.ingredients, calories, protein)]
+    adjustable = np.array(
+        [role is not None and parse_quantity(str(ingredient.quantity)) is not None for ingredient, role in zip(original.ingredients, roles)],
+        dtype=bool,
+    )
+
+    multipliers = solve_adjustments(
+        calories, protein, adjustable,
+        adjustments.target_calories * servings, adjustments.target_protein * servings,
+    )
+
+    ingredients = [
+        Ingredient(name=ingredient.name, quantity=scale_quantity(ingredient.quantity, factor * multiplier), unit=ingredient.unit)
+        for ingredient, multiplier in zip(original.ingredients, multipliers)
+    ]
+
+    per_serving = (macros * multipliers[:, None]).sum(axis=0) / servings
+
+    notes = [f"Scaled from {original.servings} to {servings} servings (x{factor:.2f})."]
+    for ingredient, role, multiplier in zip(original.ingredients, roles, multipliers):
+        if abs(multiplier - 1) >= 0.01:
+            notes.append(f"Adjusted {role} source '{ingredient.name}' by x{multiplier:.2f} toward the calorie/protein targets.")
+    unknown = [ingredient.name for ingredient, m in zip(original.ingredients, ingredient_macros) if m is None]
+    if unknown:
+        notes.append(f"No nutrition data for: {', '.join(unknown)}.")
+
+    return ConvertedRecipe(
+        title=original.title,
+        description=original.description,
+        servings=servings,
+        ingredients=ingredients,
+        instructions=list(original.instructions),
+        nutritional_info=NutritionalInfo(calories=int(round(per_serving[0])), protein=int(round(per_serving[1]))),
+        conversion_metadata=ConversionMetadata(original_recipe_url=recipe_url, conversion_notes=" ".join(notes)),
+    )
+
+async def rewrite_instructions(original: OriginalRecipe, converted: ConvertedRecipe, openai_client: "AsyncOpenAI") -> ConvertedRecipe:
+    """
+    Optional LLM step: rewrite the instruction text so quantities mentioned in the steps
+    match the converted ingredient list. Everything else stays deterministic.
+    """
+
+    prompt = f"""Original servings: {original.servings}
+Converted servings: {converted.servings}
+
+Converted ingredients:
+{chr(10).join(f"- {i.quantity} {i.unit or ''} {i.name}".replace("  ", " ") for i in converted.ingredients)}
+
+Original instructions:
+{chr(10).join(f"{n}. {step}" for n, step in enumerate(original.instructions, 1))}"""
+
+    rewritten = await llm.parse("rewrite_instructions", SYSTEM_INSTRUCTIONS_REWRITE, prompt, RewrittenInstructions, openai_client)
+
+    return converted.model_copy(update={"instructions": rewritten.instructions})
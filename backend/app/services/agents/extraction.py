@@ -1,16 +1,33 @@
-from app.config import Settings
+from app.config import get_settings
 from app.services.agents.models import OriginalRecipe
 import sys
 import os
+import logging
 import requests
-import json
-import re
-from openai import OpenAI
-import yt_dlp
-from trafilatura import extract, html2txt, baseline
-from trafilatura.downloads import fetch_response
-
-settings = Settings()
+import asyncio
+import time
+from contextlib import aclosing
+from typing import TYPE_CHECKING
+from app.services.executor import run_blocking
+from app.services.agents import llm
+from app.services.agents.content import extract_page_content, parse_html
+from app.services.agents.structured_data import extract_structured_recipe
+from app.services.agents.youtube import fetch_video_captions
+from app.services.agents.transcript import count_tokens, merge_recipes, preprocess_transcript, split_transcript
+from app.services.cache import get_extraction_cache
+from app.services.clients import get_http_session, get_openai_client
+from app.services.duplicates import MIN_SHINGLES, MIN_TRANSCRIPT_SHINGLES, fingerprint, get_duplicate_detector
+from app.services.limits import get_host_limiter
+from app.services.metrics import observe_timings, span
+from app.services.urls import normalize_url
+
+if TYPE_CHECKING:
+  import numpy as np
+  from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
 
 SYSTEM_INSTRUCTIONS_WEB = """
 
@@ -161,96 +178,37 @@ Remember: Your output must strictly conform to the OriginalRecipe schema. Extrac
 def scrape_youtube_video(url: str) -> str:
   """
   Scrapes a YouTube video and returns the transcript.
+  Metadata and captions come from the watch page (or yt-dlp as a fallback), see youtube.py.
   """
-  ydl_opts = {
-    'writesubtitles': True,
-    'writeautomaticsub': True,
-    'subtitleslangs': ['en', 'en-US'],
-    'skip_download': True,
-    'quiet': True,
-  }
+  video = fetch_video_captions(url)
+  lines = video['lines']
+  logger.debug("YouTube metadata from %s", video['source'])
 
-  with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-    info = ydl.extract_info(url, download=False)
-
-  transcript = ""
-  subtitles = info.get('subtitles', {})
-  auto_captions = info.get('automatic_captions', {})
-  
-  # Try to find the best subtitle format available
-  subtitle_url = None
-  subtitle_format = None
-
-  # Prefer manual subtitles, then auto-generated
-  for lang in ['en', 'en-US']:
-      if lang in subtitles:
-          # Look for vtt or srt format first
-          for sub in subtitles[lang]:
-              if sub.get('ext') in ['vtt', 'srt']:
-                  subtitle_url = sub['url']
-                  subtitle_format = sub.get('ext')
-                  break
-          if not subtitle_url:
-              subtitle_url = subtitles[lang][0]['url']
-              subtitle_format = subtitles[lang][0].get('ext', 'vtt')
-          break
-      elif lang in auto_captions:
-          for sub in auto_captions[lang]:
-              if sub.get('ext') in ['vtt', 'srt']:
-                  subtitle_url = sub['url']
-                  subtitle_format = sub.get('ext')
-                  break
-          if not subtitle_url:
-              subtitle_url = auto_captions[lang][0]['url']
-              subtitle_format = auto_captions[lang][0].get('ext', 'vtt')
-          break
-  
-  if subtitle_url:
-      response = requests.get(subtitle_url)
-      raw_content = response.text
-      
-      # Parse based on format
-      if raw_content.strip().startswith('{'):
-          # JSON format - parse it
-          data = json.loads(raw_content)
-          text_parts = []
-          for event in data.get('events', []):
-              if 'segs' in event:
-                  for seg in event['segs']:
-                      utf8_text = seg.get('utf8', '')
-                      if utf8_text.strip() and utf8_text != '\n':
-                          text_parts.append(utf8_text)
-          transcript = ' '.join(text_parts)
-      else:
-          # VTT or SRT format - extract text
-          lines = raw_content.split('\n')
-          text_lines = []
-          for line in lines:
-              line = line.strip()
-              if (line and 
-                  not line.startswith('WEBVTT') and
-                  '-->' not in line and 
-                  not line.isdigit() and
-                  line != ''):
-                  # Remove HTML-like tags
-                  clean_line = re.sub(r'<[^>]+>', '', line)
-                  if clean_line:
-                      text_lines.append(clean_line)
-          transcript = ' '.join(text_lines)
-  
+  # Auto-captions repeat rolling lines; dedupe and strip filler before counting tokens
+  start = time.perf_counter()
+  transcript = preprocess_transcript(lines)
+  transcript_tokens = {'raw': count_tokens(' '.join(lines)), 'cleaned': count_tokens(transcript)}
+  logger.debug("Transcript tokens: %d raw -> %d cleaned", transcript_tokens['raw'], transcript_tokens['cleaned'])
 
   return {
-    'title': info.get('title'),
-    'description': info.get('description'),
+    'title': video['title'],
+    'description': video['description'],
     'transcript': transcript,
+    'transcript_tokens': transcript_tokens,
+    'source': video['source'],
+    'timings_ms': {**video['timings_ms'], 'preprocess': round((time.perf_counter() - start) * 1000, 2)},
     }
 
-def extract_recipe_from_youtube_video(title: str, description: str, transcript: str, openai_client: OpenAI) -> OriginalRecipe:
+def build_youtube_prompt(title: str, description: str, transcript: str, part: tuple[int, int] | None = None) -> str:
   """
-  Extracts a recipe from the scraped YouTube video (title, description, transcript)
+  Builds the user prompt for YouTube recipe extraction.
+  `part` is (index, count) when the transcript is one chunk of a longer video.
   """
 
-  prompt = f"""Extract the complete recipe from this YouTube cooking video.
+  transcript_heading = "Video Transcript:" if part is None else f"Video Transcript (part {part[0]} of {part[1]} - extract what this part covers):"
+
+  # Static instructions first, per-video content last (keeps the cacheable prompt prefix long)
+  return f"""Extract the complete recipe from this YouTube cooking video. Ensure accuracy and completeness - extract every ingredient and every step from the transcript. Use the description to supplement information if needed. Cross-reference all sources to ensure nothing is missed.
 
 Video Title:
 {title}
@@ -258,74 +216,314 @@ Video Title:
 Video Description:
 {description or 'No description available'}
 
-Video Transcript:
-{transcript}
+{transcript_heading}
+{transcript}"""
 
-Ensure accuracy and completeness - extract every ingredient and every step from the transcript. Use the description to supplement information if needed. Cross-reference all sources to ensure nothing is missed."""
-  
-  response = openai_client.beta.chat.completions.parse(
-    model="gpt-4o-mini",
-    messages=[
-      {"role": "system", "content": SYSTEM_INSTRUCTIONS_YOUTUBE},
-      {"role": "user", "content": prompt},
-    ],
-    response_format=OriginalRecipe,
-  )
+async def extract_recipe_from_youtube_video(title: str, description: str, transcript: str, openai_client: "AsyncOpenAI") -> OriginalRecipe | None:
+  """
+  Extracts a recipe from the scraped YouTube video (title, description, transcript), or None.
+  Transcripts over TRANSCRIPT_TOKEN_BUDGET are split into chunks that are extracted in
+  parallel and merged in order.
+  """
 
-  return response.choices[0].message.parsed
+  if count_tokens(transcript) <= settings.TRANSCRIPT_TOKEN_BUDGET:
+    return await llm.parse("youtube_extraction", SYSTEM_INSTRUCTIONS_YOUTUBE, build_youtube_prompt(title, description, transcript), OriginalRecipe, openai_client)
 
-def scrape_web_page(url: str) -> str:
+  chunks = split_transcript(transcript, settings.TRANSCRIPT_CHUNK_TOKENS)
+  logger.info("Transcript over budget: extracting %d chunks in parallel", len(chunks))
+  recipes = await asyncio.gather(*(
+    llm.parse("youtube_extraction", SYSTEM_INSTRUCTIONS_YOUTUBE, build_youtube_prompt(title, description, chunk, (i, len(chunks))), OriginalRecipe, openai_client, share=len(chunks))
+    for i, chunk in enumerate(chunks, 1)
+  ))
+
+  return merge_recipes([recipe for recipe in recipes if recipe is not None])
+
+async def stream_recipe_from_youtube_video(title: str, description: str, transcript: str, openai_client: "AsyncOpenAI"):
   """
-  Scrapes a web page and returns the text content using trafilatura.
+  Streaming variant of extract_recipe_from_youtube_video.
+  Yields ("partial", dict) as structured output streams in, then ("recipe", OriginalRecipe).
   """
-  response = fetch_response(url, decode=True)
-  
-  if response is None:
+
+  prompt = build_youtube_prompt(title, description, transcript)
+
+  # Only emit when a field appears or a list grows, not on every token
+  last_shape = None
+  async for kind, value in llm.stream("youtube_extraction", SYSTEM_INSTRUCTIONS_YOUTUBE, prompt, OriginalRecipe, openai_client):
+    if kind == "parsed":
+      yield "recipe", value
+      continue
+    shape = tuple((key, len(item) if isinstance(item, list) else None) for key, item in value.items())
+    if shape != last_shape:
+      last_shape = shape
+      yield "partial", value
+
+def fetch_web_page(url: str) -> str:
+  """
+  Downloads a web page and returns its HTML.
+  """
+  try:
+    response = get_http_session().get(url, timeout=settings.HTTP_TIMEOUT_SECONDS)
+  except requests.RequestException:
     raise ValueError(f"Failed to download the web page from {url} (e.g. blocked, invalid URL, etc.)")
   
-  if response.status != 200:
-    raise ValueError(f"HTTP {response.status} error while downloading the web page from {url}")
-  
-  # Primary extraction attempt
-  html = response.html
-  content = extract(html, output_format="txt", favor_recall=True)
-
-  # Fallback 1: Less filtered extraction
-  if not content or len(content.strip()) < 100:
-    content = html2txt(html)
-    print("Fallback 1: Less filtered extraction")
-  
-  if not content or len(content.strip()) < 100:
-    _, content, _ = baseline(html)
-    print("Fallback 2: Baseline extraction")
+  if response.status_code != 200:
+    raise ValueError(f"HTTP {response.status_code} error while downloading the web page from {url}")
+
+  from trafilatura.utils import decode_file
+  return decode_file(response.content)
+
+def extract_web_page_content(html: str) -> str:
+  """
+  Returns the text content of a downloaded web page (see app/services/agents/content.py).
+  """
+  return extract_page_content(html)["content"]
 
-  if not content or len(content.strip()) < 20:
-    print("Fallback 3: No extractable content")
+def parse_web_page(html: str) -> tuple[OriginalRecipe | None, dict | None]:
+  """
+  Parses a downloaded web page once and returns (structured recipe, None) when the page
+  embeds a complete schema.org Recipe, otherwise (None, extracted content for the LLM).
+  """
+  tree = parse_html(html)
+  if tree is None:
     raise ValueError("Page contains no extractable content")
-  
-  return content
 
-def extract_recipe_from_web_page(content: str, openai_client: OpenAI) -> OriginalRecipe:
+  # Structured data is read before pruning, which removes <script> JSON-LD
+  recipe = extract_structured_recipe(tree)
+  if recipe is not None:
+    return recipe, None
+
+  return None, extract_page_content(tree)
+
+def scrape_web_page(url: str) -> str:
+  """
+  Scrapes a web page and returns the text content using trafilatura.
+  """
+  with span("download", "web"):
+    html = fetch_web_page(url)
+  with span("parse", "web") as parse:
+    page = extract_page_content(html)
+    parse.set(path=page['strategy'])
+  observe_timings("content", page['timings_ms'], "web", page['strategy'])
+  return page['content']
+
+async def extract_recipe_from_web_page(content: str, openai_client: "AsyncOpenAI") -> OriginalRecipe:
   """
   Extracts a recipe from the scraped web page content
   """
 
   return
 
-def recipe_extraction_workflow(url: str) -> OriginalRecipe:
+def source_type(url: str) -> str:
+  """
+  Source type of a recipe URL: "youtube" or "web"
+  """
+  return "youtube" if url.startswith("https://www.youtube.com") or url.startswith("https://youtu.be") else "web"
+
+async def _scrape_youtube_video(url: str) -> dict:
+  """
+  Runs scrape_youtube_video on the worker pool under the per-host limit, recording its stage timings.
+  """
+  async with get_host_limiter().limit(url):
+    with span("scrape", "youtube") as scrape:
+      video_info = await run_blocking(scrape_youtube_video, url)
+      scrape.set(path=video_info['source'])
+  observe_timings("youtube", video_info['timings_ms'], "youtube", video_info['source'])
+  return video_info
+
+async def _fetch_web_page(url: str) -> str:
+  """
+  Runs fetch_web_page on the worker pool under the per-host limit, recording its duration.
+  """
+  async with get_host_limiter().limit(url):
+    with span("download", "web"):
+      return await run_blocking(fetch_web_page, url)
+
+async def _parse_web_page(html: str) -> tuple[OriginalRecipe | None, dict | None]:
+  """
+  Runs parse_web_page on the worker pool, recording which path it took and its stage timings.
+  """
+  with span("parse", "web") as parse:
+    recipe, page = await run_blocking(parse_web_page, html)
+    parse.set(path="structured_data" if recipe is not None else page['strategy'])
+  if page is not None:
+    observe_timings("content", page['timings_ms'], "web", page['strategy'])
+  return recipe, page
+
+async def _find_video_duplicate(url: str, video_info: dict) -> tuple[OriginalRecipe | None, "np.ndarray | None"]:
+  """
+  _find_duplicate for a video: its transcript is fingerprinted (re-uploads often change the
+  title, and a channel's descriptions are mostly the same links), and a match is confirmed
+  against everything scraped.
+  """
+  scraped = f"{video_info['title']}\n{video_info['description'] or ''}\n{video_info['transcript']}"
+  return await _find_duplicate(url, video_info['transcript'], "youtube", scraped, MIN_TRANSCRIPT_SHINGLES)
+
+async def _find_duplicate(url: str, text: str, source: str, scraped: str | None = None, min_shingles: int = MIN_SHINGLES) -> tuple[OriginalRecipe | None, "np.ndarray | None"]:
+  """
+  Fingerprints the scraped text and looks for a recipe already extracted from a near-duplicate
+  under another URL (see app/services/duplicates.py). A match is only reused if enough of its
+  ingredients appear in `scraped` (default: the text).
+  Returns (that recipe or None, the fingerprint to remember for this URL).
+  """
+  if not settings.DEDUP_ENABLED:
+    return None, None
+
+  detector = get_duplicate_detector()
+  with span("dedup", source) as dedup:
+    signature = await run_blocking(fingerprint, text, min_shingles)
+    if signature is None:
+      dedup.set(path="too_short")
+      return None, None
+    for match_url, similarity in detector.find(signature):
+      if match_url == normalize_url(url):
+        continue
+      recipe = await get_extraction_cache().lookup(match_url, count=False)
+      # None: its extraction expired from the cache (the entry is left to oldest-first eviction)
+      if recipe is None or not detector.confirm(recipe, scraped or text):
+        continue
+      detector.hits += 1
+      dedup.set(path="duplicate")
+      logger.info("Near-duplicate of %s (similarity %.2f), reusing its extraction", match_url, similarity)
+      return recipe, signature
+    dedup.set(path="new")
+  return None, signature
+
+def _remember_fingerprint(url: str, signature: "np.ndarray | None", recipe: OriginalRecipe | None):
+  """
+  Adds an extracted URL's fingerprint to the near-duplicate index, once its recipe is in the
+  extraction cache (so a match can always be looked up).
+  """
+  if signature is not None and recipe is not None:
+    get_duplicate_detector().add(normalize_url(url), signature)
+
+async def _extract_recipe(url: str) -> tuple[OriginalRecipe, "np.ndarray | None"]:
   """
-  Workflow for extracting a recipe from either a web page or a YouTube video
+  Workflow for extracting a recipe from either a web page or a YouTube video.
+  Blocking scrapes run on the shared worker pool under the per-host limit; the OpenAI
+  call goes through the LLM-call layer (rate limit, budget, metrics).
+  Web pages with a complete schema.org Recipe skip the LLM entirely, and so do near-duplicates
+  of a recipe already extracted from another URL.
+  Returns the recipe and the fingerprint of its scraped text (or None).
   """
 
-  client = OpenAI(api_key=settings.OPENAI_API_KEY)
+  signature = None
+  if source_type(url) == "youtube":
+    video_info = await _scrape_youtube_video(url)
+    recipe, signature = await _find_video_duplicate(url, video_info)
+    if recipe is None:
+      with span("llm_extraction", "youtube"):
+        recipe = await extract_recipe_from_youtube_video(video_info['title'], video_info['description'], video_info['transcript'], get_openai_client())
+  elif url.startswith("https://"):
+    recipe, page = await _parse_web_page(await _fetch_web_page(url))
+    if recipe is None:
+      recipe, signature = await _find_duplicate(url, page['content'], "web")
+    if recipe is None:
+      with span("llm_extraction", "web"):
+        recipe = await extract_recipe_from_web_page(page['content'], get_openai_client())
+  else:
+    raise ValueError(f"Invalid  or unsupported URL: {url}")
+
+  return recipe, signature
+
+async def recipe_extraction_workflow(url: str) -> OriginalRecipe:
+  """
+  Cached entry point for recipe extraction. Repeat submissions of the same (normalized) URL
+  are served from the extraction cache; concurrent submissions share one extraction.
+  """
+  signature = None
 
-  if url.startswith("https://www.youtube.com") or url.startswith("https://youtu.be"):
-    video_info = scrape_youtube_video(url)
-    recipe = extract_recipe_from_youtube_video(video_info['title'], video_info['description'], video_info['transcript'], client)
+  async def extract(url: str) -> OriginalRecipe:
+    nonlocal signature
+    recipe, signature = await _extract_recipe(url)
+    return recipe
+
+  return await get_extraction_cache().get_or_extract(url, extract, lambda recipe: _remember_fingerprint(url, signature, recipe))
+
+async def stream_recipe_extraction(url: str):
+  """
+  Streaming variant of recipe_extraction_workflow for progressive results.
+  Yields (stage, data) tuples: "fetched", "transcript_parsed" / "content_parsed",
+  "extraction_started", "partial" (YouTube only) and finally "extracted" with the OriginalRecipe
+  and the method that produced it ("cache", "coalesced", "structured_data", "duplicate" or "llm").
+  Takes part in the cache's single-flight: a stream of a URL already being extracted waits for
+  that extraction ("coalesced"), and others wait for this one.
+  """
+  cache = get_extraction_cache()
+  while True:
+    recipe = await cache.lookup(url)
+    if recipe is not None:
+      yield "extracted", {"recipe": recipe, "method": "cache"}
+      return
+    lead = cache.claim(url)
+    if lead is not None:
+      break
+    recipe = await cache.join(url)
+    if recipe is not None:
+      yield "extracted", {"recipe": recipe, "method": "coalesced"}
+      return
+
+  try:
+    async with aclosing(_stream_extraction(url)) as stages:
+      async for stage, data in stages:
+        if stage == "extracted":
+          cache.release(url, lead, data["recipe"])
+        yield stage, data
+  except Exception as e:
+    cache.release(url, lead, error=e)
+    raise
+  finally:
+    # Closed early (client disconnected): the waiters start over
+    cache.release(url, lead)
+
+async def _stream_extraction(url: str):
+  """
+  The extraction behind stream_recipe_extraction, once it leads the URL's extraction
+  """
+  cache = get_extraction_cache()
+  method = "llm"
+  signature = None
+
+  if source_type(url) == "youtube":
+    video_info = await _scrape_youtube_video(url)
+    yield "fetched", {"title": video_info['title']}
+    yield "transcript_parsed", {"transcript_chars": len(video_info['transcript']), "transcript_tokens": video_info['transcript_tokens']}
+    recipe, signature = await _find_video_duplicate(url, video_info)
+    if recipe is not None:
+      method = "duplicate"
+    elif video_info['transcript_tokens']['cleaned'] > settings.TRANSCRIPT_TOKEN_BUDGET:
+      yield "extraction_started", {"method": "llm"}
+      # Chunked extraction runs in parallel, so there is no single stream of partials
+      with span("llm_extraction", "youtube"):
+        recipe = await extract_recipe_from_youtube_video(video_info['title'], video_info['description'], video_info['transcript'], get_openai_client())
+    else:
+      yield "extraction_started", {"method": "llm"}
+      with span("llm_extraction", "youtube"):
+        async for stage, data in stream_recipe_from_youtube_video(video_info['title'], video_info['description'], video_info['transcript'], get_openai_client()):
+          if stage == "partial":
+            yield "partial", {"recipe": data}
+          else:
+            recipe = data
   elif url.startswith("https://"):
-    content = scrape_web_page(url)
-    recipe = extract_recipe_from_web_page(content, client)
+    html = await _fetch_web_page(url)
+    yield "fetched", {"html_chars": len(html)}
+    recipe, page = await _parse_web_page(html)
+    if recipe is not None:
+      method = "structured_data"
+    else:
+      yield "content_parsed", {"content_chars": len(page['content']), "strategy": page['strategy'], "timings_ms": page['timings_ms']}
+      recipe, signature = await _find_duplicate(url, page['content'], "web")
+      if recipe is not None:
+        method = "duplicate"
+      else:
+        yield "extraction_started", {"method": "llm"}
+        with span("llm_extraction", "web"):
+          recipe = await extract_recipe_from_web_page(page['content'], get_openai_client())
   else:
     raise ValueError(f"Invalid  or unsupported URL: {url}")
 
-  return recipe
\ No newline at end of file
+  if recipe is None:
+    raise ValueError(f"No recipe could be extracted from {url}")
+
+  await cache.store(url, recipe)
+  _remember_fingerprint(url, signature, recipe)
+  yield "extracted", {"recipe": recipe, "method": method}
\ No newline at end of file
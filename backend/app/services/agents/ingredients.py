@@ -0,0 +1,198 @@
+"""
+Deterministic parsing of ingredient lines ("1 1/2 cups flour") into Ingredient models.
+"""
+
+from app.services.agents.models import Ingredient
+import re
+
+# Unicode vulgar fractions commonly found on recipe sites
+UNICODE_FRACTIONS = {
+    "½": 1 / 2, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 1 / 4, "¾": 3 / 4,
+    "⅕": 1 / 5, "⅖": 2 / 5, "⅗": 3 / 5, "⅘": 4 / 5, "⅙": 1 / 6,
+    "⅚": 5 / 6, "⅛": 1 / 8, "⅜": 3 / 8, "⅝": 5 / 8, "⅞": 7 / 8,
+}
+
+# Unit spellings mapped to the short forms used in extracted recipes
+UNIT_ALIASES = {
+    "teaspoon": "tsp", "teaspoons": "tsp", "tsp": "tsp", "tsps": "tsp", "t": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp", "tbsp": "tbsp", "tbsps": "tbsp", "tbs": "tbsp", "tbl": "tbsp", "T": "tbsp",
+    "cup": "cup", "cups": "cup", "c": "cup",
+    "fl oz": "fl oz", "fluid ounce": "fl oz", "fluid ounces": "fl oz",
+    "ounce": "oz", "ounces": "oz", "oz": "oz",
+    "pound": "lb", "pounds": "lb", "lb": "lb", "lbs": "lb",
+    "gram": "g", "grams": "g", "g": "g", "gr": "g",
+    "kilogram": "kg", "kilograms": "kg", "kg": "kg",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml", "ml": "ml",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l", "l": "l",
+    "pint": "pint", "pints": "pint", "pt": "pint",
+    "quart": "quart", "quarts": "quart", "qt": "quart",
+    "pinch": "pinch", "pinches": "pinch", "dash": "dash", "dashes": "dash",
+    "clove": "clove", "cloves": "clove",
+    "can": "can", "cans": "can", "package": "package", "packages": "package", "pkg": "package",
+    "slice": "slice", "slices": "slice", "stick": "stick", "sticks": "stick",
+    "bunch": "bunch", "bunches": "bunch", "sprig": "sprig", "sprigs": "sprig",
+}
+
+_FRACTION_CHARS = "".join(UNICODE_FRACTIONS)
+_NUMBER = rf"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?\s*[{_FRACTION_CHARS}]?|\.\d+|[{_FRACTION_CHARS}])"
+_RANGE_SEPARATOR = r"\s*(?:-|–|—|to)\s*"
+
+_QUANTITY_PATTERN = re.compile(rf"^\s*({_NUMBER})(?:{_RANGE_SEPARATOR}({_NUMBER}))?\s*$")
+_LEADING_QUANTITY_PATTERN = re.compile(rf"^\s*(?P<quantity>{_NUMBER}(?:{_RANGE_SEPARATOR}{_NUMBER})?)(?![\d/.])\s*(?P<rest>.*)$")
+_LEADING_PARENTHETICAL_PATTERN = re.compile(r"^\((?P<note>[^)]*)\)\s*(?P<rest>.*)$")
+_LEADING_UNIT_PATTERN = re.compile(r"^(?P<unit>fl\.?\s*oz|fluid\s+ounces?|[A-Za-z]+)\.?(?=\s|$)\s*(?:of\s+)?(?P<rest>.*)$")
+_TO_TASTE_PATTERN = re.compile(r",?\s*(?:or\s+)?to\s+taste\b", re.IGNORECASE)
+
+def _parse_number(text: str) -> float:
+    """
+    Parse a single number token ("1", "1.5", "1/2", "1 1/2", "1½", "½")
+    """
+    text = text.strip()
+    total = 0.0
+    if text and text[-1] in UNICODE_FRACTIONS:
+        total += UNICODE_FRACTIONS[text[-1]]
+        text = text[:-1].strip()
+    for part in text.split():
+        if "/" in part:
+            numerator, denominator = part.split("/")
+            total += int(numerator) / int(denominator)
+        else:
+            total += float(part)
+    return total
+
+def parse_quantity(text: str) -> float | None:
+    """
+    Parse a quantity string into a number. Ranges ("2-3") resolve to their midpoint.
+    Returns None for descriptive quantities ("to taste", "a pinch").
+    """
+    match = _QUANTITY_PATTERN.match(text)
+    if not match:
+        return None
+    try:
+        low = _parse_number(match.group(1))
+        if match.group(2) is None:
+            return low
+        return (low + _parse_number(match.group(2))) / 2
+    except ZeroDivisionError: # "1/0" in scraped data
+        return None
+
+def normalize_unit(unit: str | None) -> str | None:
+    """
+    Map a unit spelling ("Tablespoons", "tbsp.") to its short form, or None if unknown
+    """
+    if not unit:
+        return None
+    unit = re.sub(r"\s+", " ", unit.strip().rstrip("."))
+    if unit in UNIT_ALIASES:
+        return UNIT_ALIASES[unit]
+    return UNIT_ALIASES.get(unit.lower().replace("fl. oz", "fl oz"))
+
+def _compact_quantity(value: float) -> float | int:
+    """
+    Store whole numbers as int and round fractions to a readable precision
+    """
+    if value == int(value):
+        return int(value)
+    return round(value, 3)
+
+def parse_ingredient_line(line: str) -> Ingredient:
+    """
+    Parse a free-text ingredient line into an Ingredient (name, quantity, unit).
+    Single quantities become numbers; ranges keep their original text ("2-3").
+    """
+    line = re.sub(r"\s+", " ", line).strip()
+
+    match = _LEADING_QUANTITY_PATTERN.match(line)
+    # A quantity that doesn't parse ("1/0") makes the line descriptive
+    if match and parse_quantity(match.group("quantity")) is None:
+        match = None
+    if not match:
+        quantity = "to taste" if _TO_TASTE_PATTERN.search(line) else "as needed"
+        name = _TO_TASTE_PATTERN.sub("", line).strip(" ,")
+        return Ingredient(name=name or line, quantity=quantity, unit=None)
+
+    raw_quantity = match.group("quantity")
+    rest = match.group("rest")
+    if re.search(_RANGE_SEPARATOR + r"\S", raw_quantity[1:]):
+        quantity = re.sub(r"\s+", "", raw_quantity).replace("to", "-").replace("–", "-").replace("—", "-")
+    else:
+        quantity = _compact_quantity(_parse_number(raw_quantity))
+
+    # Package sizes like "1 (14 oz) can tomatoes" are kept as a note on the name
+    note = None
+    parenthetical = _LEADING_PARENTHETICAL_PATTERN.match(rest)
+    if parenthetical:
+        note = parenthetical.group("note")
+        rest = parenthetical.group("rest")
+
+    unit = None
+    unit_match = _LEADING_UNIT_PATTERN.match(rest)
+    if unit_match and normalize_unit(unit_match.group("unit")):
+        unit = normalize_unit(unit_match.group("unit"))
+        rest = unit_match.group("rest")
+
+    name = rest.strip(" ,")
+    if note:
+        name = f"{name} ({note})"
+
+    return Ingredient(name=name or line, quantity=quantity, unit=unit)
+
+# Unit conversions to the base units used for nutrition (grams for mass, milliliters for volume)
+MASS_UNIT_GRAMS = {"g": 1.0, "kg": 1000.0, "oz": 28.3495, "lb": 453.592}
+VOLUME_UNIT_ML = {
+    "ml": 1.0, "l": 1000.0, "tsp": 4.92892, "tbsp": 14.7868, "fl oz": 29.5735,
+    "cup": 236.588, "pint": 473.176, "quart": 946.353, "pinch": 0.31, "dash": 0.62,
+}
+
+# Densities (g/ml) for volume-measured ingredients; matched by keyword, most specific first
+DENSITY_G_PER_ML = [
+    ("flour", 0.53), ("powdered sugar", 0.56), ("brown sugar", 0.93), ("sugar", 0.85),
+    ("rolled oats", 0.41), ("oats", 0.41), ("rice", 0.85), ("quinoa", 0.72), ("lentils", 0.81),
+    ("breadcrumbs", 0.45), ("cheese", 0.45), ("chocolate chips", 0.72), ("nuts", 0.55),
+    ("butter", 0.96), ("oil", 0.92), ("honey", 1.42), ("maple syrup", 1.32), ("syrup", 1.33),
+    ("peanut butter", 1.08), ("yogurt", 1.03), ("milk", 1.03), ("cream", 1.01),
+    ("salt", 1.22), ("baking soda", 0.92), ("baking powder", 0.9), ("cocoa", 0.42),
+    ("spinach", 0.13), ("broth", 1.0), ("stock", 1.0), ("water", 1.0), ("sauce", 1.05),
+]
+
+# Typical weights (g) of ingredients counted by the piece ("2 eggs", "3 cloves garlic")
+PIECE_GRAMS = [
+    ("egg white", 33.0), ("egg", 50.0), ("garlic", 5.0), ("onion", 150.0), ("shallot", 40.0),
+    ("banana", 118.0), ("lemon", 85.0), ("lime", 67.0), ("apple", 180.0), ("potato", 213.0),
+    ("tomato", 123.0), ("carrot", 61.0), ("bell pepper", 120.0), ("avocado", 150.0),
+    ("chicken breast", 174.0), ("chicken thigh", 116.0), ("salmon fillet", 170.0), ("tortilla", 45.0),
+    ("slice", 28.0), ("can", 400.0), ("stick", 113.0),
+]
+
+_PACKAGE_SIZE_PATTERN = re.compile(r"\((?P<size>\d+(?:\.\d+)?)[\s-]*(?P<unit>oz|ounces?|g|grams?|lbs?|kg)\.?\)", re.IGNORECASE)
+
+def _lookup(table: list[tuple[str, float]], name: str) -> float | None:
+    name = name.lower()
+    for keyword, value in table:
+        if keyword in name:
+            return value
+    return None
+
+def ingredient_grams(ingredient: Ingredient) -> float | None:
+    """
+    Estimate the weight in grams of an ingredient line through the unit/density tables.
+    Returns None when the quantity is descriptive or the unit can't be converted.
+    """
+    quantity = ingredient.quantity if isinstance(ingredient.quantity, (int, float)) else parse_quantity(str(ingredient.quantity))
+    if quantity is None:
+        return None
+
+    unit = normalize_unit(ingredient.unit)
+    if unit in MASS_UNIT_GRAMS:
+        return quantity * MASS_UNIT_GRAMS[unit]
+    if unit in VOLUME_UNIT_ML:
+        return quantity * VOLUME_UNIT_ML[unit] * (_lookup(DENSITY_G_PER_ML, ingredient.name) or 1.0)
+
+    # Packages with a stated size: "1 (14 oz) can tomatoes"
+    package = _PACKAGE_SIZE_PATTERN.search(ingredient.name)
+    if package:
+        return quantity * float(package.group("size")) * MASS_UNIT_GRAMS[normalize_unit(package.group("unit"))]
+
+    # Counted items: "2 eggs", "1 stick butter", "3 cloves garlic"
+    piece = (_lookup(PIECE_GRAMS, unit) if unit else None) or _lookup(PIECE_GRAMS, ingredient.name)
+    return quantity * piece if piece is not None else None
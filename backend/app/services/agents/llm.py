@@ -0,0 +1,305 @@
+"""
+LLM-call layer used by every agent in app/services/agents.
+
+Each call is made for a named stage ("youtube_extraction", "rewrite_instructions", ...) and:
+- sends the static system prompt first and the per-request content last, with a per-stage
+  prompt_cache_key, so OpenAI's prompt cache can reuse the static prefix across requests
+- uses the model routed to the stage (LLM_MODEL_ROUTES, falling back to OPENAI_MODEL)
+- runs under the shared LLM rate limit (app/services/limits.py)
+- records prompt / cached / completion tokens and latency per stage and model
+- draws from the current request's token and time budget (see `llm_budget`), with the completion
+  capped at the tokens left
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, TypeVar
+from pydantic import BaseModel
+from app.config import get_settings
+from app.services.agents.transcript import count_tokens
+from app.services.limits import get_llm_limiter
+from app.services.metrics import register_collector, span
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+settings = get_settings()
+
+ResponseFormatT = TypeVar("ResponseFormatT", bound=BaseModel)
+
+class LLMBudgetExceeded(ValueError):
+    """
+    Raised when a request has used up its LLM token or time budget
+    """
+
+class LLMBudget:
+    """
+    Token and wall-clock budget for the LLM calls made while handling one request
+    """
+
+    def __init__(self, max_tokens: int, seconds: float):
+        self.max_tokens = max_tokens
+        self.deadline = time.monotonic() + seconds
+        self.tokens_used = 0
+
+    def remaining_seconds(self) -> float:
+        """
+        Seconds left for this request's LLM calls; raises LLMBudgetExceeded if none are left
+        """
+        if self.tokens_used >= self.max_tokens:
+            raise LLMBudgetExceeded(f"LLM token budget exceeded ({self.tokens_used} of {self.max_tokens} tokens used)")
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMBudgetExceeded("LLM time budget exceeded")
+        return remaining
+
+_budget: ContextVar[LLMBudget | None] = ContextVar("llm_budget", default=None)
+
+@contextmanager
+def llm_budget(max_tokens: int | None = None, seconds: float | None = None):
+    """
+    Give the LLM calls made inside this block (including concurrent ones started from it)
+    a shared budget, by default LLM_REQUEST_TOKEN_BUDGET tokens and LLM_REQUEST_TIME_BUDGET_SECONDS
+    """
+    budget = LLMBudget(
+        settings.LLM_REQUEST_TOKEN_BUDGET if max_tokens is None else max_tokens,
+        settings.LLM_REQUEST_TIME_BUDGET_SECONDS if seconds is None else seconds,
+    )
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+def _parse_routes(routes: str) -> dict[str, str]:
+    pairs = (route.split("=", 1) for route in routes.split(",") if "=" in route)
+    return {stage.strip(): model.strip() for stage, model in pairs}
+
+_model_routes = _parse_routes(settings.LLM_MODEL_ROUTES)
+
+def model_for(stage: str) -> str:
+    """
+    Model routed to a stage (LLM_MODEL_ROUTES="stage=model,..."), or OPENAI_MODEL
+    """
+    return _model_routes.get(stage, settings.OPENAI_MODEL)
+
+class LLMMetrics:
+    """
+    Per (stage, model) call counts, token usage and latency
+    """
+
+    def __init__(self):
+        self._stages: dict[tuple[str, str], dict] = {}
+
+    def _entry(self, stage: str, model: str) -> dict:
+        key = (stage, model)
+        if key not in self._stages:
+            self._stages[key] = {
+                "calls": 0, "errors": 0, "budget_exceeded": 0,
+                "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+                "latency_ms_total": 0.0, "latency_ms_max": 0.0,
+            }
+        return self._stages[key]
+
+    def record(self, stage: str, model: str, latency_ms: float, usage=None, error: BaseException | None = None):
+        entry = self._entry(stage, model)
+        entry["calls"] += 1
+        entry["latency_ms_total"] += latency_ms
+        entry["latency_ms_max"] = max(entry["latency_ms_max"], latency_ms)
+        if isinstance(error, LLMBudgetExceeded):
+            entry["budget_exceeded"] += 1
+        elif error is not None and not isinstance(error, GeneratorExit): # GeneratorExit: the consumer stopped reading a stream
+            entry["errors"] += 1
+        if usage is not None:
+            entry["prompt_tokens"] += usage.prompt_tokens
+            entry["completion_tokens"] += usage.completion_tokens
+            details = usage.prompt_tokens_details
+            entry["cached_tokens"] += (details.cached_tokens or 0) if details is not None else 0
+
+    def stats(self) -> dict:
+        """
+        Totals per stage/model, with the cached share of prompt tokens and mean latency
+        """
+        stats = {}
+        for (stage, model), entry in sorted(self._stages.items()):
+            stats[f"{stage}/{model}"] = {
+                **{key: value for key, value in entry.items() if key != "latency_ms_total"},
+                "cached_prompt_share": round(entry["cached_tokens"] / entry["prompt_tokens"], 3) if entry["prompt_tokens"] else 0.0,
+                "latency_ms_mean": round(entry["latency_ms_total"] / entry["calls"], 1) if entry["calls"] else 0.0,
+                "latency_ms_max": round(entry["latency_ms_max"], 1),
+            }
+        return stats
+
+_llm_metrics = LLMMetrics()
+
+def _collect_llm_metrics() -> list[tuple]:
+    # Per stage/model totals for /metrics (latency histograms come from the "llm" spans)
+    counters = ("calls", "errors", "budget_exceeded", "prompt_tokens", "cached_tokens", "completion_tokens")
+    samples = {counter: {} for counter in counters}
+    for (stage, model), entry in _llm_metrics._stages.items():
+        for counter in counters:
+            samples[counter][(stage, model)] = entry[counter]
+    return [
+        (f"llm_{counter}_total", "counter", f"LLM {counter.replace('_', ' ')} per stage and model", ("stage", "model"), samples[counter])
+        for counter in counters
+    ]
+
+register_collector(_collect_llm_metrics)
+
+def get_llm_metrics() -> LLMMetrics:
+    """
+    Get the shared LLM call metrics
+    """
+    return _llm_metrics
+
+def _messages(system: str, user: str) -> list[dict]:
+    # Static system prompt first so consecutive requests share a cacheable prefix
+    return [{"role": "system", "content": system}, {"role": "user", "content": user}]
+
+def _charge(usage):
+    budget = _budget.get()
+    if budget is not None and usage is not None:
+        budget.tokens_used += usage.total_tokens
+
+def _completion_limit(stage: str, budget: LLMBudget | None, system: str, user: str, share: int) -> dict:
+    """
+    max_completion_tokens for a call: its share of the tokens left in the budget, less its
+    estimated prompt, so the calls of one request can't overrun it. Left out while that is
+    above the model's own limit (LLM_MAX_COMPLETION_TOKENS), which the API would reject.
+    """
+    if budget is None:
+        return {}
+    remaining = (budget.max_tokens - budget.tokens_used) // share - count_tokens(system) - count_tokens(user)
+    if remaining <= 0:
+        raise LLMBudgetExceeded(f"LLM token budget too small for the {stage} prompt")
+    if remaining >= settings.LLM_MAX_COMPLETION_TOKENS:
+        return {}
+    return {"max_completion_tokens": remaining}
+
+def _length_exceeded(stage: str, budget: LLMBudget | None) -> LLMBudgetExceeded:
+    # The completion stopped at the cap from _completion_limit: the budget is used up
+    if budget is not None:
+        budget.tokens_used = max(budget.tokens_used, budget.max_tokens)
+    return LLMBudgetExceeded(f"LLM token budget exceeded during {stage}")
+
+async def parse(
+    stage: str,
+    system: str,
+    user: str,
+    response_format: type[ResponseFormatT],
+    openai_client: "AsyncOpenAI",
+    share: int = 1,
+) -> ResponseFormatT:
+    """
+    Structured-output call: returns the parsed `response_format` instance.
+    `share` is the number of calls made in parallel for this request (e.g. transcript
+    chunks), which split the token budget left between them.
+    """
+    from openai import LengthFinishReasonError
+
+    model = model_for(stage)
+    budget = _budget.get()
+    start = time.perf_counter()
+    usage = None
+    try:
+        async with get_llm_limiter():
+            timeout = budget.remaining_seconds() if budget is not None else None
+            try:
+                with span("llm", path=stage):
+                    response = await asyncio.wait_for(
+                        openai_client.beta.chat.completions.parse(
+                            model=model,
+                            messages=_messages(system, user),
+                            response_format=response_format,
+                            prompt_cache_key=stage,
+                            **_completion_limit(stage, budget, system, user, share),
+                        ),
+                        timeout,
+                    )
+            except TimeoutError:
+                raise LLMBudgetExceeded(f"LLM time budget exceeded during {stage}")
+            except LengthFinishReasonError as e:
+                usage = e.completion.usage
+                _charge(usage)
+                raise _length_exceeded(stage, budget)
+        usage = response.usage
+        _charge(usage)
+    except BaseException as e:
+        get_llm_metrics().record(stage, model, (time.perf_counter() - start) * 1000, usage, e)
+        raise
+    get_llm_metrics().record(stage, model, (time.perf_counter() - start) * 1000, usage)
+
+    return response.choices[0].message.parsed
+
+async def stream(
+    stage: str,
+    system: str,
+    user: str,
+    response_format: type[ResponseFormatT],
+    openai_client: "AsyncOpenAI",
+    share: int = 1,
+):
+    """
+    Streaming structured-output call. Yields ("delta", partially parsed dict) as content
+    streams in, then ("parsed", `response_format` instance). `share` is as for parse.
+
+    The stream is read by its own task, under the rate limit and the time budget, into a
+    queue the deltas are yielded from: a slow consumer holds neither the limiter slot nor
+    the deadline, and running out of time raises LLMBudgetExceeded here rather than
+    cancelling the consumer.
+    """
+    from openai import LengthFinishReasonError
+
+    model = model_for(stage)
+    budget = _budget.get()
+    start = time.perf_counter()
+    usage = None
+    deltas: asyncio.Queue[dict | None] = asyncio.Queue()
+
+    async def read():
+        nonlocal usage
+        try:
+            async with get_llm_limiter():
+                timeout = budget.remaining_seconds() if budget is not None else None
+                try:
+                    with span("llm", path=stage):
+                        async with asyncio.timeout(timeout), openai_client.beta.chat.completions.stream(
+                            model=model,
+                            messages=_messages(system, user),
+                            response_format=response_format,
+                            prompt_cache_key=stage,
+                            stream_options={"include_usage": True},
+                            **_completion_limit(stage, budget, system, user, share),
+                        ) as response:
+                            async for event in response:
+                                if event.type == "content.delta" and isinstance(event.parsed, dict):
+                                    deltas.put_nowait(event.parsed)
+                                elif event.type == "chunk" and event.chunk.usage is not None:
+                                    # Charged as soon as it arrives, even if parsing then fails
+                                    usage = event.chunk.usage
+                                    _charge(usage)
+                            return await response.get_final_completion()
+                except TimeoutError:
+                    raise LLMBudgetExceeded(f"LLM time budget exceeded during {stage}")
+                except LengthFinishReasonError:
+                    raise _length_exceeded(stage, budget)
+        finally:
+            deltas.put_nowait(None)
+
+    reader = asyncio.create_task(read())
+    try:
+        try:
+            while (delta := await deltas.get()) is not None:
+                yield "delta", delta
+            completion = await reader
+        finally:
+            # The consumer stopped reading early
+            reader.cancel()
+    except BaseException as e:
+        get_llm_metrics().record(stage, model, (time.perf_counter() - start) * 1000, usage, e)
+        raise
+    get_llm_metrics().record(stage, model, (time.perf_counter() - start) * 1000, usage)
+
+    yield "parsed", completion.choices[0].message.parsed
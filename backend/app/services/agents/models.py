@@ -1,8 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # User adjustments packaged
 class UserAdjustments(BaseModel):
-    target_servings: int # (desired number of servings)
+    target_servings: int = Field(gt=0) # (desired number of servings)
     target_calories: int # (desired calories per serving)
     target_protein: int # (desired protein per serving)
 
@@ -49,3 +49,7 @@ class ConvertedRecipe(BaseModel):
     instructions: list[str] # List of instructions
     nutritional_info: NutritionalInfo # Nutritional information
     conversion_metadata: ConversionMetadata
+
+# Rewritten instructions model (output from optional instruction rewrite step)
+class RewrittenInstructions(BaseModel):
+    instructions: list[str] # List of instructions matching the converted quantities
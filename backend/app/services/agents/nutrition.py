@@ -0,0 +1,202 @@
+"""
+Local nutrition database (per-100 g calories and protein) with a fuzzy ingredient-name index.
+
+The bundled table (app/data/nutrition.tsv) is memory-mapped on first use. Only the food
+names are read to build the inverted index; the numeric columns of a row are parsed
+when that row is matched. Ingredient names are normalized ("boneless skinless chicken
+thighs" -> {"chicken", "thigh"}), looked up through a token index with IDF scoring, and
+misspelled tokens fall back to a trigram index over the vocabulary. Matches are memoized
+so repeated names resolve in microseconds.
+"""
+
+import math
+import mmap
+import re
+from collections.abc import Collection
+from functools import lru_cache
+from pathlib import Path
+from app.services.agents.models import ConvertedRecipe, Ingredient, NutritionalInfo, OriginalRecipe
+from app.services.agents.ingredients import ingredient_grams
+
+NUTRITION_TABLE_PATH = Path(__file__).resolve().parents[2] / "data" / "nutrition.tsv"
+
+# Descriptors that don't change which food an ingredient is
+STOPWORDS = {
+    "a", "an", "and", "of", "or", "the", "for", "to", "into", "with", "about",
+    "fresh", "freshly", "frozen", "raw", "dry", "dried", "uncooked", "boneless", "skinless", "skin", "on",
+    "large", "medium", "small", "extra", "virgin", "organic", "lean", "plain", "unsalted", "salted",
+    "chopped", "minced", "diced", "sliced", "shredded", "grated", "crushed", "cubed", "peeled", "halved",
+    "finely", "roughly", "thinly", "packed", "softened", "melted", "room", "temperature", "optional",
+    "style", "long", "grain", "old", "fashioned", "pure", "whole", "all", "purpose",
+}
+
+# Minimum trigram similarity for a misspelled token to match a vocabulary token
+TRIGRAM_THRESHOLD = 0.45
+
+# Weight of row tokens that the ingredient name doesn't mention
+UNMATCHED_PENALTY = 0.3
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9%]+")
+_PARENTHETICAL_PATTERN = re.compile(r"\([^)]*\)")
+
+def _singular(token: str) -> str:
+    if len(token) <= 3 or token.endswith(("ss", "us")):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("oes"):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+def normalize_name(name: str, stopwords: Collection[str] = STOPWORDS) -> tuple[str, ...]:
+    """
+    Normalize a food or ingredient name into index tokens (lowercased, singular, `stopwords`
+    removed: descriptors by default)
+    """
+    name = _PARENTHETICAL_PATTERN.sub(" ", name.lower()).replace("-", " ")
+    tokens = (_singular(token) for token in _TOKEN_PATTERN.findall(name))
+    return tuple(token for token in tokens if token not in stopwords)
+
+def _trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class NutritionTable:
+    """
+    Memory-mapped nutrition table with a token + trigram inverted index over food names
+    """
+
+    def __init__(self, path: Path = NUTRITION_TABLE_PATH):
+        self._file = open(path, "rb")
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets: list[int] = []
+        self._row_tokens: list[frozenset[str]] = []
+        # Tokens of each row's food before its first comma ("tuna" for "tuna, canned in water")
+        self._row_heads: list[frozenset[str]] = []
+        self._postings: dict[str, list[int]] = {}
+
+        position = 0
+        while position < len(self._data):
+            end = self._data.find(b"\n", position)
+            if end == -1:
+                end = len(self._data)
+            if self._data[position:position + 1] not in (b"#", b"\n", b""):
+                name = self._data[position:self._data.find(b"\t", position, end)].decode()
+                row = len(self._offsets)
+                tokens = frozenset(normalize_name(name))
+                self._offsets.append(position)
+                self._row_tokens.append(tokens)
+                self._row_heads.append(frozenset(normalize_name(name.split(",")[0])))
+                for token in tokens:
+                    self._postings.setdefault(token, []).append(row)
+            position = end + 1
+
+        rows = len(self._offsets)
+        self._idf = {token: math.log(1 + rows / len(postings)) for token, postings in self._postings.items()}
+        self._trigram_index: dict[str, set[str]] = {}
+        for token in self._postings:
+            for trigram in _trigrams(token):
+                self._trigram_index.setdefault(trigram, set()).add(token)
+
+        # Memoized per instance: ingredient names repeat heavily across recipes
+        self.match = lru_cache(maxsize=65536)(self._match)
+        self._resolve_token = lru_cache(maxsize=16384)(self._resolve_token)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def row(self, row: int) -> tuple[str, float, float]:
+        """
+        Read (name, kcal per 100 g, protein g per 100 g) for a row straight from the mapped file
+        """
+        start = self._offsets[row]
+        end = self._data.find(b"\n", start)
+        name, calories, protein = self._data[start:end if end != -1 else len(self._data)].decode().split("\t")
+        return name, float(calories), float(protein)
+
+    def _resolve_token(self, token: str) -> str | None:
+        """
+        Map a query token to a vocabulary token, falling back to the closest trigram match
+        """
+        if token in self._postings:
+            return token
+        trigrams = _trigrams(token)
+        candidates: dict[str, int] = {}
+        for trigram in trigrams:
+            for candidate in self._trigram_index.get(trigram, ()):
+                candidates[candidate] = candidates.get(candidate, 0) + 1
+        best, best_score = None, TRIGRAM_THRESHOLD
+        for candidate, shared in candidates.items():
+            score = shared / (len(trigrams) + len(_trigrams(candidate)) - shared)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def _match(self, name: str) -> int | None:
+        """
+        Find the best row for an ingredient name, or None if nothing matches.
+        Text after the first comma is preparation notes ("garlic, minced") and is ignored.
+        A row only matches when it is the same food: the name mentions every token of the row's
+        head phrase ("garlic cloves" -> "garlic", "chicken thighs" -> "chicken thigh, ..."), so
+        "water" doesn't match "tuna, canned in water" and "garlic powder" doesn't match
+        "baking powder". With no such row the name is unmatched.
+        """
+        tokens = [self._resolve_token(token) for token in normalize_name(name.split(",")[0])]
+        tokens = [token for token in tokens if token is not None]
+        if not tokens:
+            return None
+
+        query = set(tokens)
+        head = tokens[-1]
+        scores: dict[int, float] = {}
+        for token in query:
+            for row in self._postings[token]:
+                scores[row] = scores.get(row, 0.0) + self._idf[token] * (2 if token == head else 1)
+        scores = {row: value for row, value in scores.items() if self._row_heads[row] <= query}
+        if not scores:
+            return None
+
+        def score(row: int) -> float:
+            unmatched = sum(self._idf[token] for token in self._row_tokens[row] - query)
+            return scores[row] - UNMATCHED_PENALTY * unmatched
+
+        return max(scores, key=score)
+
+_nutrition_table: NutritionTable | None = None
+
+def get_nutrition_table() -> NutritionTable:
+    """
+    Get (or lazily load) the bundled nutrition table
+    """
+    global _nutrition_table
+    if _nutrition_table is None:
+        _nutrition_table = NutritionTable()
+    return _nutrition_table
+
+def ingredient_macros(ingredients: list[Ingredient]) -> list[tuple[float, float] | None]:
+    """
+    (calories, protein) for each ingredient at its listed quantity, or None where the
+    ingredient has no usable quantity/unit or no matching food
+    """
+    table = get_nutrition_table()
+    macros = []
+    for ingredient in ingredients:
+        grams = ingredient_grams(ingredient)
+        row = table.match(ingredient.name) if grams is not None else None
+        if row is None:
+            macros.append(None)
+            continue
+        _, calories, protein = table.row(row)
+        macros.append((grams * calories / 100, grams * protein / 100))
+    return macros
+
+def estimate_nutrition(recipe: OriginalRecipe | ConvertedRecipe) -> NutritionalInfo:
+    """
+    Per-serving calories and protein for a recipe from the local nutrition table
+    """
+    macros = [m for m in ingredient_macros(recipe.ingredients) if m is not None]
+    calories = sum(m[0] for m in macros) / recipe.servings
+    protein = sum(m[1] for m in macros) / recipe.servings
+    return NutritionalInfo(calories=int(round(calories)), protein=int(round(protein)))
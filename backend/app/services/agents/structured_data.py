@@ -0,0 +1,216 @@
+"""
+Deterministic recipe extraction from schema.org structured data (JSON-LD, microdata, RDFa).
+Lets the workflow skip the LLM for the many recipe sites that embed a `Recipe` object.
+"""
+
+from app.services.agents.models import OriginalRecipe
+from app.services.agents.ingredients import parse_ingredient_line
+import html as html_lib
+import json
+import re
+from lxml import html as lxml_html
+
+_SERVINGS_PATTERN = re.compile(r"\d+")
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+
+def _clean_text(value) -> str:
+    """
+    Unescape HTML entities, strip stray tags and collapse whitespace
+    """
+    if value is None:
+        return ""
+    text = html_lib.unescape(str(value))
+    text = _TAG_PATTERN.sub(" ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _is_recipe_type(value) -> bool:
+    """
+    Check a schema.org type value ("Recipe", "schema:Recipe", "https://schema.org/Recipe", or a list)
+    """
+    if isinstance(value, list):
+        return any(_is_recipe_type(v) for v in value)
+    if not isinstance(value, str):
+        return False
+    return any(token.rsplit("/", 1)[-1].rsplit(":", 1)[-1] == "Recipe" for token in value.split())
+
+# JSON-LD
+
+def _find_json_ld_recipe(node):
+    """
+    Depth-first search for a Recipe object (handles @graph, lists and nested mainEntity)
+    """
+    if isinstance(node, list):
+        for item in node:
+            found = _find_json_ld_recipe(item)
+            if found is not None:
+                return found
+    elif isinstance(node, dict):
+        if _is_recipe_type(node.get("@type")):
+            return node
+        for value in node.values():
+            if isinstance(value, (dict, list)):
+                found = _find_json_ld_recipe(value)
+                if found is not None:
+                    return found
+    return None
+
+def _json_ld_instructions(value) -> list[str]:
+    """
+    Flatten recipeInstructions (string, list of strings, HowToStep or HowToSection)
+    """
+    if isinstance(value, str):
+        lines = [_clean_text(line) for line in re.split(r"\n+|<br\s*/?>|</p>|</li>", value)]
+        return [line for line in lines if line]
+    if isinstance(value, list):
+        steps = []
+        for item in value:
+            steps.extend(_json_ld_instructions(item))
+        return steps
+    if isinstance(value, dict):
+        if "itemListElement" in value:
+            return _json_ld_instructions(value["itemListElement"])
+        text = _clean_text(value.get("text") or value.get("name"))
+        return [text] if text else []
+    return []
+
+def _json_ld_fields(recipe: dict) -> dict:
+    ingredients = recipe.get("recipeIngredient") or recipe.get("ingredients") or []
+    if isinstance(ingredients, str):
+        ingredients = [ingredients]
+    return {
+        "title": recipe.get("name") or recipe.get("headline"),
+        "description": recipe.get("description"),
+        "servings": recipe.get("recipeYield") or recipe.get("yield"),
+        "ingredients": [_clean_text(line) for line in ingredients],
+        "instructions": _json_ld_instructions(recipe.get("recipeInstructions")),
+    }
+
+def _extract_json_ld(tree) -> dict | None:
+    for script in tree.xpath('//script[@type="application/ld+json"]'):
+        try:
+            data = json.loads(script.text or "", strict=False)
+        except ValueError:
+            continue
+        recipe = _find_json_ld_recipe(data)
+        if recipe is not None:
+            return _json_ld_fields(recipe)
+    return None
+
+# Microdata and RDFa
+
+def _property_value(element, prop_attr: str) -> str:
+    """
+    Value of a microdata/RDFa property element, following the attribute precedence of the specs
+    """
+    for attr in ("content", "datetime"):
+        if element.get(attr) is not None:
+            return element.get(attr)
+    if element.tag in ("a", "link") and prop_attr == "itemprop":
+        return element.get("href", "")
+    # Nested HowToStep items keep their step text in a "text" property
+    nested = element.xpath(f'.//*[@{prop_attr}="text" or @{prop_attr}="schema:text"]')
+    if nested:
+        return nested[0].text_content()
+    return element.text_content()
+
+def _collect_properties(scope, scope_attr: str, prop_attr: str) -> dict[str, list]:
+    """
+    Collect property elements that belong to this item scope (not to nested items)
+    """
+    properties: dict[str, list] = {}
+    stack = list(scope)
+    while stack:
+        element = stack.pop(0)
+        if not isinstance(element.tag, str):
+            continue
+        names = element.get(prop_attr)
+        if names:
+            for name in names.split():
+                properties.setdefault(name.rsplit(":", 1)[-1], []).append(element)
+        if element.get(scope_attr) is None:
+            stack[0:0] = list(element)
+    return properties
+
+def _extract_item(tree, scope_xpath: str, type_attr: str, scope_attr: str, prop_attr: str) -> dict | None:
+    for scope in tree.xpath(scope_xpath):
+        if not _is_recipe_type(scope.get(type_attr)):
+            continue
+        properties = _collect_properties(scope, scope_attr, prop_attr)
+
+        def values(*names):
+            for name in names:
+                if name in properties:
+                    return [_clean_text(_property_value(el, prop_attr)) for el in properties[name]]
+            return []
+
+        title = values("name")
+        description = values("description")
+        servings = values("recipeYield", "yield")
+        return {
+            "title": title[0] if title else None,
+            "description": description[0] if description else None,
+            "servings": servings[0] if servings else None,
+            "ingredients": values("recipeIngredient", "ingredients"),
+            "instructions": [step for step in values("recipeInstructions") if step],
+        }
+    return None
+
+def _extract_microdata(tree) -> dict | None:
+    return _extract_item(tree, "//*[@itemscope][@itemtype]", "itemtype", "itemscope", "itemprop")
+
+def _extract_rdfa(tree) -> dict | None:
+    return _extract_item(tree, "//*[@typeof]", "typeof", "typeof", "property")
+
+# Public API
+
+def _parse_servings(value) -> int | None:
+    """
+    Parse recipeYield ("4", 4, "4 servings", ["4", "4 servings"], "Makes 12 cookies")
+    """
+    if isinstance(value, list):
+        for item in value:
+            servings = _parse_servings(item)
+            if servings:
+                return servings
+        return None
+    if isinstance(value, (int, float)):
+        return int(value) or None
+    match = _SERVINGS_PATTERN.search(_clean_text(value))
+    return int(match.group()) if match else None
+
+def extract_structured_recipe(html: str | lxml_html.HtmlElement) -> OriginalRecipe | None:
+    """
+    Extracts a recipe from the page's schema.org data (JSON-LD first, then microdata, then RDFa).
+    Accepts the HTML or an already parsed tree (which is only read, not modified).
+    Returns None when no complete Recipe (title, servings, ingredients, instructions) is embedded,
+    so the caller can fall back to LLM extraction.
+    """
+    if isinstance(html, lxml_html.HtmlElement):
+        tree = html
+    else:
+        try:
+            tree = lxml_html.fromstring(html)
+        except (ValueError, lxml_html.etree.ParserError):
+            return None
+
+    for extractor in (_extract_json_ld, _extract_microdata, _extract_rdfa):
+        fields = extractor(tree)
+        if fields is None:
+            continue
+
+        title = _clean_text(fields["title"])
+        servings = _parse_servings(fields["servings"])
+        ingredient_lines = [line for line in fields["ingredients"] if line]
+        instructions = fields["instructions"]
+        if not (title and servings and ingredient_lines and instructions):
+            continue
+
+        return OriginalRecipe(
+            title=title,
+            description=_clean_text(fields["description"]) or None,
+            servings=servings,
+            ingredients=[parse_ingredient_line(line) for line in ingredient_lines],
+            instructions=instructions,
+        )
+
+    return None
@@ -0,0 +1,180 @@
+"""
+Transcript preprocessing for YouTube recipe extraction.
+
+Auto-generated captions repeat each line across several cues (the "rolling" display),
+carry timestamps and inline timing tags, and are full of filler and sound annotations.
+Rolling repeats are merged once, as captions are parsed (captions.merge_cues, or
+`dedupe_rolling_lines` for lines from `caption_lines`); `preprocess_transcript` removes
+the rest before the text reaches the LLM, and
+`split_transcript` chunks transcripts that are still over the token budget so the
+chunks can be extracted in parallel and combined with `merge_recipes`.
+"""
+
+import re
+from collections import deque
+from collections.abc import Iterable
+from app.services.agents.models import Ingredient, OriginalRecipe
+from app.services.agents.ingredients import parse_quantity
+
+# Rough size of a token for English text (OpenAI tokenizers average ~4 characters)
+CHARS_PER_TOKEN = 4
+
+# Number of recent caption lines checked for rolling repeats
+ROLLING_WINDOW = 4
+
+_TIMESTAMP_PATTERN = re.compile(r"\d{1,2}:\d{2}(?::\d{2})?[.,]\d{3}")
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_ANNOTATION_PATTERN = re.compile(r"\[[^\]]*\]|\((?:music|applause|laughter|laughs|inaudible)\)|>>", re.IGNORECASE)
+_FILLER_PATTERN = re.compile(r"\b(?:um+|uh+|erm+|hmm+|uh-huh)\b,?\s*", re.IGNORECASE)
+# Alphabetic words only: repeated numbers are quantities ("1 1/2 cups", "2 2-inch pieces")
+_REPEATED_WORD_PATTERN = re.compile(r"\b([^\W\d_]+)(?:\s+\1\b)+", re.IGNORECASE)
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+def count_tokens(text: str) -> int:
+    """
+    Estimated token count of a text (used for budgeting, not billing)
+    """
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def caption_lines(raw: str) -> list[str]:
+    """
+    Text lines of a VTT/SRT caption file, without headers, cue numbers, timestamps or inline tags
+    """
+    lines = []
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("WEBVTT", "Kind:", "Language:", "NOTE", "STYLE")) or "-->" in line or line.isdigit():
+            continue
+        line = _TIMESTAMP_PATTERN.sub("", _TAG_PATTERN.sub("", line)).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+class RollingLines:
+    """
+    Rolling-caption duplication, fed one caption line at a time: lines repeated from the
+    previous cues, and lines that restate the previous line before adding new words
+    """
+
+    def __init__(self):
+        self.recent: deque[str] = deque(maxlen=ROLLING_WINDOW)
+
+    def new_text(self, line: str) -> str | None:
+        """
+        The words a line adds: None for a repeat of a recent line, only the new words for
+        a line that restates the previous one (possibly ""), otherwise the whole line
+        """
+        if line in self.recent:
+            return None
+        text = line
+        if self.recent and line.startswith(self.recent[-1]):
+            text = line[len(self.recent[-1]):].strip()
+        self.recent.append(line)
+        return text
+
+def dedupe_rolling_lines(lines: Iterable[str]) -> list[str]:
+    """
+    Caption lines with rolling-caption duplication removed (only new words are kept)
+    """
+    rolling = RollingLines()
+    return [text for text in map(rolling.new_text, lines) if text]
+
+def remove_filler(text: str) -> str:
+    """
+    Strip sound annotations ([Music]), filler words and stuttered repeats ("the the")
+    """
+    text = _ANNOTATION_PATTERN.sub(" ", text)
+    text = _FILLER_PATTERN.sub("", text)
+    text = _REPEATED_WORD_PATTERN.sub(r"\1", text)
+    return _WHITESPACE_PATTERN.sub(" ", text).strip()
+
+def preprocess_transcript(lines: list[str]) -> str:
+    """
+    Turn caption text lines (already merged by the caption parser) into a compact
+    transcript for the LLM
+    """
+    return remove_filler(" ".join(lines))
+
+def split_transcript(transcript: str, max_tokens: int) -> list[str]:
+    """
+    Split a transcript into chunks of at most `max_tokens` (estimated), on sentence
+    boundaries where there are any and on word boundaries otherwise
+    """
+    if count_tokens(transcript) <= max_tokens:
+        return [transcript]
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    pieces = []
+    for sentence in _SENTENCE_END_PATTERN.split(transcript):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            pieces.append(sentence)
+
+    chunks, current = [], ""
+    for piece in pieces:
+        if current and len(current) + 1 + len(piece) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _ingredient_key(ingredient: Ingredient) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", ingredient.name.lower()).strip()
+
+def _instruction_key(step: str) -> str:
+    return _WHITESPACE_PATTERN.sub(" ", re.sub(r"[^\w\s]", "", step.lower())).strip()
+
+def merge_recipes(recipes: list[OriginalRecipe]) -> OriginalRecipe | None:
+    """
+    Deterministically merge recipes extracted from consecutive transcript chunks (None when
+    no chunk yielded a recipe):
+    - title and description from the first chunk that has them
+    - servings: the value most chunks agree on (earliest chunk on ties)
+    - ingredients in first-mention order, deduplicated by name; a later chunk only
+      fills in a quantity/unit the earlier mention was missing
+    - instructions in chunk order, without repeated steps
+    """
+    if not recipes:
+        return None
+
+    title = next((r.title for r in recipes if r.title), recipes[0].title)
+    description = next((r.description for r in recipes if r.description), None)
+
+    votes: dict[int, int] = {}
+    for recipe in recipes:
+        votes[recipe.servings] = votes.get(recipe.servings, 0) + 1
+    servings = max(votes, key=lambda value: (votes[value], -[r.servings for r in recipes].index(value)))
+
+    ingredients: dict[str, Ingredient] = {}
+    for recipe in recipes:
+        for ingredient in recipe.ingredients:
+            key = _ingredient_key(ingredient)
+            existing = ingredients.get(key)
+            if existing is None:
+                ingredients[key] = ingredient
+            elif parse_quantity(str(existing.quantity)) is None and parse_quantity(str(ingredient.quantity)) is not None:
+                ingredients[key] = ingredient
+
+    instructions, seen = [], set()
+    for recipe in recipes:
+        for step in recipe.instructions:
+            key = _instruction_key(step)
+            if key and key not in seen:
+                seen.add(key)
+                instructions.append(step)
+
+    return OriginalRecipe(
+        title=title,
+        description=description,
+        servings=servings,
+        ingredients=list(ingredients.values()),
+        instructions=instructions,
+    )
@@ -1,12 +1,110 @@
 from app.services.agents.models import UserRequest, OriginalRecipe, ConvertedRecipe, ConversionRequest
-from app.services.agents.extraction import recipe_extraction_workflow
+from app.services.agents.extraction import recipe_extraction_workflow, source_type, stream_recipe_extraction
+from app.services.agents.conversion import convert_recipe
+from app.services.agents.nutrition import ingredient_macros
+from app.services.agents.llm import llm_budget
 import asyncio
-from app.config import Settings
+import time
+from contextlib import aclosing
+from app.config import get_settings
+from app.services.metrics import trace
+from app.services.urls import normalize_url
 
-settings = Settings()
+settings = get_settings()
 
-def run_workflow(user_request: UserRequest) -> OriginalRecipe:
+async def run_workflow(user_request: UserRequest) -> ConvertedRecipe:
 
-    original_recipe = recipe_extraction_workflow(UserRequest.recipe_url)
+    with trace("workflow", source_type(user_request.recipe_url)), llm_budget():
+        original_recipe = await recipe_extraction_workflow(user_request.recipe_url)
+    if original_recipe is None:
+        raise ValueError(f"No recipe could be extracted from {user_request.recipe_url}")
 
-    return original_recipe
+    return _convert(original_recipe, user_request)
+
+async def stream_workflow(user_request: UserRequest):
+    """
+    Streaming variant of run_workflow. Yields (event, data) for each stage, stamped with
+    the time since the start of the run and since the previous stage; the final
+    "converted" event carries the ConvertedRecipe.
+    """
+    start = previous = time.perf_counter()
+
+    def timed(data: dict) -> dict:
+        nonlocal previous
+        now = time.perf_counter()
+        data = {**data, "elapsed_ms": round((now - start) * 1000, 1), "stage_ms": round((now - previous) * 1000, 1)}
+        previous = now
+        return data
+
+    # Sent before any work so clients get their first byte immediately
+    yield "started", timed({"recipe_url": user_request.recipe_url})
+
+    # The extraction runs in its own task: trace and llm_budget set context variables, which
+    # can't stay set across this generator's yields (it may be closed from another context)
+    stages: asyncio.Queue[tuple[str, dict] | None] = asyncio.Queue()
+
+    async def extract() -> OriginalRecipe:
+        original_recipe = None
+        try:
+            with trace("workflow", source_type(user_request.recipe_url)) as workflow, llm_budget():
+                async with aclosing(stream_recipe_extraction(user_request.recipe_url)) as extraction:
+                    async for stage, data in extraction:
+                        if stage == "extracted":
+                            original_recipe = data["recipe"]
+                            workflow.set(path=data["method"])
+                        stages.put_nowait((stage, timed(data)))
+        finally:
+            stages.put_nowait(None)
+        return original_recipe
+
+    extraction = asyncio.create_task(extract())
+    try:
+        while (stage := await stages.get()) is not None:
+            yield stage
+        original_recipe = await extraction
+    finally:
+        # The client stopped reading early
+        extraction.cancel()
+
+    yield "converted", timed({"recipe": _convert(original_recipe, user_request)})
+
+async def run_batch_workflow(user_requests: list[UserRequest]) -> list[dict]:
+    """
+    Runs the workflow for a batch of requests (e.g. a weekly meal plan import).
+    Each distinct recipe URL is extracted once, all extractions run concurrently (downloads
+    are bounded per host and LLM calls by the shared rate limit), and every request gets
+    its own {"status": "success", "result": ConvertedRecipe} or {"status": "error", "message"}
+    in the input order, so one failure doesn't sink the batch.
+    """
+    urls: dict[str, str] = {}
+    for user_request in user_requests:
+        urls.setdefault(normalize_url(user_request.recipe_url), user_request.recipe_url)
+
+    async def extract(url: str) -> OriginalRecipe:
+        # Each URL gets its own LLM budget and trace
+        with trace("workflow", source_type(url)), llm_budget():
+            return await recipe_extraction_workflow(url)
+
+    extractions = await asyncio.gather(*(extract(url) for url in urls.values()), return_exceptions=True)
+    recipes = dict(zip(urls, extractions))
+
+    results = []
+    for user_request in user_requests:
+        original_recipe = recipes[normalize_url(user_request.recipe_url)]
+        try:
+            if isinstance(original_recipe, BaseException):
+                raise original_recipe
+            if original_recipe is None:
+                raise ValueError(f"No recipe could be extracted from {user_request.recipe_url}")
+            results.append({"recipe_url": user_request.recipe_url, "status": "success", "result": _convert(original_recipe, user_request)})
+        except Exception as e:
+            results.append({"recipe_url": user_request.recipe_url, "status": "error", "message": str(e)})
+    return results
+
+def _convert(original_recipe: OriginalRecipe, user_request: UserRequest) -> ConvertedRecipe:
+    # Nutrition lookup and conversion are local and deterministic (no LLM call)
+    return convert_recipe(
+        ConversionRequest(original_recipe=original_recipe, user_adjustments=user_request.user_adjustments),
+        user_request.recipe_url,
+        ingredient_macros(original_recipe.ingredients),
+    )
@@ -0,0 +1,219 @@
+"""
+YouTube video metadata and captions for transcript extraction.
+
+The fast path reads only what extraction needs (title, description and caption tracks)
+from the player response embedded in the watch page: one page request plus the caption
+download, with no player JS, no signature decryption and no stream format resolution.
+yt-dlp's full extract_info is the fallback when that fails (consent walls, playability
+errors, caption URLs that need a proof-of-origin token, page layout changes).
+
+Metadata is cached per video ID; caption text is not (the extraction cache already holds
+the recipe built from it). Caption URLs are signed and expire, so a cached entry whose
+captions fail to download is dropped and fetched again.
+"""
+
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from app.config import get_settings
+from app.services.agents.captions import iter_caption_segments
+from app.services.cache import LRUCache
+from app.services.clients import get_http_session
+from app.services.urls import youtube_video_id
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+CAPTION_LANGUAGES = ("en", "en-US")
+
+# Caption files are parsed as they download, this many bytes at a time
+CAPTION_CHUNK_BYTES = 64 * 1024
+
+# Marker before the player response JSON in the watch page
+PLAYER_RESPONSE_MARKER = "ytInitialPlayerResponse = "
+
+# Skip the EU consent interstitial, which has no player response
+CONSENT_COOKIES = {"CONSENT": "YES+cb", "SOCS": "CAI"}
+
+_metadata_cache: LRUCache | None = None
+_metadata_lock = threading.Lock()
+
+def get_metadata_cache() -> LRUCache:
+    """
+    Get (or lazily create) the per-video metadata cache
+    """
+    global _metadata_cache
+    if _metadata_cache is None:
+        _metadata_cache = LRUCache(settings.YOUTUBE_METADATA_CACHE_MAX_ENTRIES, settings.YOUTUBE_METADATA_CACHE_TTL_SECONDS)
+    return _metadata_cache
+
+def player_response(html: str) -> dict:
+    """
+    Get the ytInitialPlayerResponse object embedded in a watch page; raises ValueError if missing
+    """
+    start = html.find(PLAYER_RESPONSE_MARKER)
+    if start == -1:
+        raise ValueError("Watch page has no player response")
+    # raw_decode stops at the end of the object, wherever the surrounding script continues
+    response, _ = json.JSONDecoder().raw_decode(html, start + len(PLAYER_RESPONSE_MARKER))
+    if not isinstance(response, dict):
+        raise ValueError("Watch page player response is not an object")
+    return response
+
+def _with_format(url: str, ext: str) -> str:
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key != "fmt"]
+    return urlunsplit(parts._replace(query=urlencode(query + [("fmt", ext)])))
+
+def pick_caption_track(tracks: list[dict]) -> dict | None:
+    """
+    Caption track to use from the player response: manual before auto-generated ("asr")
+    for each language in CAPTION_LANGUAGES order
+    """
+    for lang in CAPTION_LANGUAGES:
+        matching = [track for track in tracks if track.get("languageCode") == lang and track.get("baseUrl")]
+        if matching:
+            manual = [track for track in matching if track.get("kind") != "asr"]
+            return (manual or matching)[0]
+    return None
+
+def fetch_watch_metadata(video_id: str, base_url: str | None = None) -> dict:
+    """
+    Fast path: title, description and caption URL from the watch page's player response.
+    Raises ValueError (or requests.RequestException) when the page can't be used.
+    """
+    base_url = (base_url or settings.YOUTUBE_BASE_URL).rstrip("/")
+    response = get_http_session().get(
+        f"{base_url}/watch",
+        params={"v": video_id, "hl": "en"},
+        headers={"Accept-Language": "en-US,en;q=0.9"},
+        cookies=CONSENT_COOKIES,
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+
+    player = player_response(response.text)
+    status = player.get("playabilityStatus", {}).get("status")
+    if status != "OK":
+        raise ValueError(f"Video {video_id} is not playable from the watch page ({status})")
+    details = player.get("videoDetails")
+    if not details:
+        raise ValueError("Watch page player response has no video details")
+
+    tracks = player.get("captions", {}).get("playerCaptionsTracklistRenderer", {}).get("captionTracks", [])
+    track = pick_caption_track(tracks)
+    return {
+        "title": details.get("title"),
+        "description": details.get("shortDescription"),
+        "caption_url": _with_format(track["baseUrl"], "vtt") if track else None,
+        "caption_ext": "vtt" if track else None,
+        "source": "watch_page",
+    }
+
+def extract_info(url: str) -> dict:
+    """
+    yt-dlp's full info extraction (player, formats and subtitles)
+    """
+    ydl_opts = {
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'subtitleslangs': list(CAPTION_LANGUAGES),
+        'skip_download': True,
+        'quiet': True,
+    }
+    # Imported here: yt-dlp is only needed on the fallback path (see app/services/warmup.py)
+    import yt_dlp
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        return ydl.extract_info(url, download=False)
+
+def metadata_from_info(info: dict) -> dict:
+    """
+    Title, description and caption URL from a yt-dlp info dict
+    """
+    subtitles = info.get('subtitles', {})
+    auto_captions = info.get('automatic_captions', {})
+
+    # Prefer manual subtitles, then auto-generated; vtt or srt over other formats
+    caption_url, caption_ext = None, None
+    for lang in CAPTION_LANGUAGES:
+        candidates = subtitles.get(lang) or auto_captions.get(lang)
+        if candidates:
+            caption = next((sub for sub in candidates if sub.get('ext') in ('vtt', 'srt')), candidates[0])
+            caption_url, caption_ext = caption['url'], caption.get('ext', 'vtt')
+            break
+
+    return {
+        "title": info.get('title'),
+        "description": info.get('description'),
+        "caption_url": caption_url,
+        "caption_ext": caption_ext,
+        "source": "yt_dlp",
+    }
+
+def download_caption_lines(metadata: dict) -> list[str]:
+    """
+    Download and parse the captions for video metadata ([] if the video has none)
+    """
+    if not metadata["caption_url"]:
+        return []
+    with get_http_session().get(metadata["caption_url"], timeout=settings.HTTP_TIMEOUT_SECONDS, stream=True) as response:
+        response.raise_for_status()
+        return list(iter_caption_segments(response.iter_content(CAPTION_CHUNK_BYTES)))
+
+def _fast_caption_lines(metadata: dict) -> list[str]:
+    # Watch-page caption URLs may need a proof-of-origin token, which yt-dlp adds and we
+    # don't: an empty track counts as a fast-path failure
+    lines = download_caption_lines(metadata)
+    if metadata["caption_url"] and not lines:
+        raise ValueError("Caption track returned no text")
+    return lines
+
+def fetch_video_captions(url: str) -> dict:
+    """
+    Title, description and caption lines for a YouTube video, as
+    {"title", "description", "lines", "source", "timings_ms"}, where source is "cache",
+    "watch_page" or "yt_dlp" and timings_ms has the time spent on each step tried
+    ("watch_page", "yt_dlp", "captions")
+    """
+    video_id = youtube_video_id(url)
+    cache = get_metadata_cache()
+    timings_ms = {}
+
+    def timed(step: str, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            timings_ms[step] = round(timings_ms.get(step, 0) + (time.perf_counter() - start) * 1000, 2)
+
+    if video_id is not None:
+        with _metadata_lock:
+            metadata = cache.get(video_id)
+        if metadata is not None:
+            try:
+                lines = timed("captions", _fast_caption_lines, metadata)
+                return {**metadata, "lines": lines, "source": "cache", "timings_ms": timings_ms}
+            except (requests.RequestException, ValueError) as e:
+                logger.info("Cached captions for %s failed (%s), fetching again", video_id, e)
+
+    metadata = None
+    if video_id is not None and settings.YOUTUBE_FETCH_MODE == "fast":
+        try:
+            metadata = timed("watch_page", fetch_watch_metadata, video_id)
+            lines = timed("captions", _fast_caption_lines, metadata)
+        except (requests.RequestException, ValueError) as e:
+            logger.info("Fast YouTube path failed for %s (%s), falling back to yt-dlp", video_id, e)
+            metadata = None
+
+    if metadata is None:
+        metadata = metadata_from_info(timed("yt_dlp", extract_info, url))
+        lines = timed("captions", download_caption_lines, metadata)
+
+    if video_id is not None:
+        with _metadata_lock:
+            cache.set(video_id, metadata)
+    return {**metadata, "lines": lines, "timings_ms": timings_ms}
@@ -0,0 +1,344 @@
+"""
+Extraction cache keyed on the recipe ID (sha256 of the normalized source URL).
+
+Lookups go through an in-process LRU with TTL, then an optional persistent backend
+(SQLite by default, Firestore optional). Concurrent misses for the same URL share a
+single in-flight extraction, whether it was started by get_or_extract or by a streamed
+extraction (claim / release).
+
+Both levels hold recipes in their compact form (app/services/compact.py): CompactRecipe
+objects in memory, packed with msgpack in the backend. Callers get a fresh OriginalRecipe
+on every hit. Backend values written as JSON by earlier versions are still read.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from app.config import get_settings
+from app.services.agents.models import OriginalRecipe
+from app.services.compact import CompactRecipe
+from app.services.executor import run_blocking
+from app.services.metrics import register_collector
+from app.services.urls import recipe_id
+
+settings = get_settings()
+
+class LRUCache:
+    """
+    In-process LRU cache with a per-entry TTL
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl_seconds: float | None = None):
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+class SQLiteCacheBackend:
+    """
+    Persistent cache stored in a local SQLite file (values are packed recipes, or JSON strings from earlier versions)
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("BEGIN IMMEDIATE")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS extraction_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        columns = {row[1]: row[2] for row in self._connection.execute("PRAGMA table_info(extraction_cache)")}
+        if columns["value"] != "BLOB":
+            # Caches from before packed values declared value TEXT: rebuild the table, keeping
+            # the rows that haven't expired (their JSON strings are still read by _decode)
+            self._connection.execute("ALTER TABLE extraction_cache RENAME TO extraction_cache_text")
+            self._connection.execute(
+                "CREATE TABLE extraction_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "INSERT INTO extraction_cache SELECT key, value, expires_at FROM extraction_cache_text WHERE expires_at > ?", (time.time(),)
+            )
+            self._connection.execute("DROP TABLE extraction_cache_text")
+        self._connection.commit()
+
+    def get(self, key: str) -> tuple[bytes | str, float] | None:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM extraction_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time()),
+            ).fetchone()
+        return row
+
+    def set(self, key: str, value: bytes, expires_at: float):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO extraction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._connection.commit()
+
+class FirestoreCacheBackend:
+    """
+    Persistent cache stored in a Firestore collection (requires an initialized Firebase app)
+    """
+
+    def __init__(self, collection: str = "extraction_cache"):
+        from firebase_admin import firestore
+        self._collection = firestore.client().collection(collection)
+
+    def get(self, key: str) -> tuple[bytes | str, float] | None:
+        snapshot = self._collection.document(key).get()
+        if not snapshot.exists:
+            return None
+        data = snapshot.to_dict()
+        if data["expires_at"] <= time.time():
+            return None
+        return data["value"], data["expires_at"]
+
+    def set(self, key: str, value: bytes, expires_at: float):
+        self._collection.document(key).set({"value": value, "expires_at": expires_at})
+
+class ExtractionAbandoned(Exception):
+    """
+    The caller leading an extraction stopped before it finished (a closed stream)
+    """
+
+def _retrieve_exception(future: asyncio.Future):
+    # Retrieve the exception so it isn't reported as never retrieved when nobody else waited
+    if not future.cancelled():
+        future.exception()
+
+class ExtractionCache:
+    """
+    Two-level cache in front of recipe extraction with single-flight deduplication
+    """
+
+    def __init__(self, memory: LRUCache, backend: SQLiteCacheBackend | FirestoreCacheBackend | None = None):
+        self.memory = memory
+        self.backend = backend
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def lookup(self, url: str, count: bool = True) -> OriginalRecipe | None:
+        """
+        Return the cached recipe for this URL (in-process first, then the persistent backend), or None.
+        count=False leaves the lookup out of the hit/miss stats (e.g. near-duplicate probes).
+        """
+        key = recipe_id(url)
+
+        compact = self.memory.get(key)
+        if compact is not None:
+            self.hits += count
+            return compact.to_model()
+
+        if self.backend is not None:
+            row = await run_blocking(self.backend.get, key)
+            compact = _decode(row[0]) if row is not None else None
+            if compact is not None:
+                self.memory.set(key, compact, ttl_seconds=min(self.memory.ttl_seconds, row[1] - time.time()))
+                self.persistent_hits += count
+                return compact.to_model()
+
+        self.misses += count
+        return None
+
+    async def store(self, url: str, recipe: OriginalRecipe):
+        """
+        Cache a successfully extracted recipe in both levels
+        """
+        key = recipe_id(url)
+        compact = CompactRecipe.from_model(recipe)
+        self.memory.set(key, compact)
+        if self.backend is not None:
+            await run_blocking(self.backend.set, key, compact.pack(), time.time() + self.memory.ttl_seconds)
+
+    async def get_or_extract(
+        self, url: str, extract: Callable[[str], Awaitable[OriginalRecipe]], on_cached: Callable[[OriginalRecipe], None] | None = None,
+    ) -> OriginalRecipe:
+        """
+        Return the cached recipe for this URL, or run `extract(url)` once and cache the result,
+        then call `on_cached(recipe)` if given. Concurrent callers for the same URL await the
+        same extraction. It runs in its own task, so it still finishes (and is cached) for the
+        others if the caller that started it is cancelled (a client disconnecting).
+        """
+        key = recipe_id(url)
+
+        while True:
+            compact = self.memory.get(key)
+            if compact is not None:
+                self.hits += 1
+                return compact.to_model()
+
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(pending)
+            except ExtractionAbandoned:
+                # A streamed extraction was closed before it finished: start over
+                continue
+
+        task = asyncio.create_task(self._lead(key, url, extract, on_cached))
+        task.add_done_callback(_retrieve_exception)
+        self._in_flight[key] = task
+        return await asyncio.shield(task)
+
+    async def _lead(
+        self, key: str, url: str, extract: Callable[[str], Awaitable[OriginalRecipe]], on_cached: Callable[[OriginalRecipe], None] | None,
+    ) -> OriginalRecipe:
+        try:
+            return await self._load_or_extract(url, extract, on_cached)
+        finally:
+            del self._in_flight[key]
+
+    def claim(self, url: str) -> asyncio.Future | None:
+        """
+        Lead the extraction of this URL outside get_or_extract (the streaming path), or None if
+        one is already in flight (see join). Other callers wait on the returned future until
+        release() is called with the outcome.
+        """
+        key = recipe_id(url)
+        if key in self._in_flight:
+            return None
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        self._in_flight[key] = future
+        return future
+
+    def release(self, url: str, future: asyncio.Future, recipe: OriginalRecipe | None = None, error: Exception | None = None):
+        """
+        End a claimed extraction: waiters get the recipe, the error, or (with neither, when the
+        leader stopped early) ExtractionAbandoned and start over
+        """
+        key = recipe_id(url)
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if future.done():
+            return
+        if recipe is not None:
+            future.set_result(recipe)
+        else:
+            future.set_exception(error or ExtractionAbandoned(url))
+
+    async def join(self, url: str) -> OriginalRecipe | None:
+        """
+        Wait for the extraction of this URL already in flight and return its recipe; None if
+        there is none, or it was abandoned
+        """
+        pending = self._in_flight.get(recipe_id(url))
+        if pending is None:
+            return None
+        self.coalesced += 1
+        try:
+            return await asyncio.shield(pending)
+        except ExtractionAbandoned:
+            return None
+
+    async def _load_or_extract(
+        self, url: str, extract: Callable[[str], Awaitable[OriginalRecipe]], on_cached: Callable[[OriginalRecipe], None] | None,
+    ) -> OriginalRecipe:
+        recipe = await self.lookup(url)
+        if recipe is not None:
+            return recipe
+
+        recipe = await extract(url)
+
+        # Only successful, complete extractions are cached
+        if recipe is not None:
+            await self.store(url, recipe)
+            if on_cached is not None:
+                on_cached(recipe)
+
+        return recipe
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters for the cache
+        """
+        return {
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.memory.evictions,
+            "expirations": self.memory.expirations,
+            "entries": len(self.memory),
+            "in_flight": len(self._in_flight),
+        }
+
+def _decode(value: bytes | str) -> CompactRecipe | None:
+    """
+    Compact recipe of a backend value, or None if it can't be read (a stale format version)
+    """
+    if isinstance(value, str):
+        return CompactRecipe.from_model(OriginalRecipe.model_validate_json(value))
+    try:
+        return CompactRecipe.unpack(value)
+    except ValueError:
+        return None
+
+_extraction_cache: ExtractionCache | None = None
+
+def get_extraction_cache() -> ExtractionCache:
+    """
+    Get (or lazily create) the shared extraction cache configured by EXTRACTION_CACHE_*
+    """
+    global _extraction_cache
+    if _extraction_cache is None:
+        memory = LRUCache(settings.EXTRACTION_CACHE_MAX_ENTRIES, settings.EXTRACTION_CACHE_TTL_SECONDS)
+        if settings.EXTRACTION_CACHE_BACKEND == "sqlite":
+            backend = SQLiteCacheBackend(settings.EXTRACTION_CACHE_PATH)
+        elif settings.EXTRACTION_CACHE_BACKEND == "firestore":
+            backend = FirestoreCacheBackend()
+        elif settings.EXTRACTION_CACHE_BACKEND == "memory":
+            backend = None
+        else:
+            raise ValueError(f"Invalid EXTRACTION_CACHE_BACKEND: {settings.EXTRACTION_CACHE_BACKEND}")
+        _extraction_cache = ExtractionCache(memory, backend)
+    return _extraction_cache
+
+def _collect_cache_metrics() -> list[tuple]:
+    # Only reported once the cache exists (it is created on first use)
+    if _extraction_cache is None:
+        return []
+    stats = _extraction_cache.stats()
+    counters = ("hits", "persistent_hits", "misses", "coalesced", "evictions", "expirations")
+    metrics = [(f"extraction_cache_{name}_total", "counter", f"Extraction cache {name.replace('_', ' ')}", (), {(): stats[name]}) for name in counters]
+    metrics += [(f"extraction_cache_{name}", "gauge", f"Extraction cache {name.replace('_', ' ')}", (), {(): stats[name]}) for name in ("entries", "in_flight")]
+    return metrics
+
+register_collector(_collect_cache_metrics)
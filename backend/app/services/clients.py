@@ -0,0 +1,102 @@
+"""
+Long-lived HTTP and OpenAI clients shared by every workflow run.
+
+Creating a client per request pays for a fresh TCP + TLS handshake to each host on
+every extraction (page or subtitle download, plus the OpenAI call); see
+benchmarks/connection_reuse.py for the saving per request. These clients are created
+once in the app lifespan and keep connections alive between extractions:
+- `get_http_session()`: requests.Session with a keep-alive pool per host, retries with
+  exponential backoff on connection errors and 429/5xx, used for pages and subtitles
+- `get_openai_client()`: a single AsyncOpenAI client (its httpx pool is reused across calls)
+
+openai and trafilatura are imported when the clients are created, not with this module;
+the app creates them in the background after startup (app/services/warmup.py).
+"""
+
+from typing import TYPE_CHECKING
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+settings = get_settings()
+
+_http_session: requests.Session | None = None
+_openai_client: "AsyncOpenAI | None" = None
+
+def _create_http_session() -> requests.Session:
+    from trafilatura.downloads import USER_AGENT
+    retry = Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        backoff_factor=settings.HTTP_BACKOFF_SECONDS,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.HTTP_POOL_HOSTS,
+        pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+def _create_openai_client() -> "AsyncOpenAI":
+    import httpx
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(
+        api_key=settings.OPENAI_API_KEY,
+        timeout=settings.OPENAI_TIMEOUT_SECONDS,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+        http_client=httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=settings.HTTP_POOL_MAXSIZE, max_keepalive_connections=settings.HTTP_POOL_MAXSIZE),
+            timeout=settings.OPENAI_TIMEOUT_SECONDS,
+        ),
+    )
+
+def init_clients():
+    """
+    Create the shared clients (called in the background after startup, see app/services/warmup.py)
+    """
+    global _http_session, _openai_client
+    if _http_session is None:
+        _http_session = _create_http_session()
+    # Without an API key the OpenAI client is created (and fails) on first LLM use instead
+    if _openai_client is None and settings.OPENAI_API_KEY:
+        _openai_client = _create_openai_client()
+
+async def close_clients():
+    """
+    Close the shared clients and their connection pools (called from the app lifespan)
+    """
+    global _http_session, _openai_client
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
+def get_http_session() -> requests.Session:
+    """
+    Get the shared HTTP session (created on first use outside the app, e.g. in worker processes)
+    """
+    global _http_session
+    if _http_session is None:
+        _http_session = _create_http_session()
+    return _http_session
+
+def get_openai_client() -> "AsyncOpenAI":
+    """
+    Get the shared OpenAI client (created on first use outside the app)
+    """
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = _create_openai_client()
+    return _openai_client
@@ -0,0 +1,144 @@
+"""
+Compact form of extracted recipes, for the ones the extraction cache keeps in memory and
+in its persistent backend.
+
+An OriginalRecipe is a Pydantic model with one Ingredient model per ingredient, each with
+its own dict of fields; tens of thousands of them cost far more memory (and GC time) than
+the data. A CompactRecipe holds the same recipe in a fixed set of slots, with the
+ingredients as columns:
+- names and units are interned, so "salt" or "tbsp" is one string however many recipes
+  use it
+- quantities are pre-parsed into one float array (NaN where a quantity is descriptive,
+  like "to taste"), with a byte per ingredient for the original type (int, float or text)
+  and the original text kept only for text quantities ("1 1/2", "2-3")
+- instructions are a tuple
+
+pack() serializes it with msgpack (the float array as one little-endian blob): about 70%
+of the JSON size, and faster to encode and decode than the model's JSON. Conversion to
+and from the models happens at the API boundary: from_model() when a recipe is cached,
+to_model() when it is returned (validating a plain dict, which is faster than building
+the models field by field with model_construct). Building a model this way costs about as
+much as parsing it from JSON, so stores that only ever return models (the catalog) keep
+JSON. Fields a model adds to OriginalRecipe (the catalog's Recipe) are carried along as
+a dict.
+
+See benchmarks/compact.py for memory and (de)serialization throughput.
+"""
+
+import math
+import sys
+from array import array
+from typing import TypeVar
+from app.services.agents.ingredients import parse_quantity
+from app.services.agents.models import OriginalRecipe
+
+# Bumped when the packed layout changes (older values are then decoded as stale)
+FORMAT_VERSION = 1
+
+# Original type of an ingredient quantity
+INT, FLOAT, TEXT = 0, 1, 2
+
+Model = TypeVar("Model", bound=OriginalRecipe)
+
+class CompactRecipe:
+    """
+    An OriginalRecipe (or subclass) in slots, with interned columnar ingredients
+    """
+
+    __slots__ = ("title", "description", "servings", "instructions", "names", "units", "amounts", "kinds", "texts", "extra")
+
+    def __init__(
+        self, title: str, description: str | None, servings: int, instructions: tuple[str, ...], names: tuple[str, ...],
+        units: tuple[str | None, ...], amounts: array, kinds: bytes, texts: tuple[str | None, ...] | None, extra: dict | None = None,
+    ):
+        self.title = title
+        self.description = description
+        self.servings = servings
+        self.instructions = instructions
+        self.names = names
+        self.units = units
+        self.amounts = amounts # Numeric quantities, NaN where not numeric
+        self.kinds = kinds # INT / FLOAT / TEXT per ingredient
+        self.texts = texts # Original text of TEXT quantities (None elsewhere), or None if there are none
+        self.extra = extra # Fields beyond OriginalRecipe's, or None
+
+    @classmethod
+    def from_model(cls, recipe: OriginalRecipe) -> "CompactRecipe":
+        amounts = array("d")
+        kinds = bytearray()
+        texts = []
+        for ingredient in recipe.ingredients:
+            quantity = ingredient.quantity
+            if isinstance(quantity, str):
+                value = parse_quantity(quantity)
+                amounts.append(math.nan if value is None else value)
+                kinds.append(TEXT)
+                texts.append(sys.intern(quantity))
+            else:
+                amounts.append(quantity)
+                kinds.append(INT if isinstance(quantity, int) else FLOAT)
+                texts.append(None)
+        extra_fields = type(recipe).model_fields.keys() - OriginalRecipe.model_fields.keys()
+        return cls(
+            recipe.title, recipe.description, recipe.servings, tuple(recipe.instructions),
+            tuple(sys.intern(ingredient.name) for ingredient in recipe.ingredients),
+            tuple(None if ingredient.unit is None else sys.intern(ingredient.unit) for ingredient in recipe.ingredients),
+            amounts, bytes(kinds), tuple(texts) if TEXT in kinds else None,
+            {name: getattr(recipe, name) for name in extra_fields} or None,
+        )
+
+    def to_model(self, model: type[Model] = OriginalRecipe) -> Model:
+        """
+        The recipe as `model` (OriginalRecipe or a subclass whose extra fields were packed)
+        """
+        texts = self.texts
+        quantities = [
+            texts[i] if kind == TEXT else int(amount) if kind == INT else amount
+            for i, (kind, amount) in enumerate(zip(self.kinds, self.amounts))
+        ]
+        return model.model_validate({
+            "title": self.title, "description": self.description, "servings": self.servings,
+            "ingredients": [{"name": name, "quantity": quantity, "unit": unit} for name, quantity, unit in zip(self.names, quantities, self.units)],
+            "instructions": self.instructions, **(self.extra or {}),
+        })
+
+    def pack(self) -> bytes:
+        import msgpack
+
+        amounts = self.amounts
+        if sys.byteorder == "big":
+            amounts = array("d", amounts)
+            amounts.byteswap()
+        return msgpack.packb((
+            FORMAT_VERSION, self.title, self.description, self.servings, self.instructions,
+            self.names, self.units, amounts.tobytes(), self.kinds, self.texts, self.extra,
+        ))
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "CompactRecipe":
+        """
+        Decode a packed recipe; raises ValueError if it is not one (or is from another format version)
+        """
+        import msgpack
+
+        try:
+            version, title, description, servings, instructions, names, units, amounts, kinds, texts, extra = msgpack.unpackb(data, use_list=False)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid packed recipe: {e}")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported packed recipe version: {version}")
+        values = array("d")
+        values.frombytes(amounts)
+        if sys.byteorder == "big":
+            values.byteswap()
+        return cls(
+            title, description, servings, instructions, tuple(map(sys.intern, names)),
+            tuple(None if unit is None else sys.intern(unit) for unit in units),
+            values, kinds, texts, extra,
+        )
+
+def pack_recipe(recipe: OriginalRecipe) -> bytes:
+    return CompactRecipe.from_model(recipe).pack()
+
+def unpack_recipe(data: bytes, model: type[Model] = OriginalRecipe) -> Model:
+    return CompactRecipe.unpack(data).to_model(model)
@@ -0,0 +1,286 @@
+"""
+Near-duplicate detection of scraped recipes published under different URLs.
+
+The same recipe shows up under AMP pages, syndication sites, print views and YouTube
+re-uploads, each with its own normalized URL (and so its own recipe ID and cache key).
+Between the scrape and the LLM extraction, the scraped text (page content, or a video's
+transcript) is fingerprinted and looked up among the recipes extracted
+so far; a likely duplicate reuses that extraction from the extraction cache instead of
+calling the LLM again.
+
+Pages of one site (or videos of one channel) share boilerplate, such as navigation,
+newsletter blurbs and sponsor reads, which can make two different recipes look alike. So a
+match is only reused once it is confirmed: at least DEDUP_MIN_INGREDIENT_OVERLAP of the
+cached recipe's ingredients must appear in the scraped text. Videos are fingerprinted by
+their transcript alone, since a channel's descriptions are mostly shared links, and only
+when it is long enough (MIN_TRANSCRIPT_SHINGLES).
+
+- Text is NFKC-normalized (so "½" and "1/2" agree), lowercased and split into words, with
+  unit spellings mapped to their short form ("tablespoons" and "tbsp" agree); every run
+  of SHINGLE_SIZE words is a shingle, hashed with crc32
+- The MinHash signature keeps, for NUM_PERMUTATIONS multiply-shift hash functions, the
+  smallest hash over the shingles; the share of equal positions in two signatures
+  estimates the Jaccard similarity of their shingle sets
+- The LSH index splits signatures into LSH_BANDS bands: recipes sharing a band are
+  candidates, and a candidate is a duplicate when its estimated similarity reaches
+  DEDUP_THRESHOLD (and it is confirmed, as above)
+- The index is incremental (one add per extraction) and bounded by DEDUP_MAX_ENTRIES,
+  oldest entries evicted first; it lives in the process, like the in-process cache level,
+  at about 1 KB per entry
+
+See benchmarks/duplicates.py for precision/recall and throughput.
+"""
+
+import re
+import unicodedata
+import zlib
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from app.config import get_settings
+from app.services.agents.ingredients import UNIT_ALIASES
+from app.services.agents.models import OriginalRecipe
+from app.services.agents.nutrition import normalize_name
+from app.services.metrics import register_collector
+
+if TYPE_CHECKING:
+    import numpy as np
+
+settings = get_settings()
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+
+# Texts with fewer shingles (e.g. a video without captions) are too short to tell apart
+MIN_SHINGLES = 20
+# Transcripts need more: a short one is mostly the channel's spoken intro and outro
+MIN_TRANSCRIPT_SHINGLES = 150
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """
+    Hashed word shingles of a text
+    """
+    words = [UNIT_ALIASES.get(word, word) for word in _WORD_PATTERN.findall(unicodedata.normalize("NFKC", text).lower())]
+    return {zlib.crc32(" ".join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)}
+
+_permutations: tuple["np.ndarray", "np.ndarray"] | None = None
+
+def minhash(features: set[int]) -> "np.ndarray":
+    """
+    MinHash signature of a set of 32-bit features
+    """
+    import numpy as np
+
+    global _permutations
+    if _permutations is None:
+        # Fixed seed: signatures must agree across processes and restarts
+        generator = np.random.default_rng(20240601)
+        _permutations = (
+            generator.integers(0, 1 << 64, NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1),
+            generator.integers(0, 1 << 64, NUM_PERMUTATIONS, dtype=np.uint64),
+        )
+    a, b = _permutations
+    values = np.fromiter(features, dtype=np.uint64, count=len(features))
+    # Multiply-shift: the high 32 bits of (a * x + b) mod 2**64, for an odd a
+    return ((np.outer(a, values) + b[:, None]) >> np.uint64(32)).min(axis=1).astype(np.uint32)
+
+def fingerprint(text: str, min_shingles: int = MIN_SHINGLES) -> "np.ndarray | None":
+    """
+    MinHash signature of a scraped text, or None when it is too short to compare
+    """
+    features = shingles(text)
+    if len(features) < min_shingles:
+        return None
+    return minhash(features)
+
+@lru_cache(maxsize=16)
+def _words(text: str) -> frozenset[str]:
+    # Cached: every candidate of a lookup is confirmed against the same scraped text
+    return frozenset(normalize_name(text))
+
+def ingredient_overlap(names: list[str], text: str) -> float:
+    """
+    Share of the ingredient names whose tokens (normalized as for the nutrition lookup) all
+    appear in the text
+    """
+    if not names:
+        return 0.0
+    words = _words(text)
+    found = sum(all(token in words for token in normalize_name(name)) for name in names)
+    return found / len(names)
+
+def similarity(first: "np.ndarray", second: "np.ndarray") -> float:
+    """
+    Estimated Jaccard similarity of the shingle sets behind two signatures
+    """
+    return float((first == second).mean())
+
+class LSHIndex:
+    """
+    Incremental LSH index of MinHash signatures, bounded with oldest-first eviction.
+
+    Signatures are rows of one matrix; each band keeps its band hashes sorted (with the
+    row numbers) for binary search. Rows added since the last merge are scanned instead,
+    and merged in (dropping removed rows) every MERGE_ROWS adds.
+    """
+
+    MERGE_ROWS = 4096
+
+    def __init__(self, max_entries: int, bands: int = LSH_BANDS):
+        import numpy as np
+
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = NUM_PERMUTATIONS // bands
+        # Odd multipliers combining the rows of a band into one 64-bit band hash
+        self._mixers = np.random.default_rng(bands).integers(0, 1 << 64, self.rows, dtype=np.uint64) | np.uint64(1)
+        self.keys: list[str | None] = [] # Row -> key, None once removed
+        self.row_numbers: dict[str, int] = {}
+        self._signatures = np.zeros((1024, NUM_PERMUTATIONS), dtype=np.uint32)
+        self._sorted_hashes = np.zeros((bands, 0), dtype=np.uint64)
+        self._sorted_rows = np.zeros((bands, 0), dtype=np.uint32)
+        self._pending_hashes = np.zeros((self.MERGE_ROWS, bands), dtype=np.uint64)
+        self._merged = 0 # Rows below this are in the sorted band hashes
+        self._oldest = 0
+        self.evictions = 0
+
+    def _band_hashes(self, signatures: "np.ndarray") -> "np.ndarray":
+        """
+        (n, bands) band hashes of (n, NUM_PERMUTATIONS) signatures
+        """
+        import numpy as np
+
+        rows = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+        return np.bitwise_xor.reduce(rows * self._mixers, axis=2)
+
+    def add(self, key: str, signature: "np.ndarray"):
+        import numpy as np
+
+        self.remove(key)
+        row = len(self.keys)
+        if row == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+        self._signatures[row] = signature
+        self._pending_hashes[row - self._merged] = self._band_hashes(signature[None])[0]
+        self.keys.append(key)
+        self.row_numbers[key] = row
+
+        while len(self.row_numbers) > self.max_entries:
+            while self.keys[self._oldest] is None:
+                self._oldest += 1
+            self.remove(self.keys[self._oldest])
+            self.evictions += 1
+        if len(self.keys) - self._merged == self.MERGE_ROWS:
+            self._merge()
+
+    def remove(self, key: str):
+        row = self.row_numbers.pop(key, None)
+        if row is not None:
+            self.keys[row] = None
+
+    def _merge(self):
+        """
+        Drop removed rows and rebuild the sorted band hashes over all rows
+        """
+        import numpy as np
+
+        live = np.array([row for row, key in enumerate(self.keys) if key is not None], dtype=np.int64)
+        signatures = self._signatures[live]
+        self._signatures = np.zeros((max(1024, 2 * len(live)), NUM_PERMUTATIONS), dtype=np.uint32)
+        self._signatures[:len(live)] = signatures
+        self.keys = [self.keys[row] for row in live]
+        self.row_numbers = {key: row for row, key in enumerate(self.keys)}
+        hashes = self._band_hashes(signatures).T
+        order = np.argsort(hashes, axis=1)
+        self._sorted_hashes = np.take_along_axis(hashes, order, axis=1)
+        self._sorted_rows = order.astype(np.uint32)
+        self._merged = len(self.keys)
+        self._oldest = 0
+
+    def query(self, signature: "np.ndarray", threshold: float) -> list[tuple[str, float]]:
+        """
+        Indexed keys whose estimated similarity to the signature reaches the threshold, most similar first
+        """
+        import numpy as np
+
+        hashes = self._band_hashes(signature[None])[0]
+        candidates = set()
+        for band in range(self.bands):
+            sorted_hashes = self._sorted_hashes[band]
+            start, end = np.searchsorted(sorted_hashes, hashes[band], "left"), np.searchsorted(sorted_hashes, hashes[band], "right")
+            candidates.update(self._sorted_rows[band, start:end].tolist())
+        pending = self._pending_hashes[:len(self.keys) - self._merged]
+        candidates.update((self._merged + np.flatnonzero((pending == hashes).any(axis=1))).tolist())
+
+        rows = [row for row in candidates if self.keys[row] is not None]
+        if not rows:
+            return []
+        similarities = (self._signatures[rows] == signature).mean(axis=1)
+        matches = [(self.keys[row], float(value)) for row, value in zip(rows, similarities) if value >= threshold]
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def __len__(self):
+        return len(self.row_numbers)
+
+class DuplicateDetector:
+    """
+    Looks up the recipes already extracted from near-duplicates of a scraped text
+    """
+
+    def __init__(self, threshold: float, max_entries: int, min_ingredient_overlap: float):
+        self.threshold = threshold
+        self.min_ingredient_overlap = min_ingredient_overlap
+        self.index = LSHIndex(max_entries)
+        self.checks = 0
+        self.hits = 0
+        self.rejections = 0
+
+    def find(self, signature: "np.ndarray") -> list[tuple[str, float]]:
+        """
+        Source URLs of likely duplicates with their estimated similarity, most similar first
+        """
+        self.checks += 1
+        return self.index.query(signature, self.threshold)
+
+    def confirm(self, recipe: OriginalRecipe, text: str) -> bool:
+        """
+        Whether a match's recipe is the one in this scraped text (enough of its ingredients
+        appear in it), not just a page with the same boilerplate
+        """
+        if ingredient_overlap([ingredient.name for ingredient in recipe.ingredients], text) >= self.min_ingredient_overlap:
+            return True
+        self.rejections += 1
+        return False
+
+    def add(self, url: str, signature: "np.ndarray"):
+        """
+        Remember the fingerprint of a text extracted from this (normalized) source URL
+        """
+        self.index.add(url, signature)
+
+    def stats(self) -> dict:
+        return {"checks": self.checks, "hits": self.hits, "rejections": self.rejections, "evictions": self.index.evictions, "entries": len(self.index)}
+
+_duplicate_detector: DuplicateDetector | None = None
+
+def get_duplicate_detector() -> DuplicateDetector:
+    """
+    Get (or lazily create) the shared duplicate detector configured by DEDUP_*
+    """
+    global _duplicate_detector
+    if _duplicate_detector is None:
+        _duplicate_detector = DuplicateDetector(settings.DEDUP_THRESHOLD, settings.DEDUP_MAX_ENTRIES, settings.DEDUP_MIN_INGREDIENT_OVERLAP)
+    return _duplicate_detector
+
+def _collect_duplicate_metrics() -> list[tuple]:
+    # Only reported once the detector exists (it is created on first use)
+    if _duplicate_detector is None:
+        return []
+    stats = _duplicate_detector.stats()
+    metrics = [(f"near_duplicate_{name}_total", "counter", f"Near-duplicate detection {name}", (), {(): stats[name]}) for name in ("checks", "hits", "rejections", "evictions")]
+    metrics.append(("near_duplicate_entries", "gauge", "Fingerprints in the near-duplicate index", (), {(): stats["entries"]}))
+    return metrics
+
+register_collector(_collect_duplicate_metrics)
@@ -0,0 +1,46 @@
+"""
+Bounded worker pool for the blocking stages of the workflow (yt-dlp, scraping, parsing).
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from app.config import get_settings
+
+settings = get_settings()
+
+_executor: Executor | None = None
+
+def get_executor() -> Executor:
+    """
+    Get (or lazily create) the shared worker pool configured by WORKFLOW_EXECUTOR
+    """
+    global _executor
+    if _executor is None:
+        if settings.WORKFLOW_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=settings.WORKFLOW_MAX_WORKERS)
+        elif settings.WORKFLOW_EXECUTOR == "thread":
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.WORKFLOW_MAX_WORKERS,
+                thread_name_prefix="workflow",
+            )
+        else:
+            raise ValueError(f"Invalid WORKFLOW_EXECUTOR: {settings.WORKFLOW_EXECUTOR}")
+    return _executor
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Run a blocking function on the worker pool so it doesn't stall the event loop.
+    The pool size caps how many blocking stages run at once; extra calls wait their turn.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+def shutdown_executor():
+    """
+    Shut down the worker pool (called from the app lifespan)
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
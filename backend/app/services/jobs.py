@@ -0,0 +1,317 @@
+"""
+Background job queue for workflow runs.
+
+Submitting a UserRequest returns immediately with a job ID derived from the submitting
+user and the normalized URL + adjustments, so a user resubmitting the same request gets
+the same job (and other users' requests never map to it). Asyncio
+workers (blocking stages still run on the shared worker pool) pick the highest-priority
+job whose user is under the per-user concurrency cap, retry failures with exponential
+backoff, and support cancellation. Job state lives in a pluggable store: in-memory, or
+SQLite so queued jobs survive a restart.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import os
+import sqlite3
+import threading
+import time
+from typing import Literal
+from pydantic import BaseModel
+from app.config import get_settings
+from app.services.agents.models import ConvertedRecipe, UserRequest
+from app.services.agents.workflow import run_workflow
+from app.services.executor import run_blocking
+from app.services.urls import normalize_url
+
+settings = get_settings()
+
+JobStatus = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+# Job model (state of one workflow run)
+class Job(BaseModel):
+    id: str # Derived from user + normalized URL + adjustments
+    status: JobStatus = "queued"
+    priority: int = 0 # Higher runs first
+    user_id: str # Submitting user (for per-user concurrency caps)
+    attempts: int = 0 # Number of attempts started so far
+    request: UserRequest
+    result: ConvertedRecipe | None = None
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+def job_id(user_request: UserRequest, user_id: str) -> str:
+    """
+    Idempotent job ID: sha256 of the user, the normalized URL and the requested adjustments
+    """
+    adjustments = user_request.user_adjustments
+    key = f"{user_id}|{normalize_url(user_request.recipe_url)}|{adjustments.target_servings}|{adjustments.target_calories}|{adjustments.target_protein}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+class MemoryJobStore:
+    """
+    Job store kept in process memory (lost on restart)
+    """
+
+    def __init__(self):
+        self._jobs: dict[str, Job] = {}
+
+    async def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    async def save(self, job: Job):
+        self._jobs[job.id] = job
+
+    async def unfinished(self) -> list[Job]:
+        return [job for job in self._jobs.values() if job.status not in FINISHED_STATUSES]
+
+class SQLiteJobStore:
+    """
+    Job store in a local SQLite file (jobs are stored as JSON)
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, job TEXT NOT NULL)")
+        self._connection.commit()
+
+    def _get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._connection.execute("SELECT job FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.model_validate_json(row[0]) if row else None
+
+    def _save(self, job: Job):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO jobs (id, status, job) VALUES (?, ?, ?)",
+                (job.id, job.status, job.model_dump_json()),
+            )
+            self._connection.commit()
+
+    def _unfinished(self) -> list[Job]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT job FROM jobs WHERE status NOT IN (?, ?, ?)", FINISHED_STATUSES
+            ).fetchall()
+        return [Job.model_validate_json(row[0]) for row in rows]
+
+    async def get(self, job_id: str) -> Job | None:
+        return await run_blocking(self._get, job_id)
+
+    async def save(self, job: Job):
+        await run_blocking(self._save, job)
+
+    async def unfinished(self) -> list[Job]:
+        return await run_blocking(self._unfinished)
+
+class JobQueue:
+    """
+    Priority queue of workflow jobs with per-user concurrency caps, retries and cancellation
+    """
+
+    def __init__(
+        self,
+        store: MemoryJobStore | SQLiteJobStore,
+        workers: int,
+        max_per_user: int,
+        max_attempts: int,
+        retry_backoff_seconds: float,
+    ):
+        self.store = store
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._heap: list[tuple[int, float, str]] = []
+        self._queued: dict[str, Job] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._running_per_user: dict[str, int] = {}
+        self._finished_events: dict[str, asyncio.Event] = {}
+        self._wakeup: asyncio.Condition | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        """
+        Start the workers and requeue jobs left unfinished by a previous run (called from the app lifespan)
+        """
+        self._wakeup = asyncio.Condition()
+        for job in await self.store.unfinished():
+            job.status = "queued"
+            await self._enqueue(job)
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        """
+        Stop the workers; running jobs are cancelled and stay queued in persistent stores
+        """
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    async def submit(self, user_request: UserRequest, user_id: str, priority: int = 0) -> Job:
+        """
+        Submit a workflow run. Returns the existing job when the same request is already
+        queued, running or succeeded; failed or cancelled jobs are resubmitted.
+        """
+        existing = await self.get(job_id(user_request, user_id))
+        if existing is not None and existing.status not in ("failed", "cancelled"):
+            return existing
+
+        now = time.time()
+        job = Job(id=job_id(user_request, user_id), priority=priority, user_id=user_id, request=user_request, created_at=now, updated_at=now)
+        await self.store.save(job)
+        await self._enqueue(job)
+        return job
+
+    async def get(self, job_id: str) -> Job | None:
+        return self._queued.get(job_id) or await self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Job | None:
+        """
+        Wait up to `timeout` seconds for a job to finish, then return its current state
+        """
+        job = await self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        event = self._finished_events.setdefault(job_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return await self.get(job_id)
+
+    async def cancel(self, job_id: str) -> Job | None:
+        """
+        Cancel a queued or running job
+        """
+        job = await self.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+
+        if job_id in self._running:
+            # The worker records the cancellation when the task unwinds
+            event = self._finished_events.setdefault(job_id, asyncio.Event())
+            self._running[job_id].cancel()
+            await event.wait()
+            return await self.get(job_id)
+
+        self._queued.pop(job_id, None)
+        await self._finish(job, "cancelled")
+        return job
+
+    async def _enqueue(self, job: Job, delay: float = 0):
+        self._queued[job.id] = job
+        heapq.heappush(self._heap, (-job.priority, time.time() + delay, job.id))
+        if delay:
+            asyncio.get_running_loop().call_later(delay, lambda: asyncio.ensure_future(self._notify()))
+        else:
+            await self._notify()
+
+    async def _notify(self):
+        async with self._wakeup:
+            self._wakeup.notify_all()
+
+    def _next_job(self) -> Job | None:
+        """
+        Pop the highest-priority job that is due and whose user is under the concurrency cap
+        """
+        skipped = []
+        job = None
+        now = time.time()
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            candidate = self._queued.get(entry[2])
+            if candidate is None:
+                continue # Cancelled while queued
+            if entry[1] > now or self._running_per_user.get(candidate.user_id, 0) >= self.max_per_user:
+                skipped.append(entry)
+                continue
+            job = self._queued.pop(entry[2])
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        return job
+
+    async def _worker(self):
+        while True:
+            async with self._wakeup:
+                job = self._next_job()
+                while job is None:
+                    # Re-check periodically so delayed retries become due
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=1)
+                    except asyncio.TimeoutError:
+                        pass
+                    job = self._next_job()
+            await self._run(job)
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.attempts += 1
+        job.updated_at = time.time()
+        await self.store.save(job)
+
+        self._running_per_user[job.user_id] = self._running_per_user.get(job.user_id, 0) + 1
+        task = asyncio.create_task(run_workflow(job.request))
+        self._running[job.id] = task
+        try:
+            job.result = await task
+            await self._finish(job, "succeeded")
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                await self._finish(job, "cancelled")
+            else:
+                task.cancel()
+                raise
+        except Exception as e:
+            job.error = str(e)
+            if job.attempts < self.max_attempts:
+                job.status = "queued"
+                job.updated_at = time.time()
+                await self.store.save(job)
+                await self._enqueue(job, delay=self.retry_backoff_seconds * 2 ** (job.attempts - 1))
+            else:
+                await self._finish(job, "failed")
+        finally:
+            self._running.pop(job.id, None)
+            self._running_per_user[job.user_id] -= 1
+            await self._notify()
+
+    async def _finish(self, job: Job, status: JobStatus):
+        job.status = status
+        job.updated_at = time.time()
+        await self.store.save(job)
+        event = self._finished_events.pop(job.id, None)
+        if event is not None:
+            event.set()
+
+_job_queue: JobQueue | None = None
+
+def get_job_queue() -> JobQueue:
+    """
+    Get (or lazily create) the shared job queue configured by JOB_*
+    """
+    global _job_queue
+    if _job_queue is None:
+        if settings.JOB_STORE_BACKEND == "sqlite":
+            store = SQLiteJobStore(settings.JOB_STORE_PATH)
+        elif settings.JOB_STORE_BACKEND == "memory":
+            store = MemoryJobStore()
+        else:
+            raise ValueError(f"Invalid JOB_STORE_BACKEND: {settings.JOB_STORE_BACKEND}")
+        _job_queue = JobQueue(
+            store,
+            workers=settings.JOB_WORKERS,
+            max_per_user=settings.JOB_MAX_PER_USER,
+            max_attempts=settings.JOB_MAX_ATTEMPTS,
+            retry_backoff_seconds=settings.JOB_RETRY_BACKOFF_SECONDS,
+        )
+    return _job_queue
@@ -0,0 +1,94 @@
+"""
+Concurrency limits shared by every workflow run.
+
+- Per-host politeness: at most HTTP_PER_HOST_CONCURRENCY downloads from the same host at
+  once, so a batch of URLs from one recipe site doesn't hammer it.
+- LLM calls: at most LLM_MAX_CONCURRENCY in flight and LLM_REQUESTS_PER_MINUTE started
+  per rolling minute, so bursts (batches, chunked transcripts) queue up here instead of
+  failing with 429s from the API.
+"""
+
+import asyncio
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from app.config import get_settings
+
+settings = get_settings()
+
+class HostLimiter:
+    """
+    One semaphore per host
+    """
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    def limit(self, url: str) -> asyncio.Semaphore:
+        """
+        Semaphore to hold while downloading from this URL's host
+        """
+        host = (urlsplit(url).hostname or "").lower().removeprefix("www.")
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.per_host)
+        return self._semaphores[host]
+
+class RateLimiter:
+    """
+    Async context manager bounding concurrency and starts per rolling minute (0 = no rate limit)
+    """
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._starts: deque[float] = deque()
+        self.waited_seconds = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        try:
+            if self.requests_per_minute:
+                await self._wait_for_slot()
+        except BaseException:
+            self._semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+    async def _wait_for_slot(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= 60:
+                    self._starts.popleft()
+                if len(self._starts) < self.requests_per_minute:
+                    self._starts.append(now)
+                    return
+                delay = 60 - (now - self._starts[0])
+                self.waited_seconds += delay
+                await asyncio.sleep(delay)
+
+_host_limiter: HostLimiter | None = None
+_llm_limiter: RateLimiter | None = None
+
+def get_host_limiter() -> HostLimiter:
+    """
+    Get (or lazily create) the shared per-host download limiter
+    """
+    global _host_limiter
+    if _host_limiter is None:
+        _host_limiter = HostLimiter(settings.HTTP_PER_HOST_CONCURRENCY)
+    return _host_limiter
+
+def get_llm_limiter() -> RateLimiter:
+    """
+    Get (or lazily create) the shared LLM call limiter
+    """
+    global _llm_limiter
+    if _llm_limiter is None:
+        _llm_limiter = RateLimiter(settings.LLM_MAX_CONCURRENCY, settings.LLM_REQUESTS_PER_MINUTE)
+    return _llm_limiter
@@ -0,0 +1,239 @@
+"""
+Workflow instrumentation: timed spans per stage, latency histograms and error counters,
+served in the Prometheus text format by GET /metrics.
+
+Every stage observation is labeled with:
+- stage: "workflow", "scrape", "download", "parse", "dedup", "llm_extraction", "llm", and the
+  sub-stages reported by workers ("youtube_watch_page", "content_trafilatura", ...)
+- source: the source type, "web" or "youtube" ("" where it doesn't apply)
+- path: the path the stage took, e.g. "watch_page" / "yt_dlp" / "cache" for YouTube
+  metadata, "structured_data" or the winning content strategy for web pages, the LLM stage
+
+Spans record in the process serving requests. Blocking stages that may run in worker
+processes return their own timings_ms, and the caller records them with `observe`.
+
+`trace` wraps a whole workflow request: it records the request span, logs the per-stage
+breakdown of requests slower than SLOW_REQUEST_SECONDS, and with PROFILE_SLOW_REQUESTS
+samples stacks while the request runs and saves them when it turns out slow.
+
+With METRICS_ENABLED=false, `span` and `trace` return a shared no-op and `observe` returns
+at once.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from bisect import bisect_left
+from collections.abc import Callable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from app.config import get_settings
+from app.services.profiler import SamplingProfiler
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Histogram bucket upper bounds (seconds): from sub-millisecond parsing to minute-long LLM calls
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LABEL_NAMES = ("stage", "source", "path")
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram per label set
+    """
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self._series.get(labels)
+        if series is None:
+            # Per-bucket counts (plus +Inf), sum, count
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self, label_names: tuple[str, ...]) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._series.items()):
+            label_text = _labels(label_names, labels)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{label_text},le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+class Counter:
+    """
+    Monotonic counter per label set
+    """
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def render(self, label_names: tuple[str, ...]) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_labels(label_names, labels)}}} {value}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+stage_duration = Histogram("workflow_stage_duration_seconds", "Duration of workflow stages")
+stage_errors = Counter("workflow_stage_errors_total", "Workflow stages that raised, by exception type")
+
+# Extra metrics rendered by /metrics: callables returning (name, type, help, label names,
+# {label values: value}) tuples, registered by the modules that own the numbers
+_collectors: list[Callable[[], list[tuple]]] = []
+
+def register_collector(collect: Callable[[], list[tuple]]):
+    """
+    Add a collector to the /metrics output (e.g. LLM usage, extraction cache counters)
+    """
+    _collectors.append(collect)
+
+def render_metrics() -> str:
+    """
+    All metrics in the Prometheus text exposition format
+    """
+    lines = stage_duration.render(LABEL_NAMES) + stage_errors.render(LABEL_NAMES + ("error",))
+    for collect in _collectors:
+        for name, kind, help, label_names, samples in collect():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{name}{{{_labels(label_names, labels)}}} {value}" if label_names else f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+# Stage timings of the current workflow request (see `trace`)
+_trace: ContextVar[list | None] = ContextVar("trace", default=None)
+
+def observe(stage: str, seconds: float, source: str = "", path: str = ""):
+    """
+    Record a stage duration measured elsewhere (e.g. timings_ms returned from a worker)
+    """
+    if not settings.METRICS_ENABLED:
+        return
+    stage_duration.observe((stage, source, path), seconds)
+    trace = _trace.get()
+    if trace is not None:
+        trace.append((stage, path, seconds))
+
+def observe_timings(prefix: str, timings_ms: dict, source: str = "", path: str = ""):
+    """
+    Record every entry of a timings_ms dict as stage "<prefix>_<name>"
+    """
+    if not settings.METRICS_ENABLED:
+        return
+    for name, milliseconds in timings_ms.items():
+        observe(f"{prefix}_{name}", milliseconds / 1000, source, path)
+
+class Span:
+    """
+    Times a stage; `set(path=...)` fills in labels known only once the stage has run
+    """
+    __slots__ = ("stage", "source", "path", "start")
+
+    def __init__(self, stage: str, source: str, path: str):
+        self.stage = stage
+        self.source = source
+        self.path = path
+
+    def set(self, source: str | None = None, path: str | None = None):
+        if source is not None:
+            self.source = source
+        if path is not None:
+            self.path = path
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(self.stage, time.perf_counter() - self.start, self.source, self.path)
+        # GeneratorExit: the consumer stopped reading a stream, not a failure
+        if exc_type is not None and exc_type is not GeneratorExit:
+            error = "cancelled" if exc_type is asyncio.CancelledError else exc_type.__name__
+            stage_errors.inc((self.stage, self.source, self.path, error))
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, source: str | None = None, path: str | None = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(stage: str, source: str = "", path: str = "") -> Span | _NoopSpan:
+    """
+    Context manager timing one stage (usable in sync and async code)
+    """
+    if not settings.METRICS_ENABLED:
+        return _NOOP_SPAN
+    return Span(stage, source, path)
+
+_profiler: SamplingProfiler | None = None
+
+def trace(name: str, source: str = "") -> Span | _NoopSpan:
+    """
+    Trace one workflow request: a "<name>" span plus slow-request logging and profiling
+    """
+    if not settings.METRICS_ENABLED:
+        return _NOOP_SPAN
+    return _traced(name, source)
+
+@contextmanager
+def _traced(name: str, source: str):
+    global _profiler
+    profiler = None
+    if settings.PROFILE_SLOW_REQUESTS and _profiler is None:
+        # One request is profiled at a time; the sampler sees every thread in the process
+        profiler = _profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_SECONDS)
+        profiler.start()
+
+    stages = []
+    token = _trace.set(stages)
+    request_span = Span(name, source, "")
+    try:
+        with request_span:
+            yield request_span
+    finally:
+        _trace.reset(token)
+        elapsed = time.perf_counter() - request_span.start
+        samples = None
+        if profiler is not None:
+            samples = profiler.stop()
+            _profiler = None
+        if settings.SLOW_REQUEST_SECONDS and elapsed >= settings.SLOW_REQUEST_SECONDS:
+            breakdown = ", ".join(f"{stage}{'/' + path if path else ''}={seconds * 1000:.0f}ms" for stage, path, seconds in stages)
+            logger.warning("Slow %s request (%s, %.1f s): %s", name, source, elapsed, breakdown)
+            if samples:
+                path = os.path.join(settings.PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{source or 'request'}-{uuid.uuid4().hex[:8]}.folded")
+                SamplingProfiler.write_folded(samples, path)
+                logger.warning("Profile of the slow %s request saved to %s", name, path)
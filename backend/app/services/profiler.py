@@ -0,0 +1,64 @@
+"""
+Sampling profiler for slow workflow requests (see `trace` in app/services/metrics.py).
+
+A background thread records the stack of every other thread at a fixed interval. The
+samples are written in the folded-stack format ("frame;frame;frame count" per line), which
+flamegraph.pl, speedscope and similar viewers read. Only Python frames are visible: time
+spent in C extensions (lxml, trafilatura's parser) shows up under the Python call that
+entered them.
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+
+class SamplingProfiler:
+    """
+    Samples all thread stacks from a daemon thread until stopped
+    """
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        """
+        Stop sampling and return {folded stack: sample count}
+        """
+        self._stopped.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stopped.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    @staticmethod
+    def write_folded(samples: Counter[str], path: str):
+        """
+        Save samples in the folded-stack format
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
@@ -0,0 +1,467 @@
+"""
+Recipe catalog: the shared `recipes` collection and each user's `saved_recipes`
+(BUILD_PLAN 2.1), behind a pluggable store: SQLite for local runs and tests, or Firestore.
+
+Recipes are keyed by recipe_id (sha256 of the normalized source URL), so saving the same
+page twice finds the existing recipe. A user's saved entry is keyed by the recipe it
+saves, so each recipe is in a collection at most once.
+
+Listings are built to stay fast as the catalog grows:
+- keyset (cursor) pagination, newest first, on (created_at, id): each page is an index
+  seek from where the previous page ended, where OFFSET would skip (and, on Firestore,
+  bill) every earlier row
+- list views read only the summary fields (projection), not ingredients and instructions
+- a page of saved recipes fetches its recipe summaries in one batched multi-get instead
+  of one read per entry
+Cursors are opaque strings; a page comes with next_cursor, None on the last page.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from typing import Literal
+from pydantic import BaseModel
+from app.config import get_settings
+from app.services.agents.extraction import source_type
+from app.services.agents.models import ConvertedRecipe, OriginalRecipe
+from app.services.urls import normalize_url, recipe_id
+
+settings = get_settings()
+
+# Recipe in the shared catalog (document of the `recipes` collection)
+class Recipe(OriginalRecipe):
+    id: str # recipe_id of source_url
+    source_url: str # Normalized source URL
+    source_type: Literal["web", "youtube"]
+    created_at: float
+    created_by: str | None = None # Firebase uid of the first creator
+
+# List view of a recipe (the fields read by catalog listings)
+class RecipeSummary(BaseModel):
+    id: str
+    title: str
+    description: str | None = None
+    servings: int
+    source_url: str
+    source_type: Literal["web", "youtube"]
+    created_at: float
+
+SUMMARY_FIELDS = tuple(RecipeSummary.model_fields)
+
+# Recipe in a user's collection (document of users/{uid}/saved_recipes, keyed by recipe_id)
+class SavedRecipe(BaseModel):
+    recipe_id: str
+    saved_at: float
+    notes: str = ""
+    converted_recipe: ConvertedRecipe | None = None # Set when saved from a workflow result
+
+# List view of a saved recipe, with the summary of the recipe it saves
+class SavedRecipeSummary(BaseModel):
+    recipe_id: str
+    saved_at: float
+    notes: str
+    has_converted_recipe: bool
+    recipe: RecipeSummary | None # None if the recipe is no longer in the catalog
+
+class RecipePage(BaseModel):
+    items: list[RecipeSummary]
+    next_cursor: str | None = None
+
+class SavedRecipePage(BaseModel):
+    items: list[SavedRecipeSummary]
+    next_cursor: str | None = None
+
+def encode_cursor(timestamp: float, key: str) -> str:
+    """
+    Opaque cursor for the position after (timestamp, key)
+    """
+    return base64.urlsafe_b64encode(json.dumps([timestamp, key]).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    """
+    (timestamp, key) of a cursor; raises ValueError if it is malformed
+    """
+    try:
+        timestamp, key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(timestamp), str(key)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+class SQLiteRecipeStore:
+    """
+    Catalog in a local SQLite file. Summary fields are columns, so listings never decode
+    the full recipe: that is a JSON column, read only by single gets.
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS recipes (
+                id TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT, servings INTEGER NOT NULL,
+                source_url TEXT NOT NULL, source_type TEXT NOT NULL, created_at REAL NOT NULL, recipe TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS recipes_by_created ON recipes (created_at, id);
+            CREATE INDEX IF NOT EXISTS recipes_by_source ON recipes (source_type, created_at, id);
+            CREATE TABLE IF NOT EXISTS saved_recipes (
+                user_id TEXT NOT NULL, recipe_id TEXT NOT NULL, saved_at REAL NOT NULL, notes TEXT NOT NULL,
+                converted_recipe TEXT, PRIMARY KEY (user_id, recipe_id)
+            );
+            CREATE INDEX IF NOT EXISTS saved_recipes_by_user ON saved_recipes (user_id, saved_at, recipe_id);
+        """)
+        self._connection.commit()
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _write(self, sql: str, params: tuple | list) -> int:
+        with self._lock:
+            if isinstance(params, list):
+                cursor = self._connection.executemany(sql, params)
+            else:
+                cursor = self._connection.execute(sql, params)
+            self._connection.commit()
+        return cursor.rowcount
+
+    def _get_recipe(self, recipe_id: str) -> Recipe | None:
+        rows = self._query("SELECT recipe FROM recipes WHERE id = ?", (recipe_id,))
+        return Recipe.model_validate_json(rows[0][0]) if rows else None
+
+    def _get_summaries(self, recipe_ids: list[str]) -> dict[str, RecipeSummary]:
+        summaries = {}
+        # One query per 500 IDs (well under SQLite's bound-parameter limit)
+        for start in range(0, len(recipe_ids), 500):
+            chunk = recipe_ids[start:start + 500]
+            rows = self._query(f"SELECT {', '.join(SUMMARY_FIELDS)} FROM recipes WHERE id IN ({', '.join('?' * len(chunk))})", tuple(chunk))
+            summaries.update((row[0], RecipeSummary(**dict(zip(SUMMARY_FIELDS, row)))) for row in rows)
+        return summaries
+
+    def _add_recipes(self, recipes: list[Recipe]) -> int:
+        return self._write(
+            f"INSERT OR IGNORE INTO recipes ({', '.join(SUMMARY_FIELDS)}, recipe) VALUES ({', '.join('?' * (len(SUMMARY_FIELDS) + 1))})",
+            [tuple(getattr(recipe, field) for field in SUMMARY_FIELDS) + (recipe.model_dump_json(),) for recipe in recipes],
+        )
+
+    def _list_recipes(self, limit: int, after: tuple[float, str] | None, source: str | None) -> list[RecipeSummary]:
+        conditions, params = [], []
+        if source is not None:
+            conditions.append("source_type = ?")
+            params.append(source)
+        if after is not None:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._query(
+            f"SELECT {', '.join(SUMMARY_FIELDS)} FROM recipes {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [RecipeSummary(**dict(zip(SUMMARY_FIELDS, row))) for row in rows]
+
+    def _scan_recipes(self, after: tuple[float, str] | None, limit: int) -> list[Recipe]:
+        keyset, params = ("WHERE (created_at, id) > (?, ?)", after) if after is not None else ("", ())
+        rows = self._query(f"SELECT recipe FROM recipes {keyset} ORDER BY created_at, id LIMIT ?", (*params, limit))
+        return [Recipe.model_validate_json(row[0]) for row in rows]
+
+    def _get_saved(self, user_id: str, recipe_id: str) -> SavedRecipe | None:
+        rows = self._query(
+            "SELECT recipe_id, saved_at, notes, converted_recipe FROM saved_recipes WHERE user_id = ? AND recipe_id = ?",
+            (user_id, recipe_id),
+        )
+        if not rows:
+            return None
+        recipe_id, saved_at, notes, converted = rows[0]
+        converted_recipe = ConvertedRecipe.model_validate_json(converted) if converted else None
+        return SavedRecipe(recipe_id=recipe_id, saved_at=saved_at, notes=notes, converted_recipe=converted_recipe)
+
+    def _save(self, user_id: str, saved: SavedRecipe):
+        converted = saved.converted_recipe.model_dump_json() if saved.converted_recipe else None
+        self._write(
+            "INSERT OR REPLACE INTO saved_recipes (user_id, recipe_id, saved_at, notes, converted_recipe) VALUES (?, ?, ?, ?, ?)",
+            (user_id, saved.recipe_id, saved.saved_at, saved.notes, converted),
+        )
+
+    def _update_notes(self, user_id: str, recipe_id: str, notes: str) -> bool:
+        return self._write("UPDATE saved_recipes SET notes = ? WHERE user_id = ? AND recipe_id = ?", (notes, user_id, recipe_id)) > 0
+
+    def _delete_saved(self, user_id: str, recipe_id: str) -> bool:
+        return self._write("DELETE FROM saved_recipes WHERE user_id = ? AND recipe_id = ?", (user_id, recipe_id)) > 0
+
+    def _list_saved(self, user_id: str, limit: int, after: tuple[float, str] | None) -> list[tuple[str, float, str, bool]]:
+        keyset, params = ("AND (saved_at, recipe_id) < (?, ?)", after) if after is not None else ("", ())
+        return self._query(
+            f"SELECT recipe_id, saved_at, notes, converted_recipe IS NOT NULL FROM saved_recipes"
+            f" WHERE user_id = ? {keyset} ORDER BY saved_at DESC, recipe_id DESC LIMIT ?",
+            (user_id, *params, limit),
+        )
+
+    async def get_recipe(self, recipe_id: str) -> Recipe | None:
+        return await asyncio.to_thread(self._get_recipe, recipe_id)
+
+    async def get_summaries(self, recipe_ids: list[str]) -> dict[str, RecipeSummary]:
+        return await asyncio.to_thread(self._get_summaries, recipe_ids)
+
+    async def add_recipes(self, recipes: list[Recipe]) -> int:
+        return await asyncio.to_thread(self._add_recipes, recipes)
+
+    async def list_recipes(self, limit: int, after: tuple[float, str] | None, source: str | None) -> list[RecipeSummary]:
+        return await asyncio.to_thread(self._list_recipes, limit, after, source)
+
+    async def scan_recipes(self, after: tuple[float, str] | None, limit: int) -> list[Recipe]:
+        return await asyncio.to_thread(self._scan_recipes, after, limit)
+
+    async def get_saved(self, user_id: str, recipe_id: str) -> SavedRecipe | None:
+        return await asyncio.to_thread(self._get_saved, user_id, recipe_id)
+
+    async def save(self, user_id: str, saved: SavedRecipe):
+        await asyncio.to_thread(self._save, user_id, saved)
+
+    async def update_notes(self, user_id: str, recipe_id: str, notes: str) -> bool:
+        return await asyncio.to_thread(self._update_notes, user_id, recipe_id, notes)
+
+    async def delete_saved(self, user_id: str, recipe_id: str) -> bool:
+        return await asyncio.to_thread(self._delete_saved, user_id, recipe_id)
+
+    async def list_saved(self, user_id: str, limit: int, after: tuple[float, str] | None) -> list[tuple[str, float, str, bool]]:
+        return await asyncio.to_thread(self._list_saved, user_id, limit, after)
+
+class FirestoreRecipeStore:
+    """
+    Catalog in Firestore (requires an initialized Firebase app). Listings need composite
+    indexes on recipes (created_at desc, id desc), recipes (source_type, created_at desc,
+    id desc) and saved_recipes (saved_at desc, recipe_id desc).
+    """
+
+    def __init__(self, collection: str = "recipes", users_collection: str = "users"):
+        from firebase_admin import firestore
+        self._firestore = firestore
+        self._client = firestore.client()
+        self._recipes = self._client.collection(collection)
+        self._users = self._client.collection(users_collection)
+
+    def _saved_recipes(self, user_id: str):
+        return self._users.document(user_id).collection("saved_recipes")
+
+    def _get_recipe(self, recipe_id: str) -> Recipe | None:
+        snapshot = self._recipes.document(recipe_id).get()
+        return Recipe.model_validate(snapshot.to_dict()) if snapshot.exists else None
+
+    def _get_summaries(self, recipe_ids: list[str]) -> dict[str, RecipeSummary]:
+        # get_all fetches every document (summary fields only) in one batched read
+        snapshots = self._client.get_all([self._recipes.document(recipe_id) for recipe_id in recipe_ids], field_paths=list(SUMMARY_FIELDS))
+        return {snapshot.id: RecipeSummary.model_validate(snapshot.to_dict()) for snapshot in snapshots if snapshot.exists}
+
+    def _add_recipes(self, recipes: list[Recipe]) -> int:
+        from google.api_core.exceptions import Conflict
+        added = 0
+        for recipe in recipes:
+            try:
+                # create() fails if the document exists, so the first creator is kept
+                self._recipes.document(recipe.id).create(recipe.model_dump())
+                added += 1
+            except Conflict:
+                pass
+        return added
+
+    def _list_recipes(self, limit: int, after: tuple[float, str] | None, source: str | None) -> list[RecipeSummary]:
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        query = self._recipes.select(list(SUMMARY_FIELDS))
+        if source is not None:
+            query = query.where(filter=FieldFilter("source_type", "==", source))
+        query = query.order_by("created_at", direction=self._firestore.Query.DESCENDING).order_by("id", direction=self._firestore.Query.DESCENDING)
+        if after is not None:
+            query = query.start_after({"created_at": after[0], "id": after[1]})
+        return [RecipeSummary.model_validate(snapshot.to_dict()) for snapshot in query.limit(limit).stream()]
+
+    def _scan_recipes(self, after: tuple[float, str] | None, limit: int) -> list[Recipe]:
+        query = self._recipes.order_by("created_at").order_by("id")
+        if after is not None:
+            query = query.start_after({"created_at": after[0], "id": after[1]})
+        return [Recipe.model_validate(snapshot.to_dict()) for snapshot in query.limit(limit).stream()]
+
+    def _get_saved(self, user_id: str, recipe_id: str) -> SavedRecipe | None:
+        snapshot = self._saved_recipes(user_id).document(recipe_id).get()
+        return SavedRecipe.model_validate(snapshot.to_dict()) if snapshot.exists else None
+
+    def _save(self, user_id: str, saved: SavedRecipe):
+        data = saved.model_dump()
+        data["has_converted_recipe"] = saved.converted_recipe is not None
+        self._saved_recipes(user_id).document(saved.recipe_id).set(data)
+
+    def _update_notes(self, user_id: str, recipe_id: str, notes: str) -> bool:
+        from google.api_core.exceptions import NotFound
+        try:
+            self._saved_recipes(user_id).document(recipe_id).update({"notes": notes})
+            return True
+        except NotFound:
+            return False
+
+    def _delete_saved(self, user_id: str, recipe_id: str) -> bool:
+        document = self._saved_recipes(user_id).document(recipe_id)
+        if not document.get(field_paths=["recipe_id"]).exists:
+            return False
+        document.delete()
+        return True
+
+    def _list_saved(self, user_id: str, limit: int, after: tuple[float, str] | None) -> list[tuple[str, float, str, bool]]:
+        query = (
+            self._saved_recipes(user_id)
+            .select(["recipe_id", "saved_at", "notes", "has_converted_recipe"])
+            .order_by("saved_at", direction=self._firestore.Query.DESCENDING)
+            .order_by("recipe_id", direction=self._firestore.Query.DESCENDING)
+        )
+        if after is not None:
+            query = query.start_after({"saved_at": after[0], "recipe_id": after[1]})
+        rows = []
+        for snapshot in query.limit(limit).stream():
+            data = snapshot.to_dict()
+            rows.append((data["recipe_id"], data["saved_at"], data.get("notes", ""), data.get("has_converted_recipe", False)))
+        return rows
+
+    async def get_recipe(self, recipe_id: str) -> Recipe | None:
+        return await asyncio.to_thread(self._get_recipe, recipe_id)
+
+    async def get_summaries(self, recipe_ids: list[str]) -> dict[str, RecipeSummary]:
+        return await asyncio.to_thread(self._get_summaries, recipe_ids)
+
+    async def add_recipes(self, recipes: list[Recipe]) -> int:
+        return await asyncio.to_thread(self._add_recipes, recipes)
+
+    async def list_recipes(self, limit: int, after: tuple[float, str] | None, source: str | None) -> list[RecipeSummary]:
+        return await asyncio.to_thread(self._list_recipes, limit, after, source)
+
+    async def scan_recipes(self, after: tuple[float, str] | None, limit: int) -> list[Recipe]:
+        return await asyncio.to_thread(self._scan_recipes, after, limit)
+
+    async def get_saved(self, user_id: str, recipe_id: str) -> SavedRecipe | None:
+        return await asyncio.to_thread(self._get_saved, user_id, recipe_id)
+
+    async def save(self, user_id: str, saved: SavedRecipe):
+        await asyncio.to_thread(self._save, user_id, saved)
+
+    async def update_notes(self, user_id: str, recipe_id: str, notes: str) -> bool:
+        return await asyncio.to_thread(self._update_notes, user_id, recipe_id, notes)
+
+    async def delete_saved(self, user_id: str, recipe_id: str) -> bool:
+        return await asyncio.to_thread(self._delete_saved, user_id, recipe_id)
+
+    async def list_saved(self, user_id: str, limit: int, after: tuple[float, str] | None) -> list[tuple[str, float, str, bool]]:
+        return await asyncio.to_thread(self._list_saved, user_id, limit, after)
+
+class RecipeCatalog:
+    """
+    Recipe and saved-recipe operations over a store: ID assignment, cursors, page sizes
+    and the save flow (BUILD_PLAN 2.4)
+    """
+
+    def __init__(self, store: SQLiteRecipeStore | FirestoreRecipeStore, page_size: int, max_page_size: int):
+        self.store = store
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+        # Called with the recipes returned by create_recipes (e.g. to update the search index)
+        self.listeners: list[Callable[[list[Recipe]], None]] = []
+
+    def _limit(self, limit: int | None) -> int:
+        return min(max(limit or self.page_size, 1), self.max_page_size)
+
+    async def get_recipe(self, recipe_id: str) -> Recipe | None:
+        return await self.store.get_recipe(recipe_id)
+
+    async def create_recipe(self, source_url: str, recipe: OriginalRecipe, created_by: str | None = None) -> Recipe:
+        """
+        Add a recipe under the recipe_id of its source URL, or return the one already there
+        """
+        (created,) = await self.create_recipes([(source_url, recipe)], created_by)
+        return created
+
+    async def create_recipes(self, recipes: list[tuple[str, OriginalRecipe]], created_by: str | None = None) -> list[Recipe]:
+        """
+        Batched create_recipe (e.g. for seeding the catalog); returns the stored recipes in order
+        """
+        now = time.time()
+        records = [
+            Recipe(
+                **recipe.model_dump(), id=recipe_id(source_url), source_url=normalize_url(source_url),
+                source_type=source_type(normalize_url(source_url)), created_at=now, created_by=created_by,
+            )
+            for source_url, recipe in recipes
+        ]
+        if await self.store.add_recipes(records) != len(records):
+            # Some already existed: return what the store holds
+            records = [await self.store.get_recipe(record.id) or record for record in records]
+        for listener in self.listeners:
+            listener(records)
+        return records
+
+    async def list_recipes(self, limit: int | None = None, cursor: str | None = None, source: str | None = None) -> RecipePage:
+        """
+        A page of catalog summaries, newest first (raises ValueError on a malformed cursor)
+        """
+        limit = self._limit(limit)
+        # One extra row tells whether there is a next page without counting
+        items = await self.store.list_recipes(limit + 1, decode_cursor(cursor) if cursor else None, source)
+        next_cursor = encode_cursor(items[limit - 1].created_at, items[limit - 1].id) if len(items) > limit else None
+        return RecipePage(items=items[:limit], next_cursor=next_cursor)
+
+    async def save_recipe(self, user_id: str, recipe_id: str, notes: str = "", converted_recipe: ConvertedRecipe | None = None) -> SavedRecipe | None:
+        """
+        Save a catalog recipe to the user's collection (None if the recipe doesn't exist).
+        Saving it again replaces the notes and converted recipe.
+        """
+        if not await self.store.get_summaries([recipe_id]):
+            return None
+        saved = SavedRecipe(recipe_id=recipe_id, saved_at=time.time(), notes=notes, converted_recipe=converted_recipe)
+        await self.store.save(user_id, saved)
+        return saved
+
+    async def get_saved(self, user_id: str, recipe_id: str) -> SavedRecipe | None:
+        return await self.store.get_saved(user_id, recipe_id)
+
+    async def update_notes(self, user_id: str, recipe_id: str, notes: str) -> SavedRecipe | None:
+        if not await self.store.update_notes(user_id, recipe_id, notes):
+            return None
+        return await self.store.get_saved(user_id, recipe_id)
+
+    async def delete_saved(self, user_id: str, recipe_id: str) -> bool:
+        return await self.store.delete_saved(user_id, recipe_id)
+
+    async def list_saved(self, user_id: str, limit: int | None = None, cursor: str | None = None) -> SavedRecipePage:
+        """
+        A page of the user's saved recipes, most recently saved first, each with its recipe
+        summary (raises ValueError on a malformed cursor)
+        """
+        limit = self._limit(limit)
+        rows = await self.store.list_saved(user_id, limit + 1, decode_cursor(cursor) if cursor else None)
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        rows = rows[:limit]
+        summaries = await self.store.get_summaries([row[0] for row in rows]) if rows else {}
+        items = [
+            SavedRecipeSummary(recipe_id=recipe_id, saved_at=saved_at, notes=notes, has_converted_recipe=bool(converted), recipe=summaries.get(recipe_id))
+            for recipe_id, saved_at, notes, converted in rows
+        ]
+        return SavedRecipePage(items=items, next_cursor=next_cursor)
+
+_recipe_catalog: RecipeCatalog | None = None
+
+def get_recipe_catalog() -> RecipeCatalog:
+    """
+    Get (or lazily create) the shared recipe catalog configured by RECIPE_*
+    """
+    global _recipe_catalog
+    if _recipe_catalog is None:
+        if settings.RECIPE_STORE_BACKEND == "sqlite":
+            store = SQLiteRecipeStore(settings.RECIPE_STORE_PATH)
+        elif settings.RECIPE_STORE_BACKEND == "firestore":
+            store = FirestoreRecipeStore()
+        else:
+            raise ValueError(f"Invalid RECIPE_STORE_BACKEND: {settings.RECIPE_STORE_BACKEND}")
+        _recipe_catalog = RecipeCatalog(store, settings.RECIPE_PAGE_SIZE, settings.RECIPE_MAX_PAGE_SIZE)
+    return _recipe_catalog
@@ -0,0 +1,496 @@
+"""
+In-process search over the recipe catalog: full-text BM25 ranking, "what's in my fridge"
+ingredient queries and prefix autocomplete.
+
+Titles, descriptions and ingredient names are tokenized like ingredient names for the
+nutrition lookup (nutrition.normalize_name: lowercased, singular), so "Chicken Thighs" in
+a query matches "boneless skinless chicken thighs" in a recipe. Only function words are
+dropped from the text index, so descriptors stay searchable ("whole wheat", "old
+fashioned oats"); ingredient queries drop descriptors too, so "chicken" matches
+"boneless chicken thighs".
+
+The index is inverted and compact:
+- recipes get dense doc numbers; per-doc data (length, ingredient count, live flag) are
+  flat arrays
+- each term has a posting list of doc numbers with weighted term frequencies (title x3,
+  ingredients x2, description x1) in array buffers, scored with numpy
+- ingredient tokens have their own posting lists; an ingredient phrase ("chicken breast")
+  matches a recipe whose ingredient list has all of its tokens
+- autocomplete bisects a sorted vocabulary and ranks completions by document frequency
+Recipes created through the catalog (RecipeCatalog.create_recipes) are added as they are
+saved, through the catalog's listeners. Adding a recipe appends to the posting lists;
+replacing or removing one marks its old doc number dead. Dead entries are dropped when
+the index is snapshotted. numpy is imported on first use, as in conversion, to keep it
+off the app's cold start.
+
+The catalog store is the source of truth. The index is snapshotted to disk
+(SEARCH_SNAPSHOT_PATH) on shutdown. On startup it is reloaded from the snapshot, and the
+recipes created after the snapshot's watermark (less SEARCH_CATCH_UP_GRACE_SECONDS, for
+recipes committed late) are read from the store. The same catch-up runs every
+SEARCH_REFRESH_SECONDS, picking up recipes added by other instances.
+"""
+
+import asyncio
+import heapq
+import io
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Literal
+from pydantic import BaseModel
+from app.config import get_settings
+from app.services.agents.nutrition import normalize_name
+from app.services.recipes import Recipe, get_recipe_catalog
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Term frequency weight of each field
+TITLE_WEIGHT = 3
+INGREDIENT_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+
+# Recipes read from the store per batch when catching up
+SCAN_BATCH = 2000
+
+# Function words left out of the text index and queries
+STOPWORDS = frozenset({"a", "an", "and", "of", "or", "the", "for", "to", "into", "with", "in", "on", "at", "by", "from"})
+
+SNAPSHOT_VERSION = 2
+
+# One search result
+class SearchHit(BaseModel):
+    recipe_id: str
+    score: float # BM25 score of the text query (0 without one)
+    matched_ingredients: int # Query ingredients the recipe contains
+    missing_ingredients: int # Recipe ingredients beyond the matched ones
+
+def parse_ingredients(ingredients: str) -> list[tuple[str, ...]]:
+    """
+    Token tuples of a comma-separated ingredient query ("chicken, rice, broccoli")
+    """
+    phrases = (normalize_name(phrase) for phrase in ingredients.split(","))
+    return [phrase for phrase in phrases if phrase]
+
+def tokenize(text: str) -> tuple[str, ...]:
+    """
+    Text index tokens of a title, description, ingredient name or query
+    """
+    return normalize_name(text, STOPWORDS)
+
+class SearchIndex:
+    """
+    Inverted index over catalog recipes (not thread-safe: one index is updated and queried
+    from the event loop; a fresh one can be built on another thread and swapped in)
+    """
+
+    def __init__(self):
+        self.recipe_ids: list[str] = []
+        self.doc_numbers: dict[str, int] = {}
+        self.created_at = array("d")
+        self.doc_length = array("f")
+        self.ingredient_count = array("H")
+        self.live = bytearray()
+        self.live_count = 0
+        self.total_length = 0.0
+        # term -> (doc numbers, weighted term frequencies)
+        self.postings: dict[str, tuple[array, array]] = {}
+        # ingredient token -> doc numbers
+        self.ingredient_postings: dict[str, array] = {}
+        # Latest (created_at, recipe_id) added: the store is read from here on catch-up
+        self.watermark: tuple[float, str] | None = None
+        self._vocabulary: list[str] | None = None
+
+    def __len__(self):
+        return self.live_count
+
+    def add(self, recipe: Recipe) -> bool:
+        """
+        Index a recipe, replacing an earlier version with the same ID; False if this version
+        is already indexed
+        """
+        existing = self.doc_numbers.get(recipe.id)
+        if existing is not None:
+            if self.created_at[existing] == recipe.created_at:
+                return False
+            self._kill(existing)
+
+        frequencies: dict[str, int] = {}
+        for weight, tokens in (
+            (TITLE_WEIGHT, tokenize(recipe.title)),
+            (DESCRIPTION_WEIGHT, tokenize(recipe.description or "")),
+        ):
+            for token in tokens:
+                frequencies[token] = frequencies.get(token, 0) + weight
+        ingredient_tokens = set()
+        for ingredient in recipe.ingredients:
+            ingredient_tokens.update(normalize_name(ingredient.name))
+            for token in tokenize(ingredient.name):
+                frequencies[token] = frequencies.get(token, 0) + INGREDIENT_WEIGHT
+
+        doc = len(self.recipe_ids)
+        self.recipe_ids.append(recipe.id)
+        self.doc_numbers[recipe.id] = doc
+        self.created_at.append(recipe.created_at)
+        length = sum(frequencies.values())
+        self.doc_length.append(length)
+        self.ingredient_count.append(min(len(recipe.ingredients), 65535))
+        self.live.append(1)
+        self.live_count += 1
+        self.total_length += length
+
+        for token, frequency in frequencies.items():
+            entry = self.postings.get(token)
+            if entry is None:
+                entry = self.postings[token] = (array("I"), array("H"))
+                self._vocabulary = None
+            entry[0].append(doc)
+            entry[1].append(min(frequency, 65535))
+        for token in ingredient_tokens:
+            docs = self.ingredient_postings.get(token)
+            if docs is None:
+                docs = self.ingredient_postings[token] = array("I")
+            docs.append(doc)
+
+        if self.watermark is None or (recipe.created_at, recipe.id) > self.watermark:
+            self.watermark = (recipe.created_at, recipe.id)
+        return True
+
+    def add_all(self, recipes: list[Recipe]) -> int:
+        return sum(self.add(recipe) for recipe in recipes)
+
+    def remove(self, recipe_id: str) -> bool:
+        doc = self.doc_numbers.pop(recipe_id, None)
+        if doc is None:
+            return False
+        self._kill(doc)
+        return True
+
+    def _kill(self, doc: int):
+        self.live[doc] = 0
+        self.live_count -= 1
+        self.total_length -= self.doc_length[doc]
+
+    def _bm25(self, tokens: tuple[str, ...]) -> "np.ndarray":
+        import numpy as np
+        scores = np.zeros(len(self.recipe_ids), dtype=np.float32)
+        doc_length = np.frombuffer(self.doc_length, dtype=np.float32)
+        average_length = self.total_length / max(self.live_count, 1)
+        for token in set(tokens):
+            entry = self.postings.get(token)
+            if entry is None:
+                continue
+            docs = np.frombuffer(entry[0], dtype=np.uint32)
+            frequencies = np.frombuffer(entry[1], dtype=np.uint16).astype(np.float32)
+            idf = np.log1p((self.live_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = K1 * (1 - B + B * doc_length[docs] / average_length)
+            # Each doc appears once per posting list, so fancy-index += is safe
+            scores[docs] += idf * frequencies * (K1 + 1) / (frequencies + norm)
+        return scores
+
+    def _ingredient_matches(self, phrases: list[tuple[str, ...]]) -> "np.ndarray":
+        import numpy as np
+        matched = np.zeros(len(self.recipe_ids), dtype=np.int16)
+        for phrase in phrases:
+            docs = None
+            # Rarest token first keeps the intersections small
+            for token in sorted(phrase, key=lambda token: len(self.ingredient_postings.get(token, ()))):
+                postings = self.ingredient_postings.get(token)
+                if postings is None:
+                    docs = None
+                    break
+                postings = np.frombuffer(postings, dtype=np.uint32)
+                docs = postings if docs is None else np.intersect1d(docs, postings, assume_unique=True)
+                if not len(docs):
+                    break
+            if docs is not None:
+                matched[docs] += 1
+        return matched
+
+    def search(self, query: str = "", ingredients: list[tuple[str, ...]] = (), mode: Literal["all", "any"] = "all", limit: int = 20) -> list[SearchHit]:
+        """
+        Rank recipes by BM25 for the text query, restricted to recipes with all (or any)
+        of the ingredient phrases. Ranking: matched ingredients (in "any" mode), then BM25
+        score, then fewest ingredients beyond the matched ones.
+        """
+        import numpy as np
+        tokens = tokenize(query)
+        if not tokens and not ingredients:
+            return []
+        live = np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+        scores = self._bm25(tokens) if tokens else None
+        if ingredients:
+            matched = self._ingredient_matches(ingredients)
+            candidates = live & (matched == len(ingredients) if mode == "all" else matched > 0)
+            if scores is not None:
+                candidates &= scores > 0
+        else:
+            matched = np.zeros(len(self.recipe_ids), dtype=np.int16)
+            candidates = live & (scores > 0)
+
+        docs = np.flatnonzero(candidates)
+        if not len(docs):
+            return []
+        doc_scores = scores[docs] if scores is not None else np.zeros(len(docs), dtype=np.float32)
+        doc_matched = matched[docs]
+        missing = np.frombuffer(self.ingredient_count, dtype=np.uint16)[docs].astype(np.int32) - doc_matched
+        # lexsort sorts by the last key first
+        order = np.lexsort((missing, -doc_scores, -doc_matched))[:limit]
+        return [
+            SearchHit(recipe_id=self.recipe_ids[docs[i]], score=round(float(doc_scores[i]), 4), matched_ingredients=int(doc_matched[i]), missing_ingredients=max(int(missing[i]), 0))
+            for i in order
+        ]
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[str]:
+        """
+        Completions of the last word of `prefix`, most frequent terms first
+        ("honey gar" -> ["honey garlic", ...])
+        """
+        head, _, last = prefix.lower().rpartition(" ")
+        # The last word is normalized like indexed terms (singular, punctuation dropped) but
+        # keeps stopwords: "on" is how "onion" starts
+        words = normalize_name(last, ())
+        if not words:
+            return []
+        head, last = " ".join((*head.split(), *words[:-1])), words[-1]
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        completions = []
+        for i in range(bisect_left(vocabulary, last), len(vocabulary)):
+            term = vocabulary[i]
+            if not term.startswith(last):
+                break
+            completions.append((len(self.postings[term][0]), term))
+        head = f"{head} " if head else ""
+        return [f"{head}{term}" for _, term in heapq.nlargest(limit, completions)]
+
+    def save(self, path: str):
+        """
+        Write a compacted snapshot (dead docs dropped, doc numbers reassigned)
+        """
+        import numpy as np
+        live_docs = np.flatnonzero(np.frombuffer(self.live, dtype=np.uint8))
+        renumber = np.full(len(self.recipe_ids), -1, dtype=np.int64)
+        renumber[live_docs] = np.arange(len(live_docs))
+
+        def compact(postings: dict[str, array], frequencies: dict[str, array] | None):
+            terms, offsets, doc_parts, frequency_parts = [], [0], [], []
+            for term, docs in postings.items():
+                docs = np.frombuffer(docs, dtype=np.uint32)
+                keep = renumber[docs] >= 0
+                if not keep.any():
+                    continue
+                terms.append(term)
+                doc_parts.append(renumber[docs[keep]].astype(np.uint32))
+                if frequencies is not None:
+                    frequency_parts.append(np.frombuffer(frequencies[term], dtype=np.uint16)[keep])
+                offsets.append(offsets[-1] + int(keep.sum()))
+            concatenated = np.concatenate(doc_parts) if doc_parts else np.zeros(0, dtype=np.uint32)
+            concatenated_frequencies = np.concatenate(frequency_parts) if frequency_parts else np.zeros(0, dtype=np.uint16)
+            return "\n".join(terms).encode(), np.array(offsets, dtype=np.int64), concatenated, concatenated_frequencies
+
+        text_terms, text_offsets, text_docs, text_frequencies = compact(
+            {term: entry[0] for term, entry in self.postings.items()}, {term: entry[1] for term, entry in self.postings.items()}
+        )
+        ingredient_terms, ingredient_offsets, ingredient_docs, _ = compact(self.ingredient_postings, None)
+        watermark = self.watermark or (0.0, "")
+
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            version=np.array([SNAPSHOT_VERSION]),
+            recipe_ids=np.frombuffer("\n".join(self.recipe_ids[doc] for doc in live_docs).encode(), dtype=np.uint8),
+            created_at=np.frombuffer(self.created_at, dtype=np.float64)[live_docs],
+            doc_length=np.frombuffer(self.doc_length, dtype=np.float32)[live_docs],
+            ingredient_count=np.frombuffer(self.ingredient_count, dtype=np.uint16)[live_docs],
+            text_terms=np.frombuffer(text_terms, dtype=np.uint8),
+            text_offsets=text_offsets,
+            text_docs=text_docs,
+            text_frequencies=text_frequencies,
+            ingredient_terms=np.frombuffer(ingredient_terms, dtype=np.uint8),
+            ingredient_offsets=ingredient_offsets,
+            ingredient_docs=ingredient_docs,
+            watermark_created_at=np.array([watermark[0]]),
+            watermark_id=np.frombuffer(watermark[1].encode(), dtype=np.uint8),
+        )
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(buffer.getbuffer())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        """
+        Read a snapshot written by `save` (raises ValueError if it is from another version)
+        """
+        import numpy as np
+        index = cls()
+        with np.load(path) as snapshot:
+            if int(snapshot["version"][0]) != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported search index snapshot version in {path}")
+
+            def split(name: str) -> list[str]:
+                data = snapshot[name].tobytes().decode()
+                return data.split("\n") if data else []
+
+            index.recipe_ids = split("recipe_ids")
+            index.doc_numbers = {recipe_id: doc for doc, recipe_id in enumerate(index.recipe_ids)}
+            index.created_at.frombytes(snapshot["created_at"].tobytes())
+            index.doc_length.frombytes(snapshot["doc_length"].tobytes())
+            index.ingredient_count.frombytes(snapshot["ingredient_count"].tobytes())
+            index.live = bytearray(b"\x01" * len(index.recipe_ids))
+            index.live_count = len(index.recipe_ids)
+            index.total_length = float(np.frombuffer(index.doc_length, dtype=np.float32).sum())
+
+            offsets = snapshot["text_offsets"]
+            docs, frequencies = snapshot["text_docs"].tobytes(), snapshot["text_frequencies"].tobytes()
+            for i, term in enumerate(split("text_terms")):
+                start, end = int(offsets[i]), int(offsets[i + 1])
+                index.postings[term] = (array("I", docs[start * 4:end * 4]), array("H", frequencies[start * 2:end * 2]))
+            offsets = snapshot["ingredient_offsets"]
+            docs = snapshot["ingredient_docs"].tobytes()
+            for i, term in enumerate(split("ingredient_terms")):
+                index.ingredient_postings[term] = array("I", docs[int(offsets[i]) * 4:int(offsets[i + 1]) * 4])
+
+            watermark_id = snapshot["watermark_id"].tobytes().decode()
+            index.watermark = (float(snapshot["watermark_created_at"][0]), watermark_id) if watermark_id else None
+        return index
+
+class RecipeSearch:
+    """
+    The search index kept in sync with the catalog store
+    """
+
+    def __init__(self, snapshot_path: str):
+        self.snapshot_path = snapshot_path
+        self.index: SearchIndex | None = None
+        self._loading: asyncio.Task | None = None
+
+    def _build(self) -> SearchIndex:
+        index = None
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                index = SearchIndex.load(self.snapshot_path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Ignoring search index snapshot %s: %s", self.snapshot_path, e)
+        return index or SearchIndex()
+
+    async def _catch_up(self, index: SearchIndex, in_thread: bool) -> int:
+        store = get_recipe_catalog().store
+        # Re-read the last SEARCH_CATCH_UP_GRACE_SECONDS before the watermark: a recipe
+        # committed late by another instance can carry an earlier created_at than one
+        # already indexed. Recipes read again are skipped by SearchIndex.add.
+        after = (index.watermark[0] - settings.SEARCH_CATCH_UP_GRACE_SECONDS, "") if index.watermark is not None else None
+        added = 0
+        while True:
+            recipes = await store.scan_recipes(after, SCAN_BATCH)
+            if in_thread:
+                added += await asyncio.to_thread(index.add_all, recipes)
+            else:
+                added += index.add_all(recipes)
+            if len(recipes) < SCAN_BATCH:
+                return added
+            after = (recipes[-1].created_at, recipes[-1].id)
+
+    async def load(self) -> SearchIndex:
+        """
+        Load the snapshot and read newer recipes from the store (once; concurrent callers
+        wait for the same load)
+        """
+        if self.index is not None:
+            return self.index
+        if self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+        try:
+            return await asyncio.shield(self._loading)
+        except Exception:
+            # Retried by the next caller
+            self._loading = None
+            raise
+
+    async def _load(self) -> SearchIndex:
+        start = time.perf_counter()
+        # Built off the event loop, then swapped in
+        index = await asyncio.to_thread(self._build)
+        snapshot_docs = len(index)
+        added = await self._catch_up(index, in_thread=True)
+        self.index = index
+        # Recipes created while loading
+        added += await self._catch_up(index, in_thread=False)
+        logger.info("Search index loaded in %.0f ms (%d recipes from snapshot, %d from the store)", (time.perf_counter() - start) * 1000, snapshot_docs, added)
+        return index
+
+    def add(self, recipes: list[Recipe]):
+        """
+        Index newly created recipes (before the index is loaded, the load picks them up)
+        """
+        if self.index is not None:
+            self.index.add_all(recipes)
+
+    async def refresh(self) -> int:
+        """
+        Index recipes created since the last one seen (e.g. by other instances)
+        """
+        if self.index is None:
+            return 0
+        return await self._catch_up(self.index, in_thread=False)
+
+    async def search(self, query: str = "", ingredients: str = "", mode: Literal["all", "any"] = "all", limit: int = 20) -> list[SearchHit]:
+        return (await self.load()).search(query, parse_ingredients(ingredients), mode, limit)
+
+    async def suggest(self, prefix: str, limit: int = 10) -> list[str]:
+        return (await self.load()).suggest(prefix, limit)
+
+    def save(self):
+        """
+        Snapshot the index, if it was loaded
+        """
+        if self.index is not None and self.snapshot_path:
+            start = time.perf_counter()
+            self.index.save(self.snapshot_path)
+            logger.info("Search index snapshot (%d recipes) saved in %.0f ms", len(self.index), (time.perf_counter() - start) * 1000)
+
+_recipe_search: RecipeSearch | None = None
+
+def get_recipe_search() -> RecipeSearch:
+    """
+    Get (or lazily create) the shared recipe search configured by SEARCH_*
+    """
+    global _recipe_search
+    if _recipe_search is None:
+        _recipe_search = RecipeSearch(settings.SEARCH_SNAPSHOT_PATH)
+        get_recipe_catalog().listeners.append(_recipe_search.add)
+    return _recipe_search
+
+def save_search_index():
+    """
+    Snapshot the search index so the next start reloads it instead of rebuilding it
+    (called from the app lifespan on shutdown)
+    """
+    if _recipe_search is not None:
+        _recipe_search.save()
+
+async def refresh_search_index_periodically():
+    """
+    Catch the index up with the store every SEARCH_REFRESH_SECONDS (run from the app lifespan)
+    """
+    while True:
+        await asyncio.sleep(settings.SEARCH_REFRESH_SECONDS)
+        try:
+            if _recipe_search is not None:
+                await _recipe_search.refresh()
+        except Exception:
+            logger.exception("Search index refresh failed")
@@ -0,0 +1,91 @@
+"""
+Cached Firebase ID-token verification.
+
+`auth.verify_id_token` is synchronous: it looks up Google's signing certificates (an HTTP
+fetch whenever its cache-control entry expires), parses them and checks the RSA
+signature on every call. Verified claims are cached here by token hash until shortly
+before the token's `exp`, so repeat requests with the same token skip all of that.
+Cache misses run the verification on a thread, off the event loop, and the certificate
+fetch is pre-warmed and refreshed in the background from the app lifespan.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from firebase_admin import auth
+from app.config import get_settings
+from app.services.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Verified tokens are dropped this long before their `exp` to absorb clock skew
+EXPIRY_MARGIN_SECONDS = 30
+
+_token_cache: LRUCache | None = None
+
+def get_token_cache() -> LRUCache:
+    """
+    Get (or lazily create) the verified-token cache configured by AUTH_TOKEN_CACHE_*
+    """
+    global _token_cache
+    if _token_cache is None:
+        _token_cache = LRUCache(settings.AUTH_TOKEN_CACHE_MAX_ENTRIES, settings.AUTH_TOKEN_CACHE_TTL_SECONDS)
+    return _token_cache
+
+def _token_key(token: str) -> str:
+    # Raw tokens are bearer credentials, so only their hash is kept in memory
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def verify_id_token(token: str) -> dict:
+    """
+    Verify a Firebase ID token, serving repeat tokens from the cache.
+    Raises auth.InvalidIdTokenError (and its subclasses) like auth.verify_id_token.
+    """
+    cache = get_token_cache()
+    key = _token_key(token)
+
+    claims = cache.get(key)
+    if claims is not None:
+        return claims
+
+    # Signature check (and any certificate fetch) runs on a thread, not the event loop
+    claims = await asyncio.to_thread(auth.verify_id_token, token)
+
+    ttl_seconds = min(cache.ttl_seconds, claims["exp"] - time.time() - EXPIRY_MARGIN_SECONDS)
+    if ttl_seconds > 0:
+        cache.set(key, claims, ttl_seconds=ttl_seconds)
+    return claims
+
+def refresh_certificates() -> bool:
+    """
+    Fetch Google's ID-token signing certificates through the Firebase verifier's own
+    cache-control session, so verification doesn't pay for the fetch on a request.
+    That session is internal to firebase_admin (pinned to 7.x); returns False, without
+    fetching, on a version that doesn't have it, and verification then fetches on demand.
+    """
+    try:
+        verifier = auth._get_client(None)._token_verifier
+        request, cert_url = verifier.request, verifier.id_token_verifier.cert_url
+    except AttributeError:
+        return False
+    response = request(cert_url)
+    if response.status != 200:
+        raise ValueError(f"HTTP {response.status} error while fetching the ID token certificates")
+    return True
+
+async def refresh_certificates_periodically():
+    """
+    Pre-warm the signing certificates, then refresh them every AUTH_CERT_REFRESH_SECONDS
+    (started as a background task from the app lifespan)
+    """
+    while True:
+        try:
+            if not await asyncio.to_thread(refresh_certificates):
+                logger.warning("ID token certificate refresh isn't supported by this firebase_admin version; certificates are fetched on demand")
+                return
+        except Exception:
+            logger.exception("Failed to refresh ID token certificates")
+        await asyncio.sleep(settings.AUTH_CERT_REFRESH_SECONDS)
@@ -0,0 +1,70 @@
+"""
+Source URL normalization and recipe IDs (sha256 of the normalized URL, see BUILD_PLAN 2.1).
+"""
+
+import hashlib
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "si", "spm",
+}
+TRACKING_PREFIXES = ("utm_", "hsa_", "pk_")
+
+YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "youtube-nocookie.com", "youtu.be"}
+
+_YOUTUBE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{11}$")
+_YOUTUBE_PATH_PATTERN = re.compile(r"^/(?:shorts|embed|live|v)/([A-Za-z0-9_-]{11})")
+
+def youtube_video_id(url: str) -> str | None:
+    """
+    Get the video ID from any YouTube URL variant (watch, youtu.be, shorts, embed, live), or None
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if host not in YOUTUBE_HOSTS:
+        return None
+
+    if host == "youtu.be":
+        candidate = parts.path.lstrip("/").split("/")[0]
+    else:
+        match = _YOUTUBE_PATH_PATTERN.match(parts.path)
+        candidate = match.group(1) if match else dict(parse_qsl(parts.query)).get("v", "")
+
+    return candidate if _YOUTUBE_ID_PATTERN.match(candidate) else None
+
+def normalize_url(url: str) -> str:
+    """
+    Normalize a recipe URL so that variants of the same page share one key:
+    - YouTube variants collapse to https://www.youtube.com/watch?v=<id>
+    - scheme/host are lowercased, "www." and default ports are dropped
+    - tracking params and fragments are removed and the remaining params sorted
+    """
+    video_id = youtube_video_id(url)
+    if video_id:
+        return f"https://www.youtube.com/watch?v={video_id}"
+
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    )
+
+    path = re.sub(r"/{2,}", "/", parts.path)
+    if path != "/":
+        path = path.rstrip("/")
+
+    return urlunsplit(("https", host, path or "/", urlencode(query), ""))
+
+def recipe_id(url: str) -> str:
+    """
+    Recipe ID used for deduplication: sha256 of the normalized source URL (first 32 hex chars)
+    """
+    return hashlib.sha256(normalize_url(url).encode()).hexdigest()[:32]
@@ -0,0 +1,62 @@
+"""
+Background warm-up of the workflow dependencies once the server is listening.
+
+The extractor and LLM dependencies (trafilatura with the numpy and language-detection
+stack it loads, yt-dlp, openai, msgpack for the extraction cache) are imported where they
+are first used instead of when the app is imported, so a cold start only pays for FastAPI
+and the routes before /health answers. `prewarm` then imports them on a thread, creates
+the shared clients and loads the nutrition table, so the first workflow request doesn't
+pay for them either; the recipe search index is loaded last. A request that arrives
+while the warm-up is still running imports what it needs itself (an import already in
+progress on the warm-up thread is waited for, not repeated).
+
+See benchmarks/cold_start.py for the import time and first-request latency.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+from app.services.agents.nutrition import get_nutrition_table
+from app.services.clients import init_clients
+from app.services.search import get_recipe_search
+
+logger = logging.getLogger(__name__)
+
+# Modules the workflow imports on first use, in the order a first request needs them
+PREWARM_MODULES = ("msgpack", "trafilatura", "trafilatura.downloads", "numpy", "httpx", "openai", "yt_dlp")
+
+def import_modules(names: tuple[str, ...] = PREWARM_MODULES) -> dict[str, float]:
+    """
+    Import the given modules, returning the milliseconds each one took (0 if already loaded)
+    """
+    timings_ms = {}
+    for name in names:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            # Surfaces again, with its traceback, in the request that needs the module
+            logger.warning("Could not pre-import %s: %s", name, e)
+        timings_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings_ms
+
+async def prewarm():
+    """
+    Import the workflow dependencies, create the shared clients, load the nutrition
+    table and the search index (started as a background task from the app lifespan)
+    """
+    start = time.perf_counter()
+    try:
+        timings_ms = await asyncio.to_thread(import_modules)
+        init_clients()
+        await asyncio.to_thread(get_nutrition_table)
+    except Exception:
+        logger.exception("Warm-up failed; dependencies will load on first use")
+        return
+    breakdown = ", ".join(f"{name}={milliseconds:.0f}ms" for name, milliseconds in timings_ms.items())
+    logger.info("Warm-up done in %.0f ms (%s)", (time.perf_counter() - start) * 1000, breakdown)
+    try:
+        await get_recipe_search().load()
+    except Exception:
+        logger.exception("Search index load failed; it will load on the first search")
@@ -0,0 +1,137 @@
+"""
+Benchmark: auth overhead per request, uncached `auth.verify_id_token` vs the cached
+verifier in app/services/tokens.py.
+
+A locally generated RSA key stands in for Firebase: its certificate is served by a local
+HTTP server (with the same Cache-Control handling as Google's endpoint) and the Firebase
+app is initialized with a service account built from the same key, so the real
+firebase_admin verification path runs end to end without network access.
+
+Usage (from backend/): python -m benchmarks.auth
+"""
+
+import asyncio
+import datetime
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+import firebase_admin
+from firebase_admin import _token_gen, auth, credentials
+from google.auth import crypt, jwt
+from app.services.tokens import get_token_cache, refresh_certificates, verify_id_token
+
+PROJECT_ID = "meal-prepper-bench"
+KEY_ID = "bench-key"
+REQUESTS = 2000
+
+def _generate_key() -> tuple[str, str]:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken.bench.local")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number()).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+    return private_pem, certificate.public_bytes(serialization.Encoding.PEM).decode()
+
+def _serve_certificates(certificate_pem: str) -> str:
+    body = json.dumps({KEY_ID: certificate_pem}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Cache-Control", "public, max-age=3600")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}/certs"
+
+def _id_token(signer: crypt.RSASigner, uid: str) -> str:
+    now = int(time.time())
+    payload = {
+        "iss": f"https://securetoken.google.com/{PROJECT_ID}", "aud": PROJECT_ID, "sub": uid,
+        "iat": now, "exp": now + 3600, "auth_time": now,
+    }
+    return jwt.encode(signer, payload, header={"kid": KEY_ID}).decode()
+
+async def _uncached_dependency(token: str) -> dict:
+    # What app/dependencies.py did before: verify synchronously inside the async dependency
+    return auth.verify_id_token(token)
+
+async def _measure(verify, token: str, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        await verify(token)
+    return (time.perf_counter() - start) * 1e6 / count
+
+async def _loop_lag(verify, tokens: list[str]) -> float:
+    """
+    Longest event-loop stall while verifying a batch of first-seen tokens concurrently
+    """
+    lag, running = 0.0, True
+
+    async def ticker():
+        nonlocal lag
+        while running:
+            before = time.perf_counter()
+            await asyncio.sleep(0)
+            lag = max(lag, time.perf_counter() - before)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(verify(token) for token in tokens))
+    running = False
+    await task
+    return lag * 1000
+
+async def main():
+    private_pem, certificate_pem = _generate_key()
+    _token_gen.ID_TOKEN_CERT_URI = _serve_certificates(certificate_pem)
+    firebase_admin.initialize_app(
+        credentials.Certificate({
+            "type": "service_account", "project_id": PROJECT_ID, "private_key_id": KEY_ID, "private_key": private_pem,
+            "client_email": f"bench@{PROJECT_ID}.iam.gserviceaccount.com", "token_uri": "https://oauth2.googleapis.com/token",
+        }),
+        {"projectId": PROJECT_ID},
+    )
+    signer = crypt.RSASigner.from_string(private_pem, key_id=KEY_ID)
+    token = _id_token(signer, "user-1")
+
+    # Pre-warm the certificates as the lifespan does
+    start = time.perf_counter()
+    refresh_certificates()
+    print(f"certificate pre-warm: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    uncached_us = await _measure(_uncached_dependency, token, REQUESTS)
+    get_token_cache()._entries.clear()
+    start = time.perf_counter()
+    await verify_id_token(token)
+    miss_us = (time.perf_counter() - start) * 1e6
+    cached_us = await _measure(verify_id_token, token, REQUESTS)
+
+    print(f"auth.verify_id_token per request (before): {uncached_us:8.1f} µs")
+    print(f"cached verifier, first use of a token:     {miss_us:8.1f} µs")
+    print(f"cached verifier, repeat token (after):     {cached_us:8.1f} µs  ({uncached_us / cached_us:.0f}x faster)")
+
+    fresh = [_id_token(signer, f"user-{i}") for i in range(50)]
+    # Start the default thread pool's workers first, as in a server that has been running
+    await asyncio.gather(*(asyncio.to_thread(time.sleep, 0.01) for _ in range(50)))
+    print(f"\nlongest event-loop stall verifying 50 new tokens at once:")
+    print(f"  before: {await _loop_lag(_uncached_dependency, fresh):6.1f} ms")
+    print(f"  after:  {await _loop_lag(verify_id_token, fresh):6.1f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark: a 20-URL meal-plan import through run_batch_workflow vs one run_workflow
+call per URL in sequence (what clients did with /api/test/workflow).
+
+Downloads are replaced with blocking sleeps of varying length and the LLM call with an
+async sleep, so the run needs no network. The plan spreads over 6 hosts, includes
+duplicate URLs (tracking parameters, www. variants) and one page that fails to download.
+
+Usage (from backend/): python -m benchmarks.batch
+"""
+
+import asyncio
+import os
+import time
+
+# Keep the run self-contained: no persistent extraction cache on disk, and a placeholder
+# key so the shared OpenAI client can be created (the fake LLM call never uses it)
+os.environ.setdefault("EXTRACTION_CACHE_BACKEND", "memory")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from app.services.agents import extraction
+from app.services.agents.models import Ingredient, OriginalRecipe, UserAdjustments, UserRequest
+from app.services.agents.workflow import run_batch_workflow, run_workflow
+from app.services.cache import get_extraction_cache
+from app.services.urls import normalize_url
+
+HOSTS = ["allrecipes.com", "budgetbytes.com", "seriouseats.com", "bonappetit.com", "food52.com", "thekitchn.com"]
+LLM_SECONDS = 1.0
+
+PLAN = [f"https://www.{HOSTS[i % len(HOSTS)]}/recipe/{i}" for i in range(18)]
+PLAN += [PLAN[0] + "?utm_source=pinterest", PLAN[1].replace("www.", ""), "https://www.food52.com/recipe/broken"]
+
+def fake_fetch_web_page(url: str) -> str:
+    if url.endswith("broken"):
+        time.sleep(0.2)
+        raise ValueError(f"HTTP 404 error while downloading the web page from {url}")
+    time.sleep(0.2 + 0.05 * (len(url) % 7))
+    return "<html><body><p>recipe text</p></body></html>"
+
+def fake_parse_web_page(html: str) -> tuple[None, dict]:
+    return None, {"content": "recipe text", "strategy": "trafilatura", "timings_ms": {}}
+
+async def fake_extract_recipe_from_web_page(content, openai_client) -> OriginalRecipe:
+    await asyncio.sleep(LLM_SECONDS)
+    return OriginalRecipe(
+        title="Chicken and Rice", servings=4,
+        ingredients=[Ingredient(name="chicken thighs", quantity=2, unit="lbs"), Ingredient(name="white rice", quantity=1.5, unit="cups")],
+        instructions=["Sear the chicken.", "Cook the rice."],
+    )
+
+async def main():
+    extraction.fetch_web_page = fake_fetch_web_page
+    extraction.parse_web_page = fake_parse_web_page
+    extraction.extract_recipe_from_web_page = fake_extract_recipe_from_web_page
+
+    adjustments = UserAdjustments(target_servings=5, target_calories=550, target_protein=45)
+    requests = [UserRequest(recipe_url=url, user_adjustments=adjustments) for url in PLAN]
+
+    start = time.perf_counter()
+    for request in requests:
+        try:
+            await run_workflow(request)
+        except ValueError:
+            pass
+    sequential = time.perf_counter() - start
+
+    get_extraction_cache().memory._entries.clear()
+    start = time.perf_counter()
+    results = await run_batch_workflow(requests)
+    batch = time.perf_counter() - start
+
+    succeeded = sum(result["status"] == "success" for result in results)
+    print(f"{len(requests)} requests, {len({normalize_url(url) for url in PLAN})} distinct URLs over {len(HOSTS)} hosts")
+    print(f"slowest single item: ~{0.2 + 0.05 * 6 + LLM_SECONDS:.2f} s")
+    print(f"sequential run_workflow: {sequential:.2f} s")
+    print(f"run_batch_workflow:      {batch:.2f} s ({succeeded} succeeded, {len(results) - succeeded} failed)")
+    for result in results:
+        if result["status"] == "error":
+            print(f"  error for {result['recipe_url']}: {result['message']}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
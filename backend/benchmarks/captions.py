@@ -0,0 +1,158 @@
+"""
+Benchmark: streaming caption parser (app/services/agents/captions.py) against the previous
+whole-document parsing, on multi-hour synthetic auto-caption files.
+
+The previous code decoded the full response (response.text), then for json3 ran json.loads
+on the whole document and for VTT/SRT split it into lines and cleaned each one. The
+streaming parser is fed 64 KiB byte chunks, as iter_content delivers them. srv3 had no
+parser before, so only the streaming figures are shown for it.
+
+Both are timed through preprocess_transcript, as in scrape_youtube_video. Reports, per
+format:
+- CPU throughput on an in-memory body (best of 5)
+- peak Python heap while parsing (the downloaded bytes themselves are excluded)
+- time to transcript when the body arrives over a throttled stream (--mib-per-second):
+  the previous code waits for the whole body, the streaming parser works as chunks arrive
+- whether both produce the same transcript
+
+Usage (from backend/): python -m benchmarks.captions [--hours 3]
+"""
+
+import argparse
+import json
+import queue
+import threading
+import time
+import tracemalloc
+from xml.sax.saxutils import escape
+from app.services.agents.captions import iter_caption_segments
+from app.services.agents.transcript import caption_lines, dedupe_rolling_lines, preprocess_transcript
+from app.services.agents.youtube import CAPTION_CHUNK_BYTES
+from benchmarks.transcript import SPOKEN, build_auto_caption_vtt
+
+REPEAT = 5
+
+def build_auto_caption_json3(minutes: int) -> str:
+    """
+    json3 as YouTube serves auto-captions: a window event, one event per caption line with
+    word segments, and newline append events
+    """
+    events = [{"tStartMs": 0, "dDurationMs": minutes * 60_000, "id": 1, "wpWinPosId": 1, "wsWinStyleId": 1}]
+    t, i = 0, 0
+    while t < minutes * 60_000:
+        words = SPOKEN[i % len(SPOKEN)].split()
+        segs = [{"utf8": words[0], "acAsrConf": 0}] + [{"utf8": f" {word}", "tOffsetMs": 300 * n, "acAsrConf": 0} for n, word in enumerate(words[1:], 1)]
+        events.append({"tStartMs": t, "dDurationMs": 3010, "wWinId": 1, "segs": segs})
+        events.append({"tStartMs": t + 3000, "dDurationMs": 10, "wWinId": 1, "aAppend": 1, "segs": [{"utf8": "\n"}]})
+        t, i = t + 3010, i + 1
+    return json.dumps({"wireMagic": "pb3", "pens": [{}], "wsWinStyles": [{}, {"mhModeHint": 2, "juJustifCode": 0}], "wpWinPositions": [{}], "events": events})
+
+def build_auto_caption_srv3(minutes: int) -> str:
+    """
+    srv3 (timedtext format 3) with one <p> per caption line and word <s> segments
+    """
+    parts = ['<?xml version="1.0" encoding="utf-8" ?><timedtext format="3">\n<head><ws id="0"/><wp id="0"/></head>\n<body>\n<w t="0" id="1" wp="0" ws="0"/>\n']
+    t, i = 0, 0
+    while t < minutes * 60_000:
+        words = SPOKEN[i % len(SPOKEN)].split()
+        spans = f'<s ac="0">{escape(words[0])}</s>' + "".join(f'<s t="{300 * n}" ac="0"> {escape(word)}</s>' for n, word in enumerate(words[1:], 1))
+        parts.append(f'<p t="{t}" d="3010" w="1">{spans}</p>\n<p t="{t + 3000}" d="10" w="1" a="1">\n</p>\n')
+        t, i = t + 3010, i + 1
+    parts.append("</body>\n</timedtext>\n")
+    return "".join(parts)
+
+def previous_parse(body: bytes) -> list[str]:
+    """
+    The caption handling before the streaming parser
+    """
+    raw_content = body.decode("utf-8")
+    if raw_content.strip().startswith('{'):
+        lines = []
+        for event in json.loads(raw_content).get('events', []):
+            text = ''.join(seg.get('utf8', '') for seg in event.get('segs', [])).strip()
+            if text:
+                lines.append(text)
+        return dedupe_rolling_lines(lines)
+    return dedupe_rolling_lines(caption_lines(raw_content))
+
+def _chunks(body: bytes):
+    return (body[i:i + CAPTION_CHUNK_BYTES] for i in range(0, len(body), CAPTION_CHUNK_BYTES))
+
+def streaming_parse(body: bytes) -> list[str]:
+    return list(iter_caption_segments(_chunks(body)))
+
+def throttled(body: bytes, mib_per_second: float):
+    """
+    Chunks of the body as a download at the given rate delivers them (a background thread
+    stands in for the socket, so parsing can overlap the transfer)
+    """
+    chunks = queue.Queue()
+
+    def download():
+        for chunk in _chunks(body):
+            time.sleep(len(chunk) / (mib_per_second * 2**20))
+            chunks.put(chunk)
+        chunks.put(None)
+
+    threading.Thread(target=download, daemon=True).start()
+    while (chunk := chunks.get()) is not None:
+        yield chunk
+
+def time_over_stream(name: str, body: bytes, mib_per_second: float) -> float:
+    start = time.perf_counter()
+    if name == "previous":
+        preprocess_transcript(previous_parse(b"".join(throttled(body, mib_per_second))))
+    else:
+        preprocess_transcript(list(iter_caption_segments(throttled(body, mib_per_second))))
+    return time.perf_counter() - start
+
+def measure(parse, body: bytes) -> tuple[float, float, list[str], str]:
+    """
+    Best-of-REPEAT seconds to a transcript, and peak Python heap (MiB) of one traced run
+    """
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        lines = parse(body)
+        preprocess_transcript(lines)
+        best = min(best, time.perf_counter() - start)
+        del lines
+    tracemalloc.start()
+    lines = parse(body)
+    transcript = preprocess_transcript(lines)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 2**20, lines, transcript
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=3)
+    parser.add_argument("--mib-per-second", type=float, default=10)
+    args = parser.parse_args()
+    minutes = int(args.hours * 60)
+
+    files = {
+        "vtt": build_auto_caption_vtt(minutes).encode(),
+        "json3": build_auto_caption_json3(minutes).encode(),
+        "srv3": build_auto_caption_srv3(minutes).encode(),
+    }
+
+    print(f"{args.hours:g}-hour auto-caption files, streaming parser fed {CAPTION_CHUNK_BYTES // 1024} KiB chunks,"
+          f" throttled download at {args.mib_per_second:g} MiB/s\n")
+    print(f"{'format':<6} {'size':>9}  {'parser':<9} {'CPU MiB/s':>9} {'peak heap':>10} {'streamed':>9}  output")
+    for name, body in files.items():
+        size_mib = len(body) / 2**20
+        transcripts = {}
+        for parser_name, parse in (("previous", previous_parse), ("streaming", streaming_parse)):
+            if name == "srv3" and parser_name == "previous":
+                print(f"{name:<6} {size_mib:>5.1f} MiB  {parser_name:<9} {'(no srv3 support)':>30}")
+                continue
+            seconds, peak_mib, lines, transcripts[parser_name] = measure(parse, body)
+            streamed_ms = time_over_stream(parser_name, body, args.mib_per_second) * 1000
+            print(f"{name:<6} {size_mib:>5.1f} MiB  {parser_name:<9} {size_mib / seconds:>9.1f} {peak_mib:>6.1f} MiB {streamed_ms:>6.0f} ms"
+                  f"  {len(lines)} lines")
+        if len(transcripts) == 2:
+            print(f"{'':<18} same transcript: {'yes' if transcripts['previous'] == transcripts['streaming'] else 'NO'}")
+
+if __name__ == "__main__":
+    main()
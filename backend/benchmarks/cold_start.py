@@ -0,0 +1,181 @@
+"""
+Benchmark: cold start of the API, as a Cloud Run instance pays for it.
+
+Three startups are compared, each in fresh interpreters:
+- "eager": the extractor and LLM dependencies (trafilatura, numpy, httpx, openai, yt-dlp)
+  imported with the app, as before they were made lazy, and no warm-up
+- "lazy": dependencies imported on first use, no warm-up (PREWARM_ON_STARTUP=false)
+- "prewarm": dependencies imported on first use, warm-up started after startup (the default)
+
+Reports, per startup:
+- import time of app.main (median of --runs fresh interpreters)
+- time from process start to the first 200 from /health, with uvicorn serving the app
+- latency of the first and second workflow requests, sent --idle-seconds after /health
+  answers (0 sends the first request immediately, before any warm-up can finish)
+
+The workflow requests fetch recipe pages with embedded JSON-LD from a local HTTPS stand-in
+(with a throwaway self-signed certificate the server process is told to trust), so they
+run download, parse, structured-data extraction, nutrition lookup and conversion with no
+LLM call and no network access.
+
+Usage (from backend/): python -m benchmarks.cold_start [--runs 5] [--idle-seconds 2]
+"""
+
+import argparse
+import datetime
+import ipaddress
+import os
+import socket
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from app.services.warmup import PREWARM_MODULES
+
+FIXTURE = Path(__file__).parent / "fixtures" / "web" / "jsonld_graph.html"
+BACKEND = Path(__file__).parent.parent
+
+# Imports run before app.main to reproduce the eager startup
+EAGER_IMPORTS = "import " + ", ".join(PREWARM_MODULES) + "; "
+
+STARTUPS = {
+    "eager": (EAGER_IMPORTS, "false"),
+    "lazy": ("", "false"),
+    "prewarm": ("", "true"),
+}
+
+class RecipePages(BaseHTTPRequestHandler):
+    """
+    Serves the JSON-LD recipe fixture at every path
+    """
+    protocol_version = "HTTP/1.1"
+    body = FIXTURE.read_bytes()
+    cert_path = ""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+def self_signed_certificate(directory: str) -> tuple[str, str]:
+    """
+    Certificate and key files for 127.0.0.1, valid for a day
+    """
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(certificate.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return cert_path, key_path
+
+def environment(prewarm: str) -> dict:
+    # Self-contained runs: no on-disk caches or job store, a placeholder OpenAI key so the
+    # shared client is created (no LLM call is made), metrics on as in production
+    return {
+        **os.environ,
+        "PREWARM_ON_STARTUP": prewarm,
+        "EXTRACTION_CACHE_BACKEND": "memory",
+        "JOB_STORE_BACKEND": "memory",
+        "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "sk-benchmark"),
+        "FIREBASE_SERVICE_ACCOUNT": "",
+        "REQUESTS_CA_BUNDLE": RecipePages.cert_path,
+    }
+
+def import_ms(preamble: str, prewarm: str) -> float:
+    code = f"import time; start = time.perf_counter(); {preamble}import app.main; print((time.perf_counter() - start) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, env=environment(prewarm), capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def serve(preamble: str, prewarm: str, pages_url: str, idle_seconds: float) -> tuple[float, float, float]:
+    """
+    Seconds from process start to /health answering, and to the first and second workflow
+    responses
+    """
+    port = free_port()
+    code = f"{preamble}import uvicorn; uvicorn.run('app.main:app', host='127.0.0.1', port={port}, log_level='warning')"
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", code], cwd=BACKEND, env=environment(prewarm))
+    try:
+        base = f"http://127.0.0.1:{port}"
+        while True:
+            try:
+                if requests.get(f"{base}/health", timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                time.sleep(0.005)
+        health = time.perf_counter() - start
+        time.sleep(idle_seconds)
+
+        latencies = []
+        for n in (1, 2):
+            params = {"recipe_url": f"{pages_url}/recipe/{n}", "target_servings": 5, "target_calories": 550, "target_protein": 45}
+            request_start = time.perf_counter()
+            response = requests.post(f"{base}/api/test/workflow", params=params, timeout=60).json()
+            latencies.append(time.perf_counter() - request_start)
+            if response["status"] != "success":
+                raise RuntimeError(f"Workflow request failed: {response['message']}")
+        return health, latencies[0], latencies[1]
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--idle-seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    certificates = tempfile.TemporaryDirectory()
+    RecipePages.cert_path, key_path = self_signed_certificate(certificates.name)
+    tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    tls.load_cert_chain(RecipePages.cert_path, key_path)
+    pages = ThreadingHTTPServer(("127.0.0.1", 0), RecipePages)
+    pages.socket = tls.wrap_socket(pages.socket, server_side=True)
+    threading.Thread(target=pages.serve_forever, daemon=True).start()
+    pages_url = f"https://127.0.0.1:{pages.server_port}"
+
+    print(f"medians of {args.runs} runs; workflow requests sent {args.idle_seconds:g} s after /health answers\n")
+    print(f"{'startup':<8} {'import app.main':>15} {'to /health':>11} {'1st request':>12} {'2nd request':>12}")
+    for name, (preamble, prewarm) in STARTUPS.items():
+        imports = [import_ms(preamble, prewarm) for _ in range(args.runs)]
+        served = [serve(preamble, prewarm, pages_url, args.idle_seconds) for _ in range(args.runs)]
+        health, first, second = (statistics.median(values) * 1000 for values in zip(*served))
+        print(f"{name:<8} {statistics.median(imports):>12.0f} ms {health:>8.0f} ms {first:>9.0f} ms {second:>9.0f} ms")
+    pages.shutdown()
+    certificates.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: compact recipes (app/services/compact.py) against the Pydantic models.
+
+Synthetic recipes (8-14 ingredients from a shared vocabulary, numeric and text quantities,
+5-8 instruction steps) are each decoded from their own JSON document, as the extraction
+cache reads them, so no strings are shared between recipes up front. Reports:
+- memory held by N resident recipes (traced Python heap), as OriginalRecipe models and as
+  CompactRecipe objects, with the number of GC-tracked objects and the time of a full
+  collection with them resident
+- encoded size: model JSON vs msgpack
+- throughput (recipes/s) of each encode/decode step, and of the full paths to and from
+  a model: JSON (model_dump_json / model_validate_json) vs compact (pack_recipe /
+  unpack_recipe), and of the compact-only steps the cache takes (pack, unpack)
+
+Usage (from backend/): python -m benchmarks.compact [--recipes 50000]
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from app.services.agents.models import OriginalRecipe
+from app.services.compact import CompactRecipe, pack_recipe, unpack_recipe
+
+INGREDIENTS = [
+    "boneless skinless chicken thighs", "chicken breast", "ground turkey", "lean ground beef", "salmon fillets", "shrimp",
+    "extra firm tofu", "chickpeas", "black beans", "red lentils", "eggs", "white rice", "brown rice", "quinoa",
+    "penne pasta", "sweet potatoes", "broccoli florets", "red bell pepper", "zucchini", "baby spinach", "green beans",
+    "carrots", "red onion", "cherry tomatoes", "garlic", "fresh ginger", "lime juice", "soy sauce", "honey", "olive oil",
+    "sesame oil", "greek yogurt", "salsa", "peanut butter", "coconut milk", "tomato paste", "chili powder",
+    "smoked paprika", "ground cumin", "dried oregano", "chicken broth", "kosher salt", "black pepper", "fresh cilantro",
+]
+UNITS = ["cup", "tbsp", "tsp", "lb", "oz", "g", "clove", "can", None]
+QUANTITIES = [1, 2, 3, 4, 0.5, 0.25, 0.75, 1.5, "1 1/2", "2-3", "½", "to taste", "as needed"]
+STEPS = [
+    "Preheat the oven to 425°F and line a sheet pan with parchment.",
+    "Season the {protein} with the spices, salt and pepper.",
+    "Cook the {carb} according to the package directions, then fluff with a fork.",
+    "Roast the vegetables for 20 to 25 minutes, tossing halfway through.",
+    "Sear the {protein} in a hot skillet for 5 to 6 minutes per side, until cooked through.",
+    "Whisk the sauce ingredients together in a small bowl.",
+    "Divide everything between the containers and drizzle with the sauce.",
+    "Refrigerate for up to 4 days; reheat for 2 minutes in the microwave.",
+]
+
+def random_recipe(generator: random.Random) -> str:
+    """
+    JSON document of a random recipe
+    """
+    names = generator.sample(INGREDIENTS, generator.randint(8, 14))
+    ingredients = []
+    for name in names:
+        quantity = generator.choice(QUANTITIES)
+        unit = None if isinstance(quantity, str) and not quantity[0].isdigit() else generator.choice(UNITS)
+        ingredients.append({"name": name, "quantity": quantity, "unit": unit})
+    steps = generator.sample(STEPS, generator.randint(5, 8))
+    return json.dumps({
+        "title": f"{names[0].split()[-1].title()} and {names[1].split()[-1].title()} Meal Prep Bowls",
+        "description": generator.choice([None, "Five lunches in under an hour.", "A weeknight favorite that keeps well all week."]),
+        "servings": generator.randint(2, 8),
+        "ingredients": ingredients,
+        "instructions": [step.format(protein=names[0], carb=names[1]) for step in steps],
+    })
+
+def resident(build) -> tuple[list, float, int, float]:
+    """
+    (objects, traced heap MiB, GC-tracked objects added, full collection ms) for the objects `build` returns
+    """
+    gc.collect()
+    tracked = len(gc.get_objects())
+    tracemalloc.start()
+    objects = build()
+    heap_mib = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    start = time.perf_counter()
+    gc.collect()
+    return objects, heap_mib, len(gc.get_objects()) - tracked, (time.perf_counter() - start) * 1000
+
+def throughput(run, items: list) -> float:
+    """
+    Items per second of `run` over `items` (best of three passes)
+    """
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for item in items:
+            run(item)
+        best = min(best, time.perf_counter() - start)
+    return len(items) / best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=50_000)
+    args = parser.parse_args()
+
+    generator = random.Random(5)
+    documents = [random_recipe(generator) for _ in range(args.recipes)]
+
+    # One set resident at a time, so each collection only walks its own objects
+    models, model_mib, model_objects, model_gc_ms = resident(lambda: [OriginalRecipe.model_validate_json(document) for document in documents])
+    del models
+    compacts, compact_mib, compact_objects, compact_gc_ms = resident(lambda: [CompactRecipe.from_model(OriginalRecipe.model_validate_json(document)) for document in documents])
+    models = [OriginalRecipe.model_validate_json(document) for document in documents]
+    ingredients = sum(len(model.ingredients) for model in models) / len(models)
+    print(f"{args.recipes} recipes ({ingredients:.1f} ingredients each on average)\n")
+    print(f"{'resident':<16} {'heap':>9} {'per recipe':>11} {'GC objects':>11} {'full GC':>9}")
+    for name, mib, objects, gc_ms in (("OriginalRecipe", model_mib, model_objects, model_gc_ms), ("CompactRecipe", compact_mib, compact_objects, compact_gc_ms)):
+        print(f"{name:<16} {mib:>5.1f} MiB {mib * 2**20 / args.recipes:>9.0f} B {objects:>11} {gc_ms:>6.0f} ms")
+
+    json_bytes = [model.model_dump_json().encode() for model in models]
+    packed = [compact.pack() for compact in compacts]
+    json_size, packed_size = sum(map(len, json_bytes)) / len(models), sum(map(len, packed)) / len(models)
+    print(f"\nencoded size: JSON {json_size:.0f} B, msgpack {packed_size:.0f} B ({packed_size / json_size:.0%})\n")
+
+    sample = list(range(min(args.recipes, 10_000)))
+    rows = [
+        ("model -> JSON", lambda i: models[i].model_dump_json()),
+        ("JSON -> model", lambda i: OriginalRecipe.model_validate_json(json_bytes[i])),
+        ("model -> packed", lambda i: pack_recipe(models[i])),
+        ("packed -> model", lambda i: unpack_recipe(packed[i])),
+        ("model -> compact", lambda i: CompactRecipe.from_model(models[i])),
+        ("compact -> model", lambda i: compacts[i].to_model()),
+        ("compact -> packed", lambda i: compacts[i].pack()),
+        ("packed -> compact", lambda i: CompactRecipe.unpack(packed[i])),
+    ]
+    print(f"{'step':<20} {'recipes/s':>10} {'per recipe':>11}")
+    for name, run in rows:
+        rate = throughput(run, sample)
+        print(f"{name:<20} {rate:>10.0f} {1e6 / rate:>8.1f} µs")
+
+    agree = all(compacts[i].to_model() == models[i] and unpack_recipe(packed[i]) == models[i] for i in sample)
+    print(f"\nround trips equal the models: {'yes' if agree else 'NO'}")
+
+if __name__ == "__main__":
+    main()
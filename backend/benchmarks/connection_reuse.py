@@ -0,0 +1,87 @@
+"""
+Benchmark: latency saved by reusing pooled connections instead of a new client per request.
+
+Serves a page over HTTPS from a local server (self-signed certificate) and compares
+a bare requests.get per request (what scrape_youtube_video used to do) against the
+shared keep-alive session from app.services.clients. Against a real host, each fresh
+connection additionally pays roughly 2-3 network round trips (TCP + TLS handshakes).
+
+Usage (from backend/): python -m benchmarks.connection_reuse
+"""
+
+import datetime
+import ssl
+import statistics
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from app.services.clients import get_http_session
+
+REQUESTS = 200
+BODY = b"<html><body>" + b"x" * 20_000 + b"</body></html>"
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+def self_signed_context() -> ssl.SSLContext:
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number()).not_valid_before(now).not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    directory = tempfile.mkdtemp()
+    cert_path, key_path = f"{directory}/cert.pem", f"{directory}/key.pem"
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+def measure(get) -> list[float]:
+    samples = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        get().raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    warnings.filterwarnings("ignore")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.socket = self_signed_context().wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"https://127.0.0.1:{server.server_address[1]}/recipe"
+
+    fresh = measure(lambda: requests.get(url, verify=False))
+    session = get_http_session()
+    pooled = measure(lambda: session.get(url, verify=False))
+    server.shutdown()
+
+    for label, samples in (("new connection per request", fresh), ("shared keep-alive session", pooled)):
+        print(f"{label:<28} p50 {statistics.median(samples):6.2f} ms   mean {statistics.fmean(samples):6.2f} ms")
+    print(f"saved per request (local, no network RTT): {statistics.fmean(fresh) - statistics.fmean(pooled):.2f} ms")
+
+if __name__ == "__main__":
+    main()
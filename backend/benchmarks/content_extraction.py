@@ -0,0 +1,90 @@
+"""
+Benchmark: single-pass page content extraction (app/services/agents/content.py) against
+the previous implementation, which ran trafilatura extract on the HTML string and
+re-parsed the page for each html2txt/baseline fallback.
+
+Runs both over the saved page corpus (benchmarks/fixtures/web) and reports CPU time per
+page, the winning strategy, and peak memory. Each implementation runs in its own child
+process so the peak RSS figures (which include libxml2's allocations, invisible to
+tracemalloc) don't mix.
+
+Usage (from backend/): python -m benchmarks.content_extraction
+"""
+
+import multiprocessing
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+from trafilatura import baseline, extract, html2txt
+from app.services.agents.content import extract_page_content
+
+FIXTURES = Path(__file__).parent / "fixtures" / "web"
+REPEAT = 50
+
+def previous_extract_web_page_content(html: str) -> dict:
+    """
+    The extraction stage before the single-pass rewrite (diagnostic prints removed)
+    """
+    strategy = "trafilatura"
+    content = extract(html, output_format="txt", favor_recall=True)
+    if not content or len(content.strip()) < 100:
+        strategy, content = "html2txt", html2txt(html)
+    if not content or len(content.strip()) < 100:
+        strategy, content = "baseline", baseline(html)[1]
+    if not content or len(content.strip()) < 20:
+        raise ValueError("Page contains no extractable content")
+    return {"content": content, "strategy": strategy}
+
+IMPLEMENTATIONS = {"previous": previous_extract_web_page_content, "single_pass": extract_page_content}
+
+def _run(name: str, pages: dict[str, str], results):
+    func = IMPLEMENTATIONS[name]
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Warm up lazily loaded trafilatura resources outside the CPU timing
+    for html in pages.values():
+        try:
+            func(html)
+        except ValueError:
+            pass
+
+    tracemalloc.start()
+    per_page = {}
+    for page, html in pages.items():
+        start = time.process_time()
+        for _ in range(REPEAT):
+            try:
+                result = func(html)
+            except ValueError:
+                result = {"content": "", "strategy": "none"}
+        per_page[page] = ((time.process_time() - start) * 1000 / REPEAT, result["strategy"], len(result["content"]))
+    _, python_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    results.put((name, per_page, python_peak / 1024, rss_peak))
+
+def main():
+    pages = {page.name: page.read_text(encoding="utf-8") for page in sorted(FIXTURES.glob("*.html"))}
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    measured = {}
+    for name in IMPLEMENTATIONS:
+        process = context.Process(target=_run, args=(name, pages, results))
+        process.start()
+        name, per_page, python_peak_kib, rss_peak_kib = results.get()
+        process.join()
+        measured[name] = (per_page, python_peak_kib, rss_peak_kib)
+
+    print(f"{'page':<26} {'previous ms':>12} {'strategy':<12} {'chars':>6}   {'single-pass ms':>14} {'strategy':<12} {'chars':>6}")
+    for page in pages:
+        previous, single = measured["previous"][0][page], measured["single_pass"][0][page]
+        print(f"{page:<26} {previous[0]:>12.2f} {previous[1]:<12} {previous[2]:>6}   {single[0]:>14.2f} {single[1]:<12} {single[2]:>6}")
+
+    for name, (per_page, python_peak_kib, rss_peak_kib) in measured.items():
+        total_ms = sum(cpu_ms for cpu_ms, _, _ in per_page.values())
+        print(f"\n{name}: {total_ms:.1f} ms CPU for the corpus, peak Python heap {python_peak_kib:.0f} KiB, peak RSS growth {rss_peak_kib} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmark: deterministic recipe conversion (servings scaling + calorie/protein targeting).
+
+Usage (from backend/): python -m benchmarks.conversion
+"""
+
+import time
+from app.services.agents.conversion import convert_recipe
+from app.services.agents.ingredients import parse_ingredient_line
+from app.services.agents.models import ConversionRequest, OriginalRecipe, UserAdjustments
+
+REPEAT = 5000
+
+RECIPE = OriginalRecipe(
+    title="Garlic Butter Chicken and Rice",
+    servings=4,
+    ingredients=[parse_ingredient_line(line) for line in (
+        "2 lbs boneless skinless chicken thighs", "1 1/2 cups long-grain white rice", "2 tbsp olive oil",
+        "4 tbsp unsalted butter", "6 cloves garlic, minced", "1/2 cup chicken broth", "2-3 cups broccoli florets",
+        "Salt and pepper, to taste",
+    )],
+    instructions=["Sear the chicken.", "Cook the rice.", "Make the garlic butter sauce and combine."],
+)
+
+# (calories, protein) per ingredient at the original quantity
+MACROS = [(1600, 220), (1020, 20), (240, 0), (400, 0), (27, 1), (5, 1), (80, 6), None]
+
+def main():
+    request = ConversionRequest(
+        original_recipe=RECIPE,
+        user_adjustments=UserAdjustments(target_servings=5, target_calories=550, target_protein=50),
+    )
+    converted = convert_recipe(request, "https://example.com/chicken-rice", MACROS)
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        convert_recipe(request, "https://example.com/chicken-rice", MACROS)
+    elapsed_us = (time.perf_counter() - start) * 1e6 / REPEAT
+
+    for ingredient in converted.ingredients:
+        print(f"  {ingredient.quantity} {ingredient.unit or ''} {ingredient.name}")
+    print(f"per serving: {converted.nutritional_info.calories} kcal, {converted.nutritional_info.protein} g protein")
+    print(converted.conversion_metadata.conversion_notes)
+    print(f"\nconvert_recipe: {elapsed_us:.1f} µs per call")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Benchmark: near-duplicate detection (app/services/duplicates.py).
+
+A synthetic corpus of recipe pages (intro, ingredient lines, steps, notes; every recipe
+drawn from the same vocabulary and phrasing, as blogs are) is indexed, then queried with
+labeled variants of indexed recipes:
+- amp:        the same content with an AMP header and the lines rewrapped
+- print:      the print view, without the intro and notes
+- syndicated: republished copy with fractions as "½", abbreviated units, a new intro and
+              ~5% of the words changed
+- reupload:   a re-uploaded video's transcript (~3% caption differences, new description)
+and with recipes that must not match:
+- same_dish:  another author's version of an indexed dish (same title and most of the
+              ingredients, own quantities and steps)
+- same_site:  another recipe from the site of an indexed page, with the same navigation,
+              newsletter, affiliate and footer boilerplate
+- same_channel: another video from the channel of an indexed video, with the same spoken
+              intro, sponsor read and outro
+- unrelated:  recipes that aren't indexed
+
+Videos are fingerprinted by their transcript, as in extraction.py, which mentions the
+ingredients the recipe was extracted from.
+
+Reports precision/recall of MinHash + LSH at a range of thresholds (and of the exact
+Jaccard similarity at the same thresholds, the ceiling for the estimate), the same once
+matches are confirmed by ingredient overlap (DuplicateDetector.confirm), recall per
+variant, and throughput: fingerprints, index adds and lookups per second.
+
+Usage (from backend/): python -m benchmarks.duplicates [--recipes 20000] [--queries 1000]
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+from app.config import get_settings
+from app.services.duplicates import MIN_SHINGLES, MIN_TRANSCRIPT_SHINGLES, LSHIndex, fingerprint, ingredient_overlap, shingles, similarity
+
+PROTEINS = ["chicken breast", "chicken thighs", "ground turkey", "ground beef", "flank steak", "pork tenderloin", "salmon fillets", "shrimp", "extra firm tofu", "chickpeas", "black beans", "red lentils", "cod", "tempeh", "eggs"]
+PRODUCE = ["broccoli florets", "red bell pepper", "zucchini", "baby spinach", "green beans", "carrots", "red onion", "cherry tomatoes", "snap peas", "cauliflower", "kale", "cremini mushrooms", "corn kernels", "cucumber", "green cabbage", "garlic cloves", "fresh ginger", "limes", "lemons", "cilantro", "green onions", "jalapeno", "avocado", "sweet potatoes"]
+PANTRY = ["white rice", "brown rice", "quinoa", "penne pasta", "rice noodles", "couscous", "flour tortillas", "soy sauce", "honey", "olive oil", "sesame oil", "greek yogurt", "salsa", "peanut butter", "coconut milk", "tomato paste", "sriracha", "tahini", "chili powder", "smoked paprika", "ground cumin", "dried oregano", "chicken broth", "maple syrup", "rice vinegar", "cornstarch", "parmesan", "feta cheese", "kosher salt", "black pepper"]
+UNITS = [("cup", "c."), ("cups", "c."), ("tablespoon", "tbsp"), ("tablespoons", "tbsp"), ("teaspoon", "tsp"), ("teaspoons", "tsp"), ("pound", "lb"), ("pounds", "lbs"), ("ounces", "oz")]
+QUANTITIES = ["1/2", "1/4", "3/4", "1", "1 1/2", "2", "3", "4", "1/3", "2/3"]
+FRACTIONS = {"1/2": "½", "1/4": "¼", "3/4": "¾", "1/3": "⅓", "2/3": "⅔"}
+STYLES = ["Honey Garlic", "Spicy Korean", "Greek", "Cajun", "Teriyaki", "Lemon Herb", "Chipotle", "Thai Peanut", "Tuscan", "Buffalo", "Sesame Ginger", "Mediterranean"]
+DISHES = ["Meal Prep Bowls", "Sheet Pan Dinner", "Stir Fry", "Skillet", "Casserole", "Burrito Bowls", "Grain Salad", "Curry", "Lettuce Wraps", "Soup"]
+INTRO = [
+    "This {title} has been on repeat in our house for months.",
+    "If you are looking for an easy weeknight dinner that also makes great leftovers, this is it.",
+    "I started making this {title} when I wanted something lighter after the holidays.",
+    "The sauce comes together in about five minutes and tastes better than takeout.",
+    "My kids ask for this at least once a week, and it only takes one pan.",
+    "It keeps well in the fridge for up to four days, which makes it perfect for meal prep.",
+    "You can swap the {protein} for almost any protein you have on hand.",
+    "Make a double batch on Sunday and lunch is sorted for the whole week.",
+    "We love serving it with extra {produce} and a squeeze of lime.",
+    "The secret is letting the {protein} get really browned before adding the sauce.",
+]
+STEPS = [
+    "Preheat the oven to {temperature} degrees and line a baking sheet with parchment paper.",
+    "Cook the {pantry} according to the package directions and set aside.",
+    "In a small bowl, whisk together the {pantry}, {pantry2} and {spice} until smooth.",
+    "Heat the {oil} in a large skillet over medium high heat.",
+    "Add the {protein} and cook for {minutes} minutes, stirring occasionally, until browned.",
+    "Toss the {produce} with a drizzle of {oil} and a pinch of salt.",
+    "Roast for {minutes} minutes, flipping halfway through, until tender and slightly charred.",
+    "Pour the sauce over the {protein} and simmer for {minutes} minutes until it thickens.",
+    "Stir in the {produce} and cook until just wilted, about {minutes} minutes.",
+    "Season to taste with salt, pepper and a squeeze of {citrus} juice.",
+    "Divide the {pantry} between {containers} meal prep containers and top with the {protein} and {produce}.",
+    "Garnish with {garnish} and serve warm, or refrigerate for up to {days} days.",
+]
+NOTES = [
+    "To reheat, microwave for two minutes or warm in a covered skillet with a splash of water.",
+    "Leftovers freeze well for up to three months without the rice.",
+    "For a spicier version, add a chopped jalapeno with the garlic.",
+    "Nutrition information is an estimate and will vary with the brands you use.",
+]
+
+SITE_BOILERPLATE = [
+    "Home Recipes Meal Prep Dinner Breakfast Snacks Desserts About Contact Shop Search",
+    "Welcome to {name}! Sign up for our free newsletter and get a weekly meal plan with a printable grocery list delivered to your inbox every Sunday morning.",
+    "This post may contain affiliate links, which means we earn a small commission at no extra cost to you when you buy through them. Read our full disclosure policy.",
+    "Did you make this recipe? Leave a comment and a star rating below, and tag us on Instagram so we can see your creations.",
+    "All content and photographs on {name} are copyright protected. Please do not use our images without prior written permission.",
+    "Looking for more easy meal prep ideas? Browse our collection of high protein lunches, freezer friendly dinners and budget friendly family meals.",
+    "Our recipes are tested in a home kitchen, and the nutrition information is calculated automatically as an estimate only.",
+    "Hi, I am the cook, photographer and dishwasher behind {name}, sharing simple food for busy weeknights since 2014.",
+    "Privacy Policy Terms of Use Accessibility Cookie Settings Advertise With Us Careers Press",
+    "Never miss a recipe: follow along on Pinterest, Facebook, YouTube and TikTok for new videos every week.",
+]
+CHANNEL_BOILERPLATE = [
+    "Hey everyone, welcome back to {name}, where we make healthy meal prep simple.",
+    "Before we get started, this video is sponsored by our favorite meal kit company, and the first fifty people to use the code in the description get their first box free.",
+    "If you are new here, make sure to subscribe and hit the bell so you never miss a new video.",
+    "All of the measurements are in the description box below and on the blog.",
+    "Let me know in the comments what you want to see next, and I will see you in the next one.",
+    "Thanks so much for watching, and if you enjoyed this video, give it a thumbs up because it really helps the channel.",
+]
+
+def boilerplate(generator: random.Random, name: str, lines: list[str]) -> list[str]:
+    """
+    A site's or channel's boilerplate: its lines, plus (for sites) links to popular posts
+    """
+    text = [line.format(name=name) for line in lines]
+    if lines is SITE_BOILERPLATE:
+        text.append("Popular posts: " + ", ".join(f"{generator.choice(STYLES)} {generator.choice(PROTEINS).split()[-1].title()} {generator.choice(DISHES)}" for _ in range(20)))
+    return text
+
+def random_recipe(generator: random.Random, title: str | None = None, ingredients: list[str] | None = None) -> dict:
+    """
+    A recipe page as sections of lines
+    """
+    protein = generator.choice(PROTEINS)
+    title = title or f"{generator.choice(STYLES)} {protein.split()[-1].title()} {generator.choice(DISHES)}"
+    ingredients = ingredients or [protein, *generator.sample(PRODUCE, generator.randint(3, 6)), *generator.sample(PANTRY, generator.randint(4, 8))]
+    fill = lambda template: template.format(
+        title=title.lower(), protein=protein, produce=generator.choice(PRODUCE), pantry=generator.choice(PANTRY),
+        pantry2=generator.choice(PANTRY), spice=generator.choice(PANTRY[18:23]), oil=generator.choice(["olive oil", "sesame oil", "avocado oil"]),
+        temperature=generator.choice([375, 400, 425]), minutes=generator.randint(3, 25), citrus=generator.choice(["lime", "lemon"]),
+        containers=generator.randint(3, 6), garnish=generator.choice(["green onions", "sesame seeds", "cilantro", "parsley", "feta"]), days=generator.randint(3, 5),
+    )
+    lines = []
+    for name in ingredients:
+        unit = generator.choice(UNITS)[0]
+        lines.append(f"{generator.choice(QUANTITIES)} {unit} {name}")
+    return {
+        "title": title,
+        "ingredient_names": ingredients,
+        "boilerplate": [],
+        "intro": [fill(template) for template in generator.sample(INTRO, 4)],
+        "ingredients": lines,
+        "steps": [fill(template) for template in generator.sample(STEPS, generator.randint(6, 9))],
+        "notes": generator.sample(NOTES, 2),
+    }
+
+def page_text(recipe: dict, intro: bool = True, notes: bool = True) -> str:
+    sections = [recipe["boilerplate"][:3], [recipe["title"]]]
+    if intro:
+        sections.append(recipe["intro"])
+    sections += [["Ingredients"], recipe["ingredients"], ["Instructions"], recipe["steps"]]
+    if notes:
+        sections += [["Notes"], recipe["notes"]]
+    sections.append(recipe["boilerplate"][3:])
+    return "\n".join(line for section in sections for line in section)
+
+def transcript_text(recipe: dict) -> str:
+    """
+    A video's transcript: the channel's intro, the recipe talked through (ingredients
+    included), and its outro
+    """
+    spoken = [f"For this one you will need {line}." for line in recipe["ingredients"]]
+    lines = recipe["boilerplate"][:2] + recipe["intro"] + spoken + recipe["steps"] + recipe["notes"] + recipe["boilerplate"][2:]
+    return " ".join(lines)
+
+def edit_words(generator: random.Random, text: str, rate: float) -> str:
+    """
+    Replace, drop or duplicate a share of the words (rewording, caption errors)
+    """
+    words = []
+    for word in text.split():
+        roll = generator.random()
+        if roll < rate / 3:
+            continue
+        if roll < rate * 2 / 3:
+            words.append(generator.choice(["the", "and", "a", "some", "really", "just", "um"]))
+        elif roll < rate:
+            words += [word, word]
+        else:
+            words.append(word)
+    return " ".join(words)
+
+def variant(generator: random.Random, recipe: dict, kind: str) -> str:
+    if kind == "amp":
+        return f"Jump to Recipe Print Recipe\n{page_text(recipe)}".replace("\n", " ")
+    if kind == "print":
+        return page_text(recipe, intro=False, notes=False)
+    if kind == "syndicated":
+        text = page_text({**recipe, "intro": ["This recipe first appeared on a partner site and is republished with permission."] + recipe["intro"][2:]})
+        for long, short in UNITS:
+            text = text.replace(f" {long} ", f" {short} ")
+        for fraction, glyph in FRACTIONS.items():
+            text = text.replace(fraction, glyph)
+        return edit_words(generator, text, 0.05)
+    if kind == "reupload":
+        return edit_words(generator, transcript_text(recipe), 0.03)
+    raise ValueError(kind)
+
+def jaccard(first: set, second: set) -> float:
+    return len(first & second) / len(first | second)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    generator = random.Random(11)
+    recipes = [random_recipe(generator) for _ in range(args.recipes)]
+    # Videos are indexed by their transcript (see _find_video_duplicate in extraction.py)
+    videos = set(generator.sample(range(args.recipes), args.recipes // 5))
+    # A tenth of the pages and videos come from a few sites and channels, with their boilerplate
+    sites = [boilerplate(generator, f"Site {n}", SITE_BOILERPLATE) for n in range(5)]
+    channels = [boilerplate(generator, f"Channel {n}", CHANNEL_BOILERPLATE) for n in range(5)]
+    branded = generator.sample(range(args.recipes), args.recipes // 10)
+    for i in branded:
+        recipes[i]["boilerplate"] = generator.choice(channels if i in videos else sites)
+    texts = [transcript_text(recipe) if i in videos else page_text(recipe) for i, recipe in enumerate(recipes)]
+
+    start = time.perf_counter()
+    signatures = [fingerprint(text, MIN_TRANSCRIPT_SHINGLES if i in videos else MIN_SHINGLES) for i, text in enumerate(texts)]
+    fingerprint_seconds = time.perf_counter() - start
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = LSHIndex(max_entries=args.recipes)
+    for i, signature in enumerate(signatures):
+        index.add(str(i), signature)
+    add_seconds = time.perf_counter() - start
+    index_mib = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    words = sum(len(text.split()) for text in texts) / len(texts)
+    print(f"{args.recipes} recipes indexed ({words:.0f} words each on average), {args.queries} queries per kind\n")
+
+    # (kind, expected match or None, text)
+    queries = []
+    for kind in ("amp", "print", "syndicated"):
+        for i in generator.sample([i for i in range(args.recipes) if i not in videos], args.queries):
+            queries.append((kind, str(i), variant(generator, recipes[i], kind)))
+    for i in generator.sample(sorted(videos), args.queries):
+        queries.append(("reupload", str(i), variant(generator, recipes[i], "reupload")))
+    for i in generator.sample([i for i in range(args.recipes) if i not in videos], args.queries):
+        other = random_recipe(generator, recipes[i]["title"], recipes[i]["ingredient_names"][:-2] + generator.sample(PANTRY, 2))
+        queries.append(("same_dish", None, page_text(other)))
+    for i in generator.sample([i for i in branded if i not in videos], args.queries):
+        queries.append(("same_site", None, page_text({**random_recipe(generator), "boilerplate": recipes[i]["boilerplate"]})))
+    for i in generator.sample([i for i in branded if i in videos], min(args.queries, len([i for i in branded if i in videos]))):
+        queries.append(("same_channel", None, transcript_text({**random_recipe(generator), "boilerplate": recipes[i]["boilerplate"]})))
+    for _ in range(args.queries):
+        queries.append(("unrelated", None, page_text(random_recipe(generator))))
+
+    start = time.perf_counter()
+    query_signatures = [fingerprint(text) for _, _, text in queries]
+    query_fingerprint_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    candidates = [index.query(signature, 0.0) for signature in query_signatures]
+    lookup_seconds = time.perf_counter() - start
+    shingle_sets = {}
+    exact = []
+    for (kind, expected, text), found in zip(queries, candidates):
+        features = shingles(text)
+        # Exact similarity to the expected recipe, or to the closest indexed one LSH proposed
+        keys = {key for key, _ in found} | ({expected} if expected else set())
+        for key in keys - shingle_sets.keys():
+            shingle_sets[key] = shingles(texts[int(key)])
+        exact.append({key: jaccard(features, shingle_sets[key]) for key in keys})
+
+    def evaluate(scores: list[dict], threshold: float) -> tuple[float, float, dict]:
+        reported = correct = 0
+        recall_by_kind = {}
+        for (kind, expected, _), candidate_scores in zip(queries, scores):
+            best = max(candidate_scores.items(), key=lambda item: item[1], default=(None, 0.0))
+            matched = best[0] if best[1] >= threshold else None
+            reported += matched is not None
+            correct += matched is not None and matched == expected
+            if expected is not None:
+                recall_by_kind.setdefault(kind, []).append(matched == expected)
+        positives = sum(expected is not None for _, expected, _ in queries)
+        return correct / max(reported, 1), correct / positives, {kind: sum(hits) / len(hits) for kind, hits in recall_by_kind.items()}
+
+    estimated = [dict(found) for found in candidates]
+    # Candidates whose recipe's ingredients are in the query text (what extraction.py reuses)
+    min_overlap = get_settings().DEDUP_MIN_INGREDIENT_OVERLAP
+    thresholds = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8)
+    confirmed = [
+        {
+            key: value for key, value in found.items()
+            if value >= thresholds[0] and ingredient_overlap(recipes[int(key)]["ingredient_names"], text) >= min_overlap
+        }
+        for (_, _, text), found in zip(queries, estimated)
+    ]
+    kinds = ("amp", "print", "syndicated", "reupload")
+    print(f"{'threshold':>9} {'precision':>10} {'recall':>7}   {'exact J: precision':>18} {'recall':>7}   {'confirmed: precision':>20} {'recall':>7}   " + " ".join(f"{kind:>10}" for kind in kinds))
+    for threshold in thresholds:
+        precision, recall, _ = evaluate(estimated, threshold)
+        exact_precision, exact_recall, _ = evaluate(exact, threshold)
+        confirmed_precision, confirmed_recall, by_kind = evaluate(confirmed, threshold)
+        print(
+            f"{threshold:>9.1f} {precision:>10.3f} {recall:>7.3f}   {exact_precision:>18.3f} {exact_recall:>7.3f}   {confirmed_precision:>20.3f} {confirmed_recall:>7.3f}   "
+            + " ".join(f"{by_kind[kind]:>10.3f}" for kind in kinds)
+        )
+    print("(recall per variant is after confirmation)")
+
+    print("\nexact Jaccard similarity to the source recipe (min / median):")
+    for kind in kinds:
+        values = sorted(scores[expected] for (k, expected, _), scores in zip(queries, exact) if k == kind)
+        print(f"  {kind:<11} {values[0]:.2f} / {values[len(values) // 2]:.2f}")
+    for kind in ("same_dish", "same_site", "same_channel"):
+        closest = sorted(max(scores.values(), default=0.0) for (k, _, _), scores in zip(queries, exact) if k == kind)
+        rejected = sum(max(found.values(), default=0.0) >= thresholds[0] and not kept for (k, _, _), found, kept in zip(queries, estimated, confirmed) if k == kind)
+        print(f"  {kind:<12} closest indexed recipe among LSH candidates: median {closest[len(closest) // 2]:.2f}, max {closest[-1]:.2f}; {rejected} estimated at {thresholds[0]} or more, none confirmed")
+
+    errors = [abs(similarity(query_signatures[n], signatures[int(key)]) - value) for n, scores in enumerate(exact) for key, value in scores.items()]
+    print(f"\nMinHash estimate error vs exact Jaccard: mean {sum(errors) / len(errors):.3f}, max {max(errors):.3f}")
+    print(f"fingerprint: {len(texts) / fingerprint_seconds:,.0f} texts/s ({fingerprint_seconds / len(texts) * 1e6:.0f} µs each)")
+    print(f"index add:   {args.recipes / add_seconds:,.0f} /s, {index_mib:.1f} MiB for {args.recipes} entries ({index_mib * 2**20 / args.recipes:.0f} B each)")
+    print(f"lookup:      {len(queries) / lookup_seconds:,.0f} /s ({lookup_seconds / len(queries) * 1e6:.0f} µs each, plus {query_fingerprint_seconds / len(queries) * 1e6:.0f} µs to fingerprint the query)")
+    print(f"candidates per lookup: {sum(map(len, candidates)) / len(candidates):.1f} (estimated similarity > 0 in a shared band)")
+
+if __name__ == "__main__":
+    main()
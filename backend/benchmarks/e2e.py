@@ -0,0 +1,318 @@
+"""
+Benchmark: end-to-end workflow requests through the API, offline.
+
+The API runs in a uvicorn subprocess (one per scenario) with its dependencies replaced
+by the local stand-ins in benchmarks/standins.py: recipe pages and YouTube are served
+from the recorded fixtures, OpenAI by a fake server answering with canned recipes after
+--llm-latency-ms. Proxy variables point every other destination at a closed local port,
+so nothing reaches the network. Caches and stores are in memory or in a temporary
+directory, and near-duplicate detection is off (the stand-ins serve the same few videos
+under every ID). The per-host download limit applies as configured: every page comes
+from one stand-in host, as in a burst of imports from a single site.
+
+Scenarios (each after one unmeasured web and YouTube request):
+- web:        --requests sequential /api/test/workflow calls for new recipe pages
+              (schema.org path: download, parse, nutrition, conversion)
+- youtube:    --requests sequential calls for new videos (watch page, captions, LLM)
+- batch:      /api/test/workflow/batch calls of 10 URLs each (7 pages, 2 of them
+              tracking-parameter variants of another, and 3 videos), --requests / 5 batches
+- cache_hot:  --requests calls cycling over 10 recipes already extracted
+- concurrent: --load-requests calls for new pages and videos (half each) from
+              --concurrency clients at once
+
+Reports throughput (recipes per second), p50/p95/p99 latency of each call, peak RSS of the
+API process and the LLM calls it made, and compares them with the stored baseline
+(benchmarks/baselines/e2e.json): latency or RSS above, or throughput below, the baseline
+by more than --tolerance is flagged, and with --check makes the run exit with status 1.
+
+Usage (from backend/): python -m benchmarks.e2e [--scenarios web,youtube,...] [--requests 30]
+    [--load-requests 160] [--concurrency 16] [--llm-latency-ms 800] [--rtt-ms 40]
+    [--save-baseline] [--check] [--tolerance 0.2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from benchmarks.cold_start import free_port
+from benchmarks.standins import FakeOpenAI, StandIns
+
+BACKEND = Path(__file__).parent.parent
+BASELINE = Path(__file__).parent / "baselines" / "e2e.json"
+SCENARIOS = ("web", "youtube", "batch", "cache_hot", "concurrent")
+
+# Nothing listens on the discard port: requests that bypass the stand-ins fail at once
+DEAD_PROXY = "http://127.0.0.1:9"
+
+ADJUSTMENTS = {"target_servings": 5, "target_calories": 550, "target_protein": 45}
+
+# (metric, better when higher)
+METRICS = (("throughput", True), ("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("peak_rss_mib", False))
+
+class WorkflowError(Exception):
+    """
+    Raised when the API answers a workflow call with an error
+    """
+
+class Urls:
+    """
+    New recipe page and video URLs for a scenario
+    """
+
+    def __init__(self, sites_url: str):
+        self.sites_url = sites_url
+        self.count = 0
+
+    def page(self) -> str:
+        self.count += 1
+        return f"{self.sites_url}/recipes/{self.count}/chicken-burrito-bowls"
+
+    def video(self) -> str:
+        self.count += 1
+        return f"https://www.youtube.com/watch?v=e2e{self.count:08d}"
+
+def server_environment(standins: StandIns, directory: str) -> dict:
+    proxies = {name: DEAD_PROXY for name in ("HTTP_PROXY", "HTTPS_PROXY", "ALL_PROXY", "http_proxy", "https_proxy", "all_proxy")}
+    return {
+        **os.environ,
+        **standins.environment(),
+        **proxies,
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+        "FIREBASE_SERVICE_ACCOUNT": "",
+        "EXTRACTION_CACHE_BACKEND": "memory",
+        "JOB_STORE_BACKEND": "memory",
+        "RECIPE_STORE_PATH": os.path.join(directory, "recipes.sqlite3"),
+        "SEARCH_SNAPSHOT_PATH": "",
+        "SEARCH_REFRESH_SECONDS": "0",
+        "DEDUP_ENABLED": "false",
+        # The fake OpenAI server has no rate limit to stay under
+        "LLM_REQUESTS_PER_MINUTE": "0",
+    }
+
+def peak_rss_mib(pid: int) -> float | None:
+    """
+    Peak resident set size of a running process (Linux), or None where /proc isn't available
+    """
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None
+    for line in status.splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+async def workflow(client: httpx.AsyncClient, url: str) -> float:
+    """
+    One /api/test/workflow call; returns its latency in seconds
+    """
+    start = time.perf_counter()
+    response = await client.post("/api/test/workflow", params={"recipe_url": url, **ADJUSTMENTS})
+    elapsed = time.perf_counter() - start
+    body = response.json()
+    if body["status"] != "success":
+        raise WorkflowError(f"{url}: {body['message']}")
+    return elapsed
+
+async def batch(client: httpx.AsyncClient, urls: list[str]) -> float:
+    start = time.perf_counter()
+    response = await client.post("/api/test/workflow/batch", json=[{"recipe_url": url, "user_adjustments": ADJUSTMENTS} for url in urls])
+    elapsed = time.perf_counter() - start
+    body = response.json()
+    if body["status"] != "success":
+        raise WorkflowError(body["message"])
+    failed = [entry for entry in body["result"] if entry["status"] != "success"]
+    if failed:
+        raise WorkflowError(f"{failed[0]['recipe_url']}: {failed[0]['message']}")
+    return elapsed
+
+async def extract_hot(client: httpx.AsyncClient, urls: Urls) -> list[str]:
+    """
+    Extract the recipes the cache_hot scenario requests again (before it is timed)
+    """
+    extracted = [urls.page() for _ in range(5)] + [urls.video() for _ in range(5)]
+    for url in extracted:
+        await workflow(client, url)
+    return extracted
+
+async def run_scenario(name: str, client: httpx.AsyncClient, urls: Urls, args, extracted: list[str]) -> tuple[list[float], int]:
+    """
+    Run a scenario's measured calls; returns their latencies and the number of recipes requested
+    """
+    if name in ("web", "youtube"):
+        new_url = urls.page if name == "web" else urls.video
+        return [await workflow(client, new_url()) for _ in range(args.requests)], args.requests
+
+    if name == "batch":
+        latencies = []
+        batches = max(1, args.requests // 5)
+        for _ in range(batches):
+            pages = [urls.page() for _ in range(5)]
+            latencies.append(await batch(client, [*pages, f"{pages[0]}?utm_source=newsletter", f"{pages[1]}#recipe", *(urls.video() for _ in range(3))]))
+        return latencies, batches * 10
+
+    if name == "cache_hot":
+        return [await workflow(client, extracted[n % len(extracted)]) for n in range(args.requests)], args.requests
+
+    if name == "concurrent":
+        pending = [urls.page() if n % 2 else urls.video() for n in range(args.load_requests)]
+        latencies = []
+
+        async def worker():
+            while pending:
+                latencies.append(await workflow(client, pending.pop()))
+
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        return latencies, args.load_requests
+
+    raise ValueError(f"Unknown scenario: {name}")
+
+def percentile(values: list[float], share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(share * (len(ordered) - 1)))]
+
+async def measure(name: str, standins: StandIns, args) -> dict:
+    """
+    Start a fresh API server, warm it up, run the scenario and collect its results
+    """
+    directory = tempfile.TemporaryDirectory()
+    port = free_port()
+    code = f"import uvicorn; uvicorn.run('app.main:app', host='127.0.0.1', port={port}, log_level='warning')"
+    server = subprocess.Popen(
+        [sys.executable, "-c", code], cwd=BACKEND, env=server_environment(standins, directory.name),
+        stdout=subprocess.DEVNULL, stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits, trust_env=False) as client:
+            while True:
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.02)
+            urls = Urls(standins.sites_url)
+            await workflow(client, urls.page())
+            await workflow(client, urls.video())
+            extracted = await extract_hot(client, urls) if name == "cache_hot" else []
+
+            llm_calls = sum(FakeOpenAI.requests.values())
+            start = time.perf_counter()
+            latencies, recipes = await run_scenario(name, client, urls, args, extracted)
+            seconds = time.perf_counter() - start
+            llm_calls = sum(FakeOpenAI.requests.values()) - llm_calls
+        rss = peak_rss_mib(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+        directory.cleanup()
+
+    return {
+        "calls": len(latencies),
+        "recipes": recipes,
+        "llm_calls": llm_calls,
+        "throughput": round(recipes / seconds, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "peak_rss_mib": round(rss, 1) if rss is not None else None,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float, path: Path) -> list[str]:
+    """
+    Print each metric next to the baseline; returns the regressions beyond the tolerance
+    """
+    regressions = []
+    print(f"\ncompared with {path} (recorded {baseline['recorded_at']}, {baseline['environment']['platform']})")
+    print(f"{'scenario':<11} " + " ".join(f"{metric:>20}" for metric, _ in METRICS))
+    for name, result in results.items():
+        recorded = baseline["scenarios"].get(name)
+        if recorded is None:
+            print(f"{name:<11} (not in the baseline)")
+            continue
+        cells = []
+        for metric, higher_is_better in METRICS:
+            current, before = result[metric], recorded.get(metric)
+            if current is None or not before:
+                cells.append(f"{'-':>20}")
+                continue
+            change = current / before - 1
+            regressed = -change > tolerance if higher_is_better else change > tolerance
+            if regressed:
+                regressions.append(f"{name} {metric}: {before} -> {current} ({change:+.0%})")
+            cells.append(f"{f'{before:g} -> {current:g} {change:+.0%}':>19}{'!' if regressed else ' '}")
+        print(f"{name:<11} " + " ".join(cells))
+    return regressions
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--load-requests", type=int, default=160)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--verbose", action="store_true", help="show the API server's log")
+    args = parser.parse_args()
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))} (choose from {', '.join(SCENARIOS)})")
+
+    options = {name: getattr(args, name) for name in ("requests", "load_requests", "concurrency", "llm_latency_ms", "rtt_ms")}
+    standins = StandIns(args.rtt_ms, args.llm_latency_ms)
+    print(f"LLM latency {args.llm_latency_ms:g} ms, page/video round trip {args.rtt_ms:g} ms, "
+          f"{args.requests} requests per scenario, {args.load_requests} at concurrency {args.concurrency}\n")
+    print(f"{'scenario':<11} {'recipes':>7} {'LLM calls':>9} {'recipes/s':>9} {'p50':>10} {'p95':>10} {'p99':>10} {'peak RSS':>10}")
+    results = {}
+    try:
+        for name in names:
+            result = results[name] = await measure(name, standins, args)
+            rss = f"{result['peak_rss_mib']:.0f} MiB" if result["peak_rss_mib"] is not None else "-"
+            print(f"{name:<11} {result['recipes']:>7} {result['llm_calls']:>9} {result['throughput']:>9.2f} "
+                  f"{result['p50_ms']:>7.0f} ms {result['p95_ms']:>7.0f} ms {result['p99_ms']:>7.0f} ms {rss:>10}")
+    finally:
+        standins.close()
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {"scenarios": {}}
+        baseline.update({
+            "recorded_at": time.strftime("%Y-%m-%d"),
+            "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "options": options,
+        })
+        baseline["scenarios"].update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"\nbaseline saved to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nno baseline at {args.baseline} (record one with --save-baseline)")
+        return
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get("options") != options:
+        print(f"\nnote: the baseline was recorded with {baseline.get('options')}")
+    regressions = compare(results, baseline, args.tolerance, args.baseline)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:\n  " + "\n  ".join(regressions))
+        if args.check:
+            sys.exit(1)
+    else:
+        print(f"\nno regressions beyond {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
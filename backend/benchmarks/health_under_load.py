@@ -0,0 +1,74 @@
+"""
+Load test: p99 /health latency while 50 extractions are in flight.
+
+Scraping and the OpenAI call are replaced with sleeps (a blocking sleep for the
+scrape, an async sleep for the LLM) so the run needs no network and measures
+only how responsive the event loop stays.
+
+Usage (from backend/): python -m benchmarks.health_under_load
+"""
+
+import asyncio
+import os
+import statistics
+import time
+import httpx
+
+# Keep the run self-contained: no persistent extraction cache on disk
+os.environ.setdefault("EXTRACTION_CACHE_BACKEND", "memory")
+
+from app.main import app
+from app.services.agents import extraction
+from app.services.agents.models import OriginalRecipe
+
+IN_FLIGHT = 50
+HEALTH_SAMPLES = 200
+SCRAPE_SECONDS = 0.5
+LLM_SECONDS = 1.0
+
+def fake_fetch_web_page(url: str) -> str:
+    time.sleep(SCRAPE_SECONDS)
+    return "<html><body><p>recipe text</p></body></html>"
+
+def fake_parse_web_page(html: str) -> tuple[None, dict]:
+    return None, {"content": "recipe text", "strategy": "trafilatura", "timings_ms": {}}
+
+async def fake_extract_recipe_from_web_page(content, openai_client) -> OriginalRecipe:
+    await asyncio.sleep(LLM_SECONDS)
+    return OriginalRecipe(title="Fake", servings=1, ingredients=[], instructions=[])
+
+def p99(samples: list[float]) -> float:
+    return statistics.quantiles(samples, n=100)[98]
+
+async def sample_health(client: httpx.AsyncClient) -> list[float]:
+    samples = []
+    for _ in range(HEALTH_SAMPLES):
+        start = time.perf_counter()
+        await client.get("/health")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.005)
+    return samples
+
+async def main():
+    extraction.fetch_web_page = fake_fetch_web_page
+    extraction.parse_web_page = fake_parse_web_page
+    extraction.extract_recipe_from_web_page = fake_extract_recipe_from_web_page
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        idle = await sample_health(client)
+
+        params = {"target_servings": 4, "target_calories": 500, "target_protein": 40}
+        extractions = [
+            asyncio.create_task(client.post("/api/test/workflow", params={"recipe_url": f"https://example.com/{i}", **params}))
+            for i in range(IN_FLIGHT)
+        ]
+        await asyncio.sleep(0.05)
+        loaded = await sample_health(client)
+        await asyncio.gather(*extractions)
+
+    print(f"/health p99 idle:              {p99(idle):.2f} ms")
+    print(f"/health p99 with {IN_FLIGHT} in flight: {p99(loaded):.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
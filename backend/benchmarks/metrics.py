@@ -0,0 +1,87 @@
+"""
+Benchmark: overhead of the workflow instrumentation (app/services/metrics.py).
+
+- cost of one span (enter/exit plus histogram observation) with METRICS_ENABLED on and off,
+  against the bare loop, and of a whole `trace` without profiling
+- /metrics rendering time with a realistic number of series
+- the sampling profiler's cost to CPU-bound work (content extraction over the saved page
+  corpus) while it samples every PROFILE_SAMPLE_INTERVAL_SECONDS
+
+Usage (from backend/): python -m benchmarks.metrics
+"""
+
+import time
+from pathlib import Path
+from app.services import metrics
+from app.services.agents.content import extract_page_content
+from app.services.profiler import SamplingProfiler
+
+ITERATIONS = 200_000
+FIXTURES = Path(__file__).parent / "fixtures" / "web"
+
+def per_call_ns(func, iterations: int = ITERATIONS) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter_ns()
+        func(iterations)
+        best = min(best, (time.perf_counter_ns() - start) / iterations)
+    return best
+
+def bare(iterations: int):
+    for _ in range(iterations):
+        pass
+
+def spans(iterations: int):
+    for _ in range(iterations):
+        with metrics.span("parse", "web") as parse:
+            parse.set(path="trafilatura")
+
+def traces(iterations: int):
+    for _ in range(iterations):
+        with metrics.trace("workflow", "web"):
+            pass
+
+def extract_corpus(pages: list[str], repeat: int = 20):
+    for _ in range(repeat):
+        for html in pages:
+            try:
+                extract_page_content(html)
+            except ValueError:
+                pass
+
+def main():
+    settings = metrics.settings
+    settings.PROFILE_SLOW_REQUESTS = False
+    baseline = per_call_ns(bare)
+    print(f"bare loop iteration:        {baseline:7.1f} ns")
+    for enabled in (False, True):
+        settings.METRICS_ENABLED = enabled
+        state = "enabled " if enabled else "disabled"
+        print(f"span, metrics {state}:    {per_call_ns(spans) - baseline:7.1f} ns per span")
+        print(f"trace, metrics {state}:   {per_call_ns(traces, ITERATIONS // 10) - baseline:7.1f} ns per request")
+
+    # ~ what a busy instance accumulates: 20 stages x 2 sources x 5 paths
+    for i in range(200):
+        metrics.observe(f"stage_{i % 20}", 0.01 * i, ("web", "youtube")[i % 2], f"path_{i % 5}")
+    start = time.perf_counter()
+    text = metrics.render_metrics()
+    print(f"\n/metrics render: {(time.perf_counter() - start) * 1000:.1f} ms for {text.count(chr(10))} lines")
+
+    pages = [page.read_text(encoding="utf-8") for page in sorted(FIXTURES.glob("*.html"))]
+    extract_corpus(pages, 2)
+    start = time.process_time()
+    extract_corpus(pages)
+    unprofiled = time.process_time() - start
+
+    profiler = SamplingProfiler(settings.PROFILE_SAMPLE_INTERVAL_SECONDS)
+    profiler.start()
+    start = time.process_time()
+    extract_corpus(pages)
+    profiled = time.process_time() - start
+    samples = profiler.stop()
+
+    print(f"\ncontent extraction CPU: {unprofiled * 1000:.0f} ms unprofiled, {profiled * 1000:.0f} ms while sampling every"
+          f" {settings.PROFILE_SAMPLE_INTERVAL_SECONDS * 1000:g} ms ({profiled / unprofiled - 1:+.1%}, {sum(samples.values())} samples)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: nutrition table load time and ingredient matching over 10k ingredient lines.
+
+Lines are generated from realistic templates (descriptors, units, misspellings) so most
+names repeat, as they do across real recipes. Reports cold (first-seen) and warm
+(memoized) matching throughput.
+
+Usage (from backend/): python -m benchmarks.nutrition
+"""
+
+import random
+import time
+from app.services.agents.ingredients import parse_ingredient_line
+from app.services.agents.nutrition import NutritionTable, ingredient_macros
+
+LINES = 10_000
+
+QUANTITIES = ["1", "2", "1 1/2", "½", "3/4", "2-3", "200 g", "8 oz", "1 lb"]
+UNITS = ["", "cups", "tbsp", "tsp", ""]
+DESCRIPTORS = ["", "fresh", "chopped", "boneless skinless", "large", "finely diced", "organic", "extra virgin"]
+NAMES = [
+    "chicken thighs", "chicken breast", "ground turkey", "salmon fillets", "shrimp", "eggs", "egg whites",
+    "long-grain white rice", "brown rice", "rolled oats", "quinoa", "spaghetti", "sweet potatoes", "potatoes",
+    "olive oil", "butter", "garlic", "onion", "red onion", "broccoli florets", "spinach", "bell pepper",
+    "black beans", "chickpeas", "lentils", "greek yogurt", "cheddar cheese", "parmesan", "milk", "almond milk",
+    "peanut butter", "honey", "maple syrup", "soy sauce", "chicken broth", "tomato paste", "diced tomatoes",
+    "all-purpose flour", "sugar", "brown sugar", "baking powder", "salt", "black pepper", "cumin", "paprika",
+    "avocado", "lime juice", "cilantro", "tofu", "tomatos", "parmesean", "brocoli", "dragonfruit",
+]
+NOTES = ["", ", minced", ", drained", ", divided", " (optional)"]
+
+def generate_lines(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(QUANTITIES)} {rng.choice(UNITS)} {rng.choice(DESCRIPTORS)} {rng.choice(NAMES)}{rng.choice(NOTES)}"
+        for _ in range(count)
+    ]
+
+def main():
+    lines = generate_lines(LINES)
+    ingredients = [parse_ingredient_line(line) for line in lines]
+
+    start = time.perf_counter()
+    table = NutritionTable()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    matched = sum(table.match(ingredient.name) is not None for ingredient in ingredients)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for ingredient in ingredients:
+        table.match(ingredient.name)
+    warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ingredient_macros(ingredients)
+    macros = time.perf_counter() - start
+
+    print(f"table load ({len(table)} rows):     {load_ms:.2f} ms")
+    print(f"match {LINES} lines (cold):  {cold * 1000:.2f} ms  ({cold * 1e6 / LINES:.2f} µs/line)")
+    print(f"match {LINES} lines (warm):  {warm * 1000:.2f} ms  ({warm * 1e6 / LINES:.2f} µs/line)")
+    print(f"ingredient_macros (grams + match + row read): {macros * 1e6 / LINES:.2f} µs/line")
+    print(f"matched: {matched}/{LINES} ({matched / LINES:.0%})")
+
+if __name__ == "__main__":
+    main()
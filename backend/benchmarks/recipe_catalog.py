@@ -0,0 +1,130 @@
+"""
+Benchmark: recipe catalog listings (app/services/recipes.py) at 100k recipes, SQLite store.
+
+Catalog pages are compared at increasing depth against naive offset pagination that
+reads whole recipes (ORDER BY ... LIMIT/OFFSET, every row decoded into a Recipe), the way
+a listing is usually written first:
+- keyset: RecipeCatalog.list_recipes with the cursor of the previous page (index seek,
+  summary columns only)
+- offset: the same page through OFFSET over full recipe documents
+"docs read" is what Firestore would bill per page: an offset query is charged for every
+skipped document, a cursor query only for the documents returned (+1 for the next-page probe).
+
+A page of a user's saved recipes is compared with one recipe get per entry (N+1).
+
+Usage (from backend/): python -m benchmarks.recipe_catalog [--recipes 100000] [--page-size 20]
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from app.services.agents.models import Ingredient
+from app.services.recipes import Recipe, RecipeCatalog, SQLiteRecipeStore, SavedRecipe, encode_cursor
+from app.services.urls import normalize_url, recipe_id
+
+REPEAT = 20
+SAVED_RECIPES = 200
+
+INGREDIENTS = [
+    Ingredient(name=name, quantity=quantity, unit=unit)
+    for name, quantity, unit in (
+        ("boneless skinless chicken thighs", 2, "lbs"), ("long-grain white rice", 1.5, "cups"),
+        ("low-sodium chicken broth", 3, "cups"), ("broccoli florets", 4, "cups"), ("garlic", 4, "cloves"),
+        ("soy sauce", 3, "tbsp"), ("honey", 2, "tbsp"), ("sesame oil", 1, "tbsp"), ("fresh ginger", 1, "tbsp"),
+        ("green onions", 3, None), ("sesame seeds", 1, "tsp"), ("salt and pepper", "to taste", None),
+    )
+]
+INSTRUCTIONS = [
+    "Whisk the soy sauce, honey, sesame oil, ginger and garlic together in a small bowl.",
+    "Season the chicken with salt and pepper and sear it in a hot skillet until browned on both sides.",
+    "Pour half of the sauce over the chicken, cover and cook until it reaches 165F inside.",
+    "Meanwhile, rinse the rice and simmer it in the broth, covered, for 18 minutes.",
+    "Steam the broccoli for 4 minutes, until bright green and just tender.",
+    "Slice the chicken and toss it with the remaining sauce.",
+    "Divide the rice, chicken and broccoli between meal prep containers.",
+    "Top with green onions and sesame seeds; refrigerate for up to 4 days.",
+]
+
+def build_recipes(count: int) -> list[Recipe]:
+    start = time.time() - count
+    recipes = []
+    for i in range(count):
+        url = normalize_url(f"https://www.example{i % 500}.com/recipes/{i}/honey-garlic-chicken-meal-prep")
+        recipes.append(Recipe(
+            id=recipe_id(url), source_url=url, source_type="youtube" if i % 10 == 0 else "web",
+            title=f"Honey Garlic Chicken Meal Prep #{i}", description="Sticky honey garlic chicken with rice and broccoli, ready for the week.",
+            servings=4, ingredients=INGREDIENTS, instructions=INSTRUCTIONS, created_at=start + i, created_by="seed",
+        ))
+    return recipes
+
+def offset_page(store: SQLiteRecipeStore, offset: int, limit: int) -> list[Recipe]:
+    """
+    Naive listing: OFFSET pagination over full recipe documents
+    """
+    rows = store._query("SELECT recipe FROM recipes ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?", (limit, offset))
+    return [Recipe.model_validate_json(row[0]) for row in rows]
+
+def cursor_at(store: SQLiteRecipeStore, offset: int) -> str | None:
+    """
+    The cursor a client holds after reading `offset` recipes
+    """
+    if offset == 0:
+        return None
+    created_at, key = store._query("SELECT created_at, id FROM recipes ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?", (offset - 1,))[0]
+    return encode_cursor(created_at, key)
+
+async def median_ms(run) -> float:
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        await run()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+    size = args.page_size
+
+    directory = tempfile.TemporaryDirectory()
+    store = SQLiteRecipeStore(f"{directory.name}/recipes.sqlite3")
+    catalog = RecipeCatalog(store, size, 100)
+
+    start = time.perf_counter()
+    recipes = build_recipes(args.recipes)
+    for i in range(0, len(recipes), 5000):
+        await store.add_recipes(recipes[i:i + 5000])
+    print(f"seeded {args.recipes} recipes in {time.perf_counter() - start:.1f} s; medians of {REPEAT} runs, {size} per page\n")
+
+    print(f"{'page':>6} {'offset':>9} {'keyset':>9} {'docs read (offset / keyset)':>29}  same items")
+    for page in (1, 10, 100, 1000, args.recipes // size):
+        offset = (page - 1) * size
+        cursor = cursor_at(store, offset)
+        offset_ms = await median_ms(lambda: asyncio.to_thread(offset_page, store, offset, size))
+        keyset_ms = await median_ms(lambda: catalog.list_recipes(size, cursor))
+        same = [r.id for r in offset_page(store, offset, size)] == [r.id for r in (await catalog.list_recipes(size, cursor)).items]
+        print(f"{page:>6} {offset_ms:>6.2f} ms {keyset_ms:>6.2f} ms {offset + size:>17} / {size + 1:<9}  {'yes' if same else 'NO'}")
+
+    deep = cursor_at(store, args.recipes // 2)
+    filtered_ms = await median_ms(lambda: catalog.list_recipes(size, deep, "youtube"))
+    print(f"\nyoutube-only page from the middle of the catalog (keyset): {filtered_ms:.2f} ms")
+
+    saved_ids = [recipe.id for recipe in recipes[::args.recipes // SAVED_RECIPES]][:SAVED_RECIPES]
+    for n, saved_id in enumerate(saved_ids):
+        await store.save("user-1", SavedRecipe(recipe_id=saved_id, saved_at=time.time() + n, notes="double the broccoli"))
+
+    async def n_plus_one():
+        rows = await store.list_saved("user-1", size + 1, None)
+        return [await store.get_recipe(row[0]) for row in rows[:size]]
+
+    n_plus_one_ms = await median_ms(n_plus_one)
+    batched_ms = await median_ms(lambda: catalog.list_saved("user-1", size))
+    print(f"saved recipes page ({SAVED_RECIPES} saved): one get per entry {n_plus_one_ms:.2f} ms, batched multi-get {batched_ms:.2f} ms")
+    directory.cleanup()
+
+if __name__ == "__main__":
+    asyncio.run(main())
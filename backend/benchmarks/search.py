@@ -0,0 +1,139 @@
+"""
+Benchmark: recipe search index (app/services/search.py) at 100k synthetic recipes.
+
+Recipes are generated from combinations of cuisines, proteins, carbs, vegetables and
+sauces, so common terms ("chicken", "rice") have posting lists of tens of thousands.
+Reports:
+- build time, incremental add cost, the index size (Python heap, as loaded) and snapshot size
+- snapshot save and reload time (reload vs rebuilding from the recipes)
+- latency (median / p95 over the query set) of text, all/any ingredient and autocomplete
+  queries, next to a scan over every recipe for the ingredient queries (what answering
+  them from the documents alone costs), and whether both agree on the "all" results
+
+Usage (from backend/): python -m benchmarks.search [--recipes 100000]
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from app.services.agents.models import Ingredient
+from app.services.agents.nutrition import normalize_name
+from app.services.recipes import Recipe
+from app.services.search import SearchIndex, parse_ingredients
+
+CUISINES = ["Mexican", "Korean", "Thai", "Greek", "Italian", "Indian", "Cajun", "Teriyaki", "Mediterranean", "BBQ", "Lemon Herb", "Honey Garlic", "Chipotle", "Sesame", "Buffalo"]
+PROTEINS = ["chicken breast", "chicken thighs", "ground turkey", "ground beef", "flank steak", "pork tenderloin", "salmon", "shrimp", "tofu", "chickpeas", "black beans", "lentils", "cod", "tempeh", "eggs"]
+CARBS = ["white rice", "brown rice", "quinoa", "sweet potatoes", "penne pasta", "egg noodles", "couscous", "flour tortillas", "baby potatoes", "farro", "orzo", "jasmine rice"]
+VEGETABLES = ["broccoli florets", "bell peppers", "zucchini", "spinach", "green beans", "carrots", "red onion", "cherry tomatoes", "snap peas", "cauliflower", "kale", "mushrooms", "corn", "cucumber", "cabbage"]
+SAUCES = ["soy sauce", "honey", "garlic", "fresh ginger", "lime juice", "olive oil", "greek yogurt", "salsa", "peanut butter", "coconut milk", "tomato paste", "sriracha", "tahini", "chili powder", "smoked paprika"]
+DISHES = ["Bowls", "Meal Prep", "Stir Fry", "Sheet Pan Dinner", "Skillet", "Casserole", "Salad", "Wraps", "Curry", "Bake"]
+
+TEXT_QUERIES = ["chicken", "honey garlic chicken", "spicy thai tofu curry", "salmon quinoa bowl", "sheet pan", "beef broccoli stir fry", "greek yogurt chicken wraps", "lentil"]
+INGREDIENT_QUERIES = ["chicken, rice, broccoli", "salmon, quinoa", "tofu, peanut butter, snap peas", "ground turkey, sweet potatoes, spinach", "eggs, kale", "shrimp, orzo, cherry tomatoes, lime"]
+PREFIXES = ["ch", "chi", "sal", "sw", "br", "teri", "honey gar", "q"]
+
+def build_recipes(count: int) -> list[Recipe]:
+    generator = random.Random(7)
+    start = time.time() - count
+    recipes = []
+    for i in range(count):
+        protein, carb = generator.choice(PROTEINS), generator.choice(CARBS)
+        vegetables = generator.sample(VEGETABLES, generator.randint(1, 3))
+        sauces = generator.sample(SAUCES, generator.randint(2, 5))
+        title = f"{generator.choice(CUISINES)} {protein.split()[-1].title()} and {carb.split()[-1].title()} {generator.choice(DISHES)}"
+        names = [protein, carb, *vegetables, *sauces, "salt and pepper"]
+        recipes.append(Recipe(
+            id=f"{i:032x}", source_url=f"https://example.com/recipes/{i}", source_type="web", title=title,
+            description=f"Easy {title.lower()} with {vegetables[0]}, ready in 30 minutes." if i % 2 else None,
+            servings=4, ingredients=[Ingredient(name=name, quantity=1) for name in names], instructions=["Cook."],
+            created_at=start + i,
+        ))
+    return recipes
+
+def scan_all(recipes: list[Recipe], phrases: list[tuple[str, ...]]) -> set[str]:
+    """
+    The ingredient query answered from the documents alone: every recipe's ingredient
+    names normalized and checked (the same matching rule as the index)
+    """
+    matches = set()
+    for recipe in recipes:
+        tokens = set()
+        for ingredient in recipe.ingredients:
+            tokens.update(normalize_name(ingredient.name))
+        if all(tokens.issuperset(phrase) for phrase in phrases):
+            matches.add(recipe.id)
+    return matches
+
+def latency(run, queries: list, repeat: int = 5) -> tuple[float, float]:
+    times = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            run(query)
+            times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recipes", type=int, default=100_000)
+    args = parser.parse_args()
+
+    recipes = build_recipes(args.recipes)
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.add_all(recipes[:-1000])
+    build_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index.add_all(recipes[-1000:])
+    add_us = (time.perf_counter() - start) / 1000 * 1e6
+
+    directory = tempfile.TemporaryDirectory()
+    path = f"{directory.name}/search_index.npz"
+    start = time.perf_counter()
+    index.save(path)
+    save_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    reloaded = SearchIndex.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    measured = SearchIndex.load(path)
+    heap_mib = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    del measured
+
+    print(f"{args.recipes} recipes, {len(index.postings)} terms, {sum(len(docs) for docs, _ in index.postings.values())} postings\n")
+    print(f"build:    {build_seconds:.1f} s ({add_us:.0f} µs per incremental add), index heap {heap_mib:.0f} MiB")
+    print(f"snapshot: {Path(path).stat().st_size / 2**20:.1f} MiB, saved in {save_ms:.0f} ms, reloaded in {load_ms:.0f} ms"
+          f" (rebuild: {build_seconds * 1000:.0f} ms)\n")
+
+    print(f"{'query':<28} {'median':>9} {'p95':>9}")
+    rows = [
+        ("text (BM25)", lambda q: reloaded.search(q, limit=20), TEXT_QUERIES),
+        ("ingredients, all", lambda q: reloaded.search(ingredients=parse_ingredients(q), mode="all"), INGREDIENT_QUERIES),
+        ("ingredients, any", lambda q: reloaded.search(ingredients=parse_ingredients(q), mode="any"), INGREDIENT_QUERIES),
+        ("text + ingredients", lambda q: reloaded.search("meal prep", parse_ingredients(q)), INGREDIENT_QUERIES),
+        ("autocomplete", lambda q: reloaded.suggest(q), PREFIXES),
+    ]
+    for name, run, queries in rows:
+        median, p95 = latency(run, queries)
+        print(f"{name:<28} {median:>6.2f} ms {p95:>6.2f} ms")
+    median, p95 = latency(lambda q: scan_all(recipes, parse_ingredients(q)), INGREDIENT_QUERIES, repeat=1)
+    print(f"{'ingredients, full scan':<28} {median:>6.2f} ms {p95:>6.2f} ms")
+
+    agree = all(
+        {hit.recipe_id for hit in reloaded.search(ingredients=parse_ingredients(q), limit=args.recipes)} == scan_all(recipes, parse_ingredients(q))
+        for q in INGREDIENT_QUERIES
+    )
+    print(f"\n\"all\" results match the full scan: {'yes' if agree else 'NO'}")
+    print(f"suggest('chi'): {reloaded.suggest('chi')}")
+    print(f"top hit for 'honey garlic chicken': {recipes[int(reloaded.search('honey garlic chicken', limit=1)[0].recipe_id, 16)].title}")
+    directory.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Local stand-ins for the services the workflow calls, for offline benchmarks.
+
+- RecipeSites (HTTPS, self-signed certificate): recipe pages and YouTube. Any path serves
+  a recorded page from benchmarks/fixtures/web (the JSON-LD recipe by default, another
+  one with ?fixture=<name>); /watch and /api/timedtext serve the recorded watch pages and
+  captions in benchmarks/fixtures/youtube for any video ID, with the caption URLs pointed
+  back at the stand-in (point YOUTUBE_BASE_URL at it)
+- FakeOpenAI (HTTP): POST /v1/chat/completions answering structured-output calls, plain and
+  streamed, with the canned JSON in benchmarks/fixtures/openai/<schema name>.json and
+  token usage estimated from the message sizes (point OPENAI_BASE_URL at it)
+
+Both add a configurable latency per request, and count the requests they served.
+
+Run on its own to serve both for a local API server:
+python -m benchmarks.standins [--llm-latency-ms 800] [--rtt-ms 40]
+"""
+
+import argparse
+import json
+import random
+import ssl
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from benchmarks.cold_start import self_signed_certificate
+
+FIXTURES = Path(__file__).parent / "fixtures"
+RECORDED_YOUTUBE = "https://www.youtube.com"
+
+# Recorded videos whose watch page has captions (the others exercise yt-dlp fallbacks,
+# which would go to the network); other video IDs are served one of these
+VIDEO_FIXTURES = ("mealPrep001", "mealPrep002")
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency_seconds = 0.0
+    jitter_seconds = 0.0
+
+    def _wait(self, share: float = 1.0):
+        time.sleep((self.latency_seconds + random.uniform(0, self.jitter_seconds)) * share)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class RecipeSites(_Handler):
+    """
+    Recipe pages and YouTube watch pages / captions
+    """
+    base_url = ""
+    requests = Counter()
+
+    def do_GET(self):
+        self._wait()
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+
+        if parts.path == "/watch":
+            type(self).requests["youtube"] += 1
+            self._send_fixture(FIXTURES / "youtube" / f"watch_{self._video(query.get('v', ''))}.html", "text/html; charset=utf-8")
+        elif parts.path == "/api/timedtext":
+            type(self).requests["captions"] += 1
+            self._send_fixture(FIXTURES / "youtube" / f"captions_{self._video(query.get('v', ''))}.vtt", "text/vtt")
+        else:
+            type(self).requests["web"] += 1
+            self._send_fixture(FIXTURES / "web" / f"{query.get('fixture', 'jsonld_graph')}.html", "text/html; charset=utf-8")
+
+    @staticmethod
+    def _video(video_id: str) -> str:
+        if video_id in VIDEO_FIXTURES:
+            return video_id
+        return VIDEO_FIXTURES[zlib.crc32(video_id.encode()) % len(VIDEO_FIXTURES)]
+
+    def _send_fixture(self, path: Path, content_type: str):
+        if not path.is_file():
+            self._send(404, b"not found", "text/plain")
+            return
+        body = path.read_text(encoding="utf-8").replace(RECORDED_YOUTUBE, self.base_url)
+        self._send(200, body.encode(), content_type)
+
+class FakeOpenAI(_Handler):
+    """
+    OpenAI-compatible chat completions with canned structured outputs
+    """
+    requests = Counter()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if urlsplit(self.path).path.rstrip("/") != "/v1/chat/completions":
+            self._send(404, json.dumps({"error": {"message": "not found"}}).encode(), "application/json")
+            return
+
+        schema = body.get("response_format", {}).get("json_schema", {}).get("name", "")
+        canned = FIXTURES / "openai" / f"{schema}.json"
+        if not canned.is_file():
+            self._send(400, json.dumps({"error": {"message": f"No canned response for {schema!r}"}}).encode(), "application/json")
+            return
+        type(self).requests[schema] += 1
+        content = json.dumps(json.loads(canned.read_text(encoding="utf-8")))
+        prompt_tokens = sum(len(message.get("content") or "") for message in body.get("messages", [])) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4, "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        model = body.get("model", "gpt-4o-mini")
+
+        if body.get("stream"):
+            self._stream(completion_id, model, content, usage if body.get("stream_options", {}).get("include_usage") else None)
+            return
+
+        self._wait()
+        response = {
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content, "refusal": None}, "logprobs": None, "finish_reason": "stop"}],
+            "usage": usage,
+        }
+        self._send(200, json.dumps(response).encode(), "application/json")
+
+    def _stream(self, completion_id: str, model: str, content: str, usage: dict | None):
+        """
+        Server-sent chunks: the first after a third of the latency, the rest spread over the remainder
+        """
+        pieces = [content[i:i + 64] for i in range(0, len(content), 64)]
+        chunk = lambda delta, finish_reason=None: {
+            "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+        }
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self._wait(1 / 3)
+        events = [chunk({"role": "assistant", "content": ""})]
+        events += [chunk({"content": piece}) for piece in pieces]
+        events.append(chunk({}, "stop"))
+        if usage is not None:
+            events.append({**chunk({}), "choices": [], "usage": usage})
+        for n, event in enumerate(events):
+            if 0 < n <= len(pieces):
+                self._wait(2 / 3 / len(pieces))
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+class StandIns:
+    """
+    Both stand-ins, served from background threads
+    """
+
+    def __init__(self, rtt_ms: float = 40, llm_latency_ms: float = 800, llm_jitter_ms: float = 0):
+        self._certificates = tempfile.TemporaryDirectory()
+        self.cert_path, key_path = self_signed_certificate(self._certificates.name)
+        tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        tls.load_cert_chain(self.cert_path, key_path)
+
+        RecipeSites.latency_seconds = rtt_ms / 1000
+        FakeOpenAI.latency_seconds = llm_latency_ms / 1000
+        FakeOpenAI.jitter_seconds = llm_jitter_ms / 1000
+        self.sites = ThreadingHTTPServer(("127.0.0.1", 0), RecipeSites)
+        self.sites.socket = tls.wrap_socket(self.sites.socket, server_side=True)
+        self.openai = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+        self.sites_url = RecipeSites.base_url = f"https://127.0.0.1:{self.sites.server_port}"
+        self.openai_url = f"http://127.0.0.1:{self.openai.server_port}/v1"
+        for server in (self.sites, self.openai):
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def environment(self) -> dict:
+        """
+        Settings pointing an API server at the stand-ins
+        """
+        return {
+            "YOUTUBE_BASE_URL": self.sites_url,
+            "OPENAI_BASE_URL": self.openai_url,
+            "OPENAI_API_KEY": "sk-standin",
+            "REQUESTS_CA_BUNDLE": self.cert_path,
+        }
+
+    def request_counts(self) -> dict:
+        return {**RecipeSites.requests, **{f"openai:{schema}": count for schema, count in FakeOpenAI.requests.items()}}
+
+    def close(self):
+        self.sites.shutdown()
+        self.openai.shutdown()
+        self._certificates.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=40)
+    parser.add_argument("--llm-latency-ms", type=float, default=800)
+    parser.add_argument("--llm-jitter-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    standins = StandIns(args.rtt_ms, args.llm_latency_ms, args.llm_jitter_ms)
+    print("Stand-ins running; start the API with:\n")
+    print(" ".join(f"{name}={value}" for name, value in standins.environment().items()) + " uvicorn app.main:app\n")
+    print(f"recipe pages:  {standins.sites_url}/recipes/<anything>")
+    print("YouTube:       https://www.youtube.com/watch?v=<any 11-character ID>")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\nrequests served: {standins.request_counts()}")
+        standins.close()
+
+if __name__ == "__main__":
+    main()
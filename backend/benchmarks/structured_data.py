@@ -0,0 +1,40 @@
+"""
+Benchmark: structured-data (schema.org) fast path hit rate and speed over the saved page corpus.
+
+For each page in benchmarks/fixtures/web, reports whether a complete recipe was found
+without the LLM and the parse time, next to the trafilatura text extraction the LLM
+path would need.
+
+Usage (from backend/): python -m benchmarks.structured_data
+"""
+
+import time
+from pathlib import Path
+from app.services.agents.structured_data import extract_structured_recipe
+from app.services.agents.extraction import extract_web_page_content
+
+FIXTURES = Path(__file__).parent / "fixtures" / "web"
+REPEAT = 200
+
+def time_ms(func, html: str) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        try:
+            func(html)
+        except ValueError:
+            pass
+    return (time.perf_counter() - start) * 1000 / REPEAT
+
+def main():
+    pages = sorted(FIXTURES.glob("*.html"))
+    hits = 0
+    print(f"{'page':<28} {'hit':<5} {'structured ms':>14} {'trafilatura ms':>15}")
+    for page in pages:
+        html = page.read_text(encoding="utf-8")
+        recipe = extract_structured_recipe(html)
+        hits += recipe is not None
+        print(f"{page.name:<28} {'yes' if recipe else 'no':<5} {time_ms(extract_structured_recipe, html):>14.3f} {time_ms(extract_web_page_content, html):>15.3f}")
+    print(f"\nhit rate: {hits}/{len(pages)} ({hits / len(pages):.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark: fast YouTube metadata/caption path (app/services/agents/youtube.py) against
+recorded responses, offline.
+
+A local HTTP stand-in serves the recorded watch pages and caption files in
+benchmarks/fixtures/youtube, with a simulated network round trip per request. The
+fixtures cover manual + auto captions, auto captions only, a consent interstitial instead
+of the watch page, a caption track that is empty without yt-dlp's proof-of-origin token,
+and a video without captions. The last two fall back to yt-dlp, whose extract_info is
+replaced by the recorded info dicts (ytdlp_info.json); everything else runs the real code.
+
+Each video is fetched cold (empty metadata cache) and warm, and checked against the
+recorded title, description and preprocessed transcript.
+
+With --live URL, times the fast path against yt-dlp's full extraction for a real video
+instead (needs network access).
+
+Usage (from backend/): python -m benchmarks.youtube [--rtt-ms 80] [--live URL]
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+from app.services.agents import youtube
+from app.services.agents.transcript import caption_lines, dedupe_rolling_lines, preprocess_transcript
+from app.services.urls import youtube_video_id
+
+FIXTURES = Path(__file__).parent / "fixtures" / "youtube"
+RECORDED_BASE = "https://www.youtube.com"
+
+VIDEOS = {
+    "mealPrep001": "watch_page",  # manual + auto English tracks, description with "};" inside
+    "mealPrep002": "watch_page",  # auto-generated captions only
+    "mealPrep003": "yt_dlp",      # consent interstitial instead of the watch page
+    "mealPrep004": "yt_dlp",      # caption track empty without a proof-of-origin token
+    "mealPrep005": "watch_page",  # no captions
+}
+
+class StandIn(BaseHTTPRequestHandler):
+    """
+    Serves the recorded responses with their youtube.com URLs pointed at this server
+    """
+    protocol_version = "HTTP/1.1"
+    base_url = ""
+    rtt_seconds = 0.0
+    requests = Counter()
+
+    def do_GET(self):
+        time.sleep(self.rtt_seconds)
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        video_id = query.get("v", "")
+        type(self).requests[parts.path] += 1
+
+        if parts.path == "/watch":
+            self._send_file(FIXTURES / f"watch_{video_id}.html", "text/html")
+        elif parts.path == "/api/timedtext" and query.get("fmt") == "vtt":
+            if video_id == "mealPrep004" and "pot" not in query:
+                self._send(200, b"", "text/vtt")
+            else:
+                self._send_file(FIXTURES / f"captions_{video_id}.vtt", "text/vtt")
+        else:
+            self._send(404, b"not found", "text/plain")
+
+    def _send_file(self, path: Path, content_type: str):
+        if not path.exists():
+            self._send(404, b"not found", "text/plain")
+            return
+        self._send(200, path.read_text(encoding="utf-8").replace(RECORDED_BASE, self.base_url).encode(), content_type)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def expected(video_id: str, infos: dict) -> dict:
+    """
+    Title, description and preprocessed transcript as recorded
+    """
+    if video_id in infos:
+        title, description = infos[video_id]["title"], infos[video_id]["description"]
+    else:
+        page = (FIXTURES / f"watch_{video_id}.html").read_text(encoding="utf-8")
+        details = youtube.player_response(page)["videoDetails"]
+        title, description = details["title"], details["shortDescription"]
+    captions = FIXTURES / f"captions_{video_id}.vtt"
+    lines = dedupe_rolling_lines(caption_lines(captions.read_text(encoding="utf-8"))) if captions.exists() else []
+    return {"title": title, "description": description, "transcript": preprocess_transcript(lines)}
+
+def run_offline(rtt_ms: float):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    StandIn.base_url = f"http://127.0.0.1:{server.server_port}"
+    StandIn.rtt_seconds = rtt_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    youtube.settings.YOUTUBE_BASE_URL = StandIn.base_url
+    infos = json.loads((FIXTURES / "ytdlp_info.json").read_text(encoding="utf-8").replace(RECORDED_BASE, StandIn.base_url))
+    fallbacks = []
+
+    def recorded_extract_info(url: str) -> dict:
+        fallbacks.append(url)
+        return infos[youtube_video_id(url)]
+
+    youtube.extract_info = recorded_extract_info
+
+    print(f"simulated round trip per request: {rtt_ms:.0f} ms\n")
+    print(f"{'video':<12} {'pass':<5} {'source':<11} {'requests':>8} {'ms':>7}  correct")
+    failures = 0
+    for run in ("cold", "warm"):
+        if run == "cold":
+            youtube.get_metadata_cache()._entries.clear()
+        for video_id, fallback_source in VIDEOS.items():
+            StandIn.requests.clear()
+            start = time.perf_counter()
+            video = youtube.fetch_video_captions(f"https://www.youtube.com/watch?v={video_id}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            want = expected(video_id, infos)
+            want_source = fallback_source if run == "cold" else "cache"
+            got = {"title": video["title"], "description": video["description"], "transcript": preprocess_transcript(video["lines"])}
+            correct = got == want and video["source"] == want_source
+            failures += not correct
+            print(f"{video_id:<12} {run:<5} {video['source']:<11} {sum(StandIn.requests.values()):>8} {elapsed_ms:>7.1f}  {'yes' if correct else 'NO'}")
+
+    print(f"\nyt-dlp fallbacks: {len(fallbacks)} ({', '.join(youtube_video_id(url) for url in fallbacks)})")
+    print("all results match the recordings" if not failures else f"{failures} results differ from the recordings")
+    server.shutdown()
+
+def run_live(url: str):
+    video_id = youtube_video_id(url)
+    start = time.perf_counter()
+    metadata = youtube.fetch_watch_metadata(video_id)
+    lines = youtube.download_caption_lines(metadata)
+    fast_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    full = youtube.metadata_from_info(youtube.extract_info(url))
+    full_lines = youtube.download_caption_lines(full)
+    full_ms = (time.perf_counter() - start) * 1000
+
+    print(f"watch page: {fast_ms:8.0f} ms, {len(lines)} caption lines, title {metadata['title']!r}")
+    print(f"yt-dlp:     {full_ms:8.0f} ms, {len(full_lines)} caption lines, title {full['title']!r}")
+    print(f"same title/description: {(metadata['title'], metadata['description']) == (full['title'], full['description'])}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rtt-ms", type=float, default=80)
+    parser.add_argument("--live", metavar="URL")
+    args = parser.parse_args()
+    if args.live:
+        run_live(args.live)
+    else:
+        run_offline(args.rtt_ms)